@@ -0,0 +1,290 @@
+import argparse
+import json
+import sys
+import time
+from typing import IO, Iterable, Iterator
+
+from batch.BatchSolver import BatchResult, PuzzleStatus, solve_records
+from batch.BulkParser import read_puzzles_bulk
+from batch.PackedCorpus import PackedCorpus, is_packed_corpus, read_packed_puzzles, write_packed_corpus
+from batch.ParallelSolver import solve_corpus_parallel, solve_records_parallel
+from batch.PuzzleReader import PuzzleRecord
+from batch.PuzzleStore import LOOKUP_BATCH, PuzzleStore, StoredPuzzle, looked_up, solve_with_store
+from data.Units import DEFAULT_BOX_SIZE, MAX_BOX_SIZE, MIN_BOX_SIZE
+from solver import CachedEngine, Rater, engine_names, get_engine
+from solver.Deadline import SolveTimeout
+from solver.Stats import SolverStats
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the batch command arguments to the given parser.
+    :param parser:
+    :return:
+    """
+    parser.add_argument("input", nargs="?", default="-",
+                        help="puzzle file, one 81 character line, CSV line or multi line grid (SDK) per puzzle, "
+                             "or a packed corpus (see the pack command), '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("-e", "--engine", default="dlx", choices=engine_names(), help="solver engine")
+    parser.add_argument("-t", "--timeout", type=float, default=None, help="time budget per puzzle in seconds")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="worker processes, 1 solves in this process, 0 uses all cores")
+    parser.add_argument("-f", "--format", dest="output_format", default="text", choices=("text", "jsonl"),
+                        help="output record format")
+    parser.add_argument("-c", "--cache", type=int, default=0,
+                        help="capacity of a solution cache that also matches transformed copies of a puzzle, "
+                             "0 for none, each worker process has its own")
+    parser.add_argument("--store", default=None,
+                        help="SQLite store of solved puzzles: stored puzzles are not solved again and new "
+                             "solutions are added to it")
+    parser.add_argument("-s", "--stats", action="store_true",
+                        help="add the search counters and phase times of each puzzle to its record")
+    add_box_size_argument(parser)
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the summary to stderr")
+
+
+def add_box_size_argument(parser: argparse.ArgumentParser):
+    """
+    Adds the box size of the text input puzzles to the given parser.
+    :param parser:
+    :return:
+    """
+    parser.add_argument("-b", "--box-size", type=int, default=DEFAULT_BOX_SIZE,
+                        choices=range(MIN_BOX_SIZE, MAX_BOX_SIZE + 1),
+                        help="box size of the puzzles: 3 for 9x9, 4 for 16x16 (values 1-9 then A-G), 5 for 25x25. "
+                             "Other sizes than 9x9 are solved in this process, and packed corpora are 9x9")
+
+
+def open_input(path: str) -> IO[str] | PackedCorpus:
+    """
+    Opens a puzzle input, a text file or a packed corpus, close it unless it is sys.stdin.
+    :param path: '-' for stdin
+    :return:
+    """
+    if path == "-":
+        return sys.stdin
+    if is_packed_corpus(path):
+        return PackedCorpus(path)
+    return open(path, "r", encoding="utf-8")
+
+
+def read_records(source: IO[str] | PackedCorpus, box_size: int = DEFAULT_BOX_SIZE) -> Iterator[PuzzleRecord]:
+    """
+    Lazily reads the puzzles of an input opened by open_input.
+    :param source:
+    :param box_size: The box size of the puzzles of a text input
+    :return:
+    """
+    if isinstance(source, PackedCorpus):
+        return read_packed_puzzles(source)
+    return read_puzzles_bulk(source, box_size=box_size)
+
+
+def write_results(results: Iterable[BatchResult], output: IO[str], output_format: str,
+                  total_stats: SolverStats | None = None) -> dict[PuzzleStatus, int]:
+    """
+    Writes the results as they come and counts them by status.
+    :param results:
+    :param output:
+    :param output_format: "text" or "jsonl"
+    :param total_stats: The stats of the results are added to it if given
+    :return:
+    """
+    counts = {status: 0 for status in PuzzleStatus}
+    for result in results:
+        output.write(result.to_json() if output_format == "jsonl" else result.to_text())
+        output.write("\n")
+        counts[result.status] += 1
+        if total_stats is not None and result.stats is not None:
+            total_stats.add(result.stats)
+    return counts
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Runs the batch command.
+    :param args: Parsed by a parser set up with add_arguments
+    :return: process exit code, 0 if all puzzles were solved, 1 otherwise
+    """
+    source = open_input(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    total_stats = SolverStats() if args.stats else None
+    cache: CachedEngine | None = None
+    store = PuzzleStore(args.store) if args.store else None
+    start = time.perf_counter()
+    try:
+        # the worker processes exchange 9x9 records
+        parallel = args.jobs != 1 and args.box_size == DEFAULT_BOX_SIZE
+        if not parallel:
+            engine = get_engine(args.engine)
+            if args.cache:
+                engine = cache = CachedEngine(engine, args.cache)
+
+            def solve(records: Iterable[PuzzleRecord]) -> Iterator[BatchResult]:
+                return solve_records(records, engine, args.timeout, args.stats)
+        else:
+            def solve(records: Iterable[PuzzleRecord]) -> Iterator[BatchResult]:
+                return solve_records_parallel(records, args.engine, args.jobs or None, args.timeout, args.stats,
+                                              args.cache)
+        if parallel and store is None and isinstance(source, PackedCorpus):
+            # the packed records go to the workers as they are stored
+            results = solve_corpus_parallel(source, args.engine, args.jobs or None, args.timeout, args.stats,
+                                            args.cache)
+        else:
+            records = read_records(source, args.box_size)
+            results = solve(records) if store is None else solve_with_store(records, solve, store)
+        counts = write_results(results, output, args.output_format, total_stats)
+    finally:
+        if store is not None:
+            store.close()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    seconds = time.perf_counter() - start
+
+    total = sum(counts.values())
+    if not args.quiet:
+        summary = ", ".join(f"{status.value}: {count}" for status, count in counts.items())
+        rate = total / seconds if seconds > 0 else 0.0
+        print(f"{total} puzzles in {seconds:.3f}s ({rate:.1f} puzzles/s), {summary}", file=sys.stderr)
+        if total_stats is not None:
+            print(f"stats: {total_stats}, {total_stats.eliminations} eliminations", file=sys.stderr)
+            phases = ", ".join(f"{phase} {phase_seconds * 1000:.1f}ms"
+                               for phase, phase_seconds in total_stats.phase_seconds.items())
+            if phases:
+                print(f"phases: {phases}", file=sys.stderr)
+        if cache is not None:
+            print(f"cache: {cache.cache}", file=sys.stderr)
+
+    return 0 if counts[PuzzleStatus.SOLVED] == total else 1
+
+
+def add_rate_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the rate command arguments to the given parser.
+    :param parser:
+    :return:
+    """
+    parser.add_argument("input", nargs="?", default="-", help="puzzle file, see the batch command, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("-t", "--search-timeout", type=float, default=1.0,
+                        help="time budget in seconds of the search of puzzles the techniques cannot solve")
+    parser.add_argument("-f", "--format", dest="output_format", default="text", choices=("text", "jsonl"),
+                        help="text writes number, grade, score and puzzle, jsonl adds the techniques")
+    parser.add_argument("--store", default=None,
+                        help="SQLite store of puzzles, see the batch command: stored ratings are reused and new "
+                             "ones are added to it")
+    add_box_size_argument(parser)
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the summary to stderr")
+
+
+def run_rate(args: argparse.Namespace) -> int:
+    """
+    Runs the rate command.
+    :param args: Parsed by a parser set up with add_rate_arguments
+    :return: process exit code, 0 if all puzzles were rated, 1 otherwise
+    """
+    rater = Rater(search_timeout=args.search_timeout)
+    source = open_input(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    store = PuzzleStore(args.store) if args.store else None
+    new_ratings: list[tuple[bytes, StoredPuzzle]] = []
+    start = time.perf_counter()
+    counts: dict[str, int] = {}
+    total = 0
+    try:
+        records = read_records(source, args.box_size)
+        # the stored ratings are looked up LOOKUP_BATCH records per query
+        items = looked_up(records, store) if store is not None else ((record, None) for record in records)
+        for record, stored in items:
+            total += 1
+            error = record.error
+            rating: dict | None = None
+            if record.board is not None:
+                if stored is not None and stored.rating is not None:
+                    rating = stored.rating
+                else:
+                    try:
+                        rating = rater.rate(record.board).to_dict()
+                    except (ValueError, SolveTimeout) as e:
+                        error = str(e) or "Timeout."
+                    if store is not None and rating is not None:
+                        new_ratings.append((bytes(record.board.values), StoredPuzzle(None, rating=rating)))
+                        if len(new_ratings) >= LOOKUP_BATCH:
+                            store.put_many(new_ratings)
+                            new_ratings.clear()
+            label = rating["grade"] if rating is not None else "invalid"
+            counts[label] = counts.get(label, 0) + 1
+            if args.output_format == "jsonl":
+                d = {"number": record.number, "puzzle": record.text}
+                d.update(rating if rating is not None else {"grade": label, "message": error})
+                output.write(json.dumps(d))
+            else:
+                score = rating["score"] if rating is not None else ""
+                output.write(f"{record.number}\t{label}\t{score}\t{record.text}")
+            output.write("\n")
+    finally:
+        if store is not None:
+            store.put_many(new_ratings)
+            store.close()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    seconds = time.perf_counter() - start
+
+    if not args.quiet:
+        summary = ", ".join(f"{label}: {count}" for label, count in counts.items())
+        rate = total / seconds if seconds > 0 else 0.0
+        print(f"{total} puzzles in {seconds:.3f}s ({rate:.1f} puzzles/s), {summary}", file=sys.stderr)
+    return 0 if "invalid" not in counts else 1
+
+
+def add_pack_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the pack command arguments to the given parser.
+    :param parser:
+    :return:
+    """
+    parser.add_argument("input", nargs="?", default="-", help="puzzle file, see the batch command, '-' for stdin")
+    parser.add_argument("-o", "--output", required=True, help="packed corpus file")
+    parser.add_argument("--solve", action="store_true", help="solve the puzzles and store their solutions")
+    parser.add_argument("-e", "--engine", default="dlx", choices=engine_names(), help="solver engine of --solve")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the summary to stderr")
+
+
+def run_pack(args: argparse.Namespace) -> int:
+    """
+    Runs the pack command: converts puzzles to a packed corpus, see batch.PackedCorpus.
+    Puzzles that cannot be read are skipped.
+    :param args: Parsed by a parser set up with add_pack_arguments
+    :return: process exit code, 0 if all puzzles were packed, 1 otherwise
+    """
+    engine = get_engine(args.engine) if args.solve else None
+    skipped = 0
+
+    def puzzles(records: Iterable[PuzzleRecord]) -> Iterator[tuple[bytearray, bytearray | None]]:
+        nonlocal skipped
+        for record in records:
+            if record.board is None:
+                skipped += 1
+                if not args.quiet:
+                    print(f"Puzzle {record.number} skipped: {record.error}", file=sys.stderr)
+                continue
+            solved = engine.solve(record.board) if engine is not None else None
+            yield record.board.values, solved.values if solved is not None else None
+
+    source = open_input(args.input)
+    start = time.perf_counter()
+    try:
+        count = write_packed_corpus(args.output, puzzles(read_records(source)), args.solve)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    seconds = time.perf_counter() - start
+
+    if not args.quiet:
+        print(f"{count} puzzles packed in {seconds:.3f}s, {skipped} skipped", file=sys.stderr)
+    return 0 if skipped == 0 else 1
@@ -0,0 +1,98 @@
+import enum
+import json
+import time
+from typing import Iterable, Iterator
+
+from batch.PuzzleReader import PuzzleRecord
+from solver.Deadline import SolveTimeout
+from solver.Engine import SolverEngine
+from solver.Stats import SolverStats
+
+
+class PuzzleStatus(enum.Enum):
+    SOLVED = "solved"
+    INVALID = "invalid"     # unreadable, conflicting givens or no solution
+    TIMEOUT = "timeout"
+    FAILED = "failed"       # the solver crashed, see BatchResult.message
+
+
+class BatchResult:
+    """
+    The outcome of solving one puzzle of a batch.
+    solution is the solved board in the one line format, None unless status is SOLVED.
+    stats are the search counters of the solve, None unless they were asked for.
+    """
+    __slots__ = ("number", "puzzle", "solution", "status", "seconds", "message", "stats")
+
+    def __init__(self, number: int, puzzle: str, solution: str | None, status: PuzzleStatus, seconds: float,
+                 message: str | None = None, stats: SolverStats | None = None):
+        self.number: int = number
+        self.puzzle: str = puzzle
+        self.solution: str | None = solution
+        self.status: PuzzleStatus = status
+        self.seconds: float = seconds
+        self.message: str | None = message
+        self.stats: SolverStats | None = stats
+
+    def to_dict(self) -> dict:
+        d = {"number": self.number, "puzzle": self.puzzle, "status": self.status.value,
+             "solution": self.solution, "ms": round(self.seconds * 1000, 3)}
+        if self.message:
+            d["message"] = self.message
+        if self.stats is not None:
+            d["stats"] = self.stats.to_dict()
+        return d
+
+    def to_text(self) -> str:
+        """
+        One line: number, status, solution (or the puzzle if not solved), the time in milliseconds
+        and the stats summary if any.
+        :return:
+        """
+        line = f"{self.number}\t{self.status.value}\t{self.solution or self.puzzle}\t{self.seconds * 1000:.3f}"
+        return line if self.stats is None else f"{line}\t{self.stats}"
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+def solve_record(record: PuzzleRecord, engine: SolverEngine, timeout: float | None = None,
+                 with_stats: bool = False) -> BatchResult:
+    """
+    Solves one puzzle and times it.
+    :param record:
+    :param engine:
+    :param timeout: Time budget per puzzle in seconds, None for no limit.
+    :param with_stats: Attach the SolverStats of the solve to the result, which slows the Solver engines down.
+    :return:
+    """
+    if record.board is None:
+        return BatchResult(record.number, record.text, None, PuzzleStatus.INVALID, 0.0, record.error)
+
+    stats = SolverStats() if with_stats else None
+    start = time.perf_counter()
+    try:
+        solved = engine.solve(record.board, timeout, stats)
+    except SolveTimeout:
+        return BatchResult(record.number, record.text, None, PuzzleStatus.TIMEOUT, time.perf_counter() - start,
+                           stats=stats)
+    seconds = time.perf_counter() - start
+
+    if solved is None:
+        return BatchResult(record.number, record.text, None, PuzzleStatus.INVALID, seconds, "No solution.", stats)
+    return BatchResult(record.number, record.text, solved.to_line(), PuzzleStatus.SOLVED, seconds, stats=stats)
+
+
+def solve_records(records: Iterable[PuzzleRecord], engine: SolverEngine,
+                  timeout: float | None = None, with_stats: bool = False) -> Iterator[BatchResult]:
+    """
+    Lazily solves a stream of puzzles, one result per puzzle in input order.
+    Only one puzzle is held at a time, so memory does not grow with the input.
+    :param records: e.g. read_puzzles(file)
+    :param engine:
+    :param timeout: Time budget per puzzle in seconds, None for no limit.
+    :param with_stats: see solve_record
+    :return:
+    """
+    for record in records:
+        yield solve_record(record, engine, timeout, with_stats)
@@ -0,0 +1,367 @@
+"""
+Bulk parsing of puzzle text.
+
+The parser takes whole buffers of text, as many puzzles as they hold, and writes the values of the puzzles it
+reads into one flat bytearray, 81 bytes per puzzle, with no board or cell objects. Lines are converted to values
+by one bytes.translate each.
+A parser reads puzzles of one size, 9x9 by default. On larger boards the values from 10 on are letters (see
+data.Units.SYMBOLS), and the counts below are those of the board size.
+
+Accepted formats, mixed freely:
+- one puzzle per line, 81 characters (the common line format, and SDM files): digits for values, '.', '0', '?',
+  'x', '*', '-' or '_' for empty cells
+- CSV exports: the puzzle is the first field of the line, in the line format, the other fields are ignored, and so
+  is a header line
+- grids over several lines (SDK files, the grids of Samples.py): the cells are the characters of the lines, with
+  whitespace, '|' and '+' ignored, in the same alphabet. Lines of only '-', '=', '+' and '|' separate boxes:
+  always if they have a '+' or a '=' (e.g. "---+---+---"), else unless they are a row of 9 empty cells.
+  A grid ends when 81 cells were read.
+Empty lines, lines starting with '#' and bracketed headers like "[Puzzle]" are skipped.
+
+Text that is not ASCII is read as Latin-1, the characters Latin-1 cannot encode are not cells either: a line with
+one of them (e.g. a full-width digit) is an error, it is not read as a puzzle with an empty cell there.
+
+The puzzles are checked for givens that conflict in a row, column or box, conflicting puzzles are reported as
+errors. The check runs once per buffer on all the puzzles read from it, one big integer bitmask per cell holding
+the digit bit of that cell in every puzzle (see find_conflicts), so it costs less than the parsing itself.
+"""
+import codecs
+import functools
+import itertools
+from typing import IO, Iterator
+
+from batch.PuzzleReader import PuzzleRecord
+from data import SudokuBoard
+from data.Units import DEFAULT_BOX_SIZE, DEFAULT_GEOMETRY, NUM_CELLS, SYMBOLS, Geometry, get_geometry
+
+# the value of each character, INVALID for characters that are not cells
+INVALID: int = 0xFF
+_EMPTY_CHARS = b".0?x*-_X"
+
+# the character that stands for those Latin-1 cannot encode, it is not a cell, see BulkParser.feed
+_UNENCODABLE: str = "\x1a"
+_UNENCODABLE_ERRORS: str = "bulkparser-unencodable"
+codecs.register_error(_UNENCODABLE_ERRORS, lambda error: (_UNENCODABLE * (error.end - error.start), error.end))
+
+
+@functools.lru_cache(maxsize=None)
+def _cell_table(size: int) -> bytes:
+    """
+    The translate table of the cells of a board of the given size: values, empty cells and INVALID.
+    """
+    table = bytearray(0 if b in _EMPTY_CHARS else INVALID for b in range(256))
+    for value, symbol in enumerate(SYMBOLS[:size].encode("ascii"), 1):
+        table[symbol] = value
+        table[ord(chr(symbol).lower())] = value
+    return bytes(table)
+
+
+# characters removed from grid lines, and the characters of box separator lines
+_GRID_IGNORED = b" \t\r|+"
+_SEPARATOR_CHARS = frozenset(b"-=+| \t\r")
+
+# values back to the line format
+_LINE_TABLE: bytes = bytes(ord(SYMBOLS[b - 1]) if 1 <= b <= len(SYMBOLS) else ord(".") for b in range(256))
+
+
+def to_line(values: bytes | bytearray | memoryview) -> str:
+    """
+    Returns values in the one line format.
+    :param values: the values of a board, 0 for empty
+    :return:
+    """
+    return bytes(values).translate(_LINE_TABLE).decode("ascii")
+
+
+def _decode(raw: bytes) -> str:
+    """
+    The raw text of an error, the characters Latin-1 could not encode shown as U+FFFD.
+    """
+    return raw.decode("latin-1").replace(_UNENCODABLE, "\ufffd")
+
+
+def find_conflict(values: bytes | bytearray | memoryview, geometry: Geometry = DEFAULT_GEOMETRY) -> int:
+    """
+    Finds a given that repeats an earlier given of its row, column or box.
+    :param values: The values of a board of the geometry, 0 for empty
+    :param geometry: The tables of the board size, 9x9 by default
+    :return: the index of the cell, -1 if the givens do not conflict
+    """
+    values = bytes(values)
+    units_of = geometry.units_of
+    # the digits seen in each unit, only the givens are visited
+    seen = [0] * len(geometry.units)
+    for index in itertools.compress(range(geometry.num_cells), values):
+        bit = 1 << values[index]
+        row, col, box = units_of[index]
+        if (seen[row] | seen[col] | seen[box]) & bit:
+            return index
+        seen[row] |= bit
+        seen[col] |= bit
+        seen[box] |= bit
+    return -1
+
+
+@functools.lru_cache(maxsize=None)
+def _digit_planes(size: int) -> tuple[bytes, ...]:
+    """
+    The translate tables of the digit bits of a board of the given size, one per byte of the bits: table j maps the
+    digits 8j+1..8j+8 to their bit, the other values to 0.
+    """
+    return tuple(bytes(1 << (v - 1 - 8 * j) if 8 * j < v <= min(8 * j + 8, size) else 0 for v in range(256))
+                 for j in range((size + 7) // 8))
+
+
+def find_conflicts(values: bytes | bytearray | memoryview, geometry: Geometry = DEFAULT_GEOMETRY) -> list[int]:
+    """
+    Finds the boards whose givens conflict in a row, column or box, all the boards at once: the digit bits of a cell
+    in every board are one big integer, a lane per board, and each unit ORs the integers of its cells.
+    :param values: The values of any number of boards of the geometry, num_cells each, 0 for empty
+    :param geometry: The tables of the board size, 9x9 by default
+    :return: the positions of the conflicting boards in values, in order, see find_conflict for their cell
+    """
+    num_cells = geometry.num_cells
+    count = len(values) // num_cells
+    planes = _digit_planes(geometry.size)
+    width = len(planes)
+    values = bytes(values)
+    lanes = bytearray(width * count)
+    masks = []
+    for index in range(num_cells):
+        cells = values[index::num_cells]
+        for j, table in enumerate(planes):
+            lanes[j::width] = cells.translate(table)
+        masks.append(int.from_bytes(lanes, "big"))
+    # the digits seen twice in a unit, lanes never carry into each other
+    repeated = 0
+    for unit in geometry.units:
+        seen = 0
+        for index in unit:
+            mask = masks[index]
+            repeated |= seen & mask
+            seen |= mask
+    if not repeated:
+        return []
+    lanes = repeated.to_bytes(width * count, "big")
+    return sorted(set().union(*(itertools.compress(range(count), lanes[j::width]) for j in range(width))))
+
+
+class ParsedPuzzles:
+    """
+    The puzzles read from a buffer.
+    values holds the num_cells values of each valid puzzle, numbers the input position of each of them, and errors
+    the input position, raw text and message of each puzzle that could not be read.
+    """
+    __slots__ = ("num_cells", "values", "numbers", "errors")
+
+    def __init__(self, num_cells: int = NUM_CELLS):
+        self.num_cells: int = num_cells
+        self.values: bytearray = bytearray()
+        self.numbers: list[int] = []
+        self.errors: list[tuple[int, str, str]] = []
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def puzzle(self, i: int) -> memoryview:
+        """
+        :param i: The position of the puzzle in values, not its input number
+        :return: its num_cells values, a view of values
+        """
+        return memoryview(self.values)[i * self.num_cells:(i + 1) * self.num_cells]
+
+
+class BulkParser:
+    """
+    Parses buffers of text, see the module documentation.
+    A buffer may end in the middle of a line or of a grid, the rest is read from the next buffer.
+    """
+
+    def __init__(self, first_number: int = 0, box_size: int = DEFAULT_BOX_SIZE, check_conflicts: bool = True):
+        """
+        throws ValueError if the box size is not supported, see data.Units.get_geometry
+        :param first_number: The input number of the first puzzle
+        :param box_size: The box size of the puzzles
+        :param check_conflicts: Report the puzzles whose givens conflict as errors, see find_conflicts
+        """
+        self._check_conflicts: bool = check_conflicts
+        self._geometry: Geometry = get_geometry(box_size)
+        self._num_cells: int = self._geometry.num_cells
+        self._cell_table: bytes = _cell_table(self._geometry.size)
+        self._number: int = first_number
+        self._carry: bytes = b""  # the incomplete last line of the previous buffer
+        self._cells: bytearray = bytearray()  # the values of the grid being read
+        self._raw_lines: list[bytes] = []
+        self._raws: list[bytes] = []  # the raw text of the puzzles of the buffer, kept for the conflict check
+        self._csv_header_allowed: bool = True
+
+    def feed(self, data: str | bytes) -> ParsedPuzzles:
+        """
+        Parses a buffer.
+        :param data: Text, str or ASCII bytes
+        :return: The puzzles completed by this buffer
+        """
+        if isinstance(data, str):
+            data = data.encode("latin-1", _UNENCODABLE_ERRORS)
+        data = self._carry + data
+        end = data.rfind(b"\n") + 1
+        self._carry = data[end:]
+        parsed = ParsedPuzzles(self._num_cells)
+        self._parse_lines(data[:end].split(b"\n"), parsed)
+        self._reject_conflicts(parsed)
+        return parsed
+
+    def finish(self) -> ParsedPuzzles:
+        """
+        Parses what is left after the last buffer, call once at the end of the input.
+        :return: The last puzzles, and an error if the input ended in the middle of a grid
+        """
+        parsed = ParsedPuzzles(self._num_cells)
+        carry, self._carry = self._carry, b""
+        self._parse_lines([carry], parsed)
+        self._reject_conflicts(parsed)
+        if self._cells:
+            parsed.errors.append((self._number, self._raw_text(), f"Invalid board: input ended after "
+                                                                  f"{len(self._cells)} values, expected "
+                                                                  f"{self._num_cells}."))
+            self._number += 1
+            self._cells.clear()
+            self._raw_lines.clear()
+        return parsed
+
+    def _raw_text(self) -> str:
+        return _decode(b" ".join(self._raw_lines))
+
+    def _add(self, values: bytes | bytearray, raw: bytes, parsed: ParsedPuzzles):
+        parsed.values += values
+        parsed.numbers.append(self._number)
+        if self._check_conflicts:
+            self._raws.append(raw)
+        self._number += 1
+
+    def _reject_conflicts(self, parsed: ParsedPuzzles):
+        """
+        Moves the puzzles of parsed whose givens conflict to its errors, see find_conflicts.
+        """
+        raws, self._raws = self._raws, []
+        if not self._check_conflicts or not parsed.numbers:
+            return
+        conflicts = find_conflicts(parsed.values, self._geometry)
+        if not conflicts:
+            return
+        num_cells, size = self._num_cells, self._geometry.size
+        values, numbers = parsed.values, parsed.numbers
+        for i in conflicts:
+            puzzle = values[i * num_cells:(i + 1) * num_cells]
+            conflict = find_conflict(puzzle, self._geometry)
+            row, col = divmod(conflict, size)
+            parsed.errors.append((numbers[i], _decode(raws[i]),
+                                  f"Invalid board: {SYMBOLS[puzzle[conflict] - 1]} repeated at row {row + 1}, "
+                                  f"column {col + 1}."))
+        rejected = set(conflicts)
+        kept = [i for i in range(len(numbers)) if i not in rejected]
+        parsed.values = bytearray().join(values[i * num_cells:(i + 1) * num_cells] for i in kept)
+        parsed.numbers = [numbers[i] for i in kept]
+        parsed.errors.sort()
+
+    def _parse_lines(self, lines: list[bytes], parsed: ParsedPuzzles):
+        cells = self._cells
+        cell_table = self._cell_table
+        num_cells = self._num_cells
+        for raw in lines:
+            line = raw.strip()
+            if not line or line[0] in b"#[":
+                continue
+
+            if not cells:
+                if b"," in line:
+                    field = line.split(b",", 1)[0].strip().strip(b"\"'")
+                    values = field.translate(cell_table)
+                    if len(values) == num_cells and INVALID not in values:
+                        self._add(values, field, parsed)
+                    elif not self._csv_header_allowed:
+                        parsed.errors.append((self._number, _decode(line),
+                                              f"Invalid board: the first field is not a {num_cells} cell puzzle."))
+                        self._number += 1
+                    self._csv_header_allowed = False
+                    continue
+                if len(line) == num_cells:
+                    values = line.translate(cell_table)
+                    if INVALID not in values:
+                        self._add(values, line, parsed)
+                        continue
+
+            if _SEPARATOR_CHARS.issuperset(line) and (b"+" in line or b"=" in line or
+                                                      len(line.translate(None, _GRID_IGNORED)) != self._geometry.size):
+                # a box separator, a line of '-' and '|' only may also be a row of empty cells
+                continue
+            values = line.translate(cell_table, _GRID_IGNORED)
+            self._raw_lines.append(line)
+            if INVALID in values:
+                position = values.index(INVALID)
+                bad = _decode(line.translate(None, _GRID_IGNORED)[position:position + 1])
+                parsed.errors.append((self._number, self._raw_text(), f"Invalid board: unexpected character "
+                                                                      f"'{bad}'."))
+                self._number += 1
+                cells.clear()
+                self._raw_lines.clear()
+                continue
+            cells += values
+            if len(cells) < num_cells:
+                continue
+            if len(cells) == num_cells:
+                self._add(cells, b" ".join(self._raw_lines), parsed)
+            else:
+                parsed.errors.append((self._number, self._raw_text(),
+                                      f"Invalid board: found {len(cells)} values, expected {num_cells}."))
+                self._number += 1
+            cells.clear()
+            self._raw_lines.clear()
+
+
+def parse_puzzles(data: str | bytes, box_size: int = DEFAULT_BOX_SIZE) -> ParsedPuzzles:
+    """
+    Parses a whole input at once.
+    :param data:
+    :param box_size: The box size of the puzzles
+    :return:
+    """
+    parser = BulkParser(box_size=box_size)
+    parsed = parser.feed(data)
+    last = parser.finish()
+    parsed.values += last.values
+    parsed.numbers += last.numbers
+    parsed.errors += last.errors
+    return parsed
+
+
+def read_puzzles_bulk(source: IO[str], buffer_size: int = 1 << 20, box_size: int = DEFAULT_BOX_SIZE,
+                      check_conflicts: bool = True) -> Iterator[PuzzleRecord]:
+    """
+    Lazily reads puzzles from a text stream, buffer_size characters at a time: the bulk counterpart of
+    batch.read_puzzles, with the formats of this module.
+    :param source: e.g. an open text file or sys.stdin
+    :param buffer_size:
+    :param box_size: The box size of the puzzles
+    :param check_conflicts: see BulkParser
+    :return:
+    """
+    parser = BulkParser(box_size=box_size, check_conflicts=check_conflicts)
+    while True:
+        data = source.read(buffer_size)
+        parsed = parser.feed(data) if data else parser.finish()
+        errors = iter(parsed.errors)
+        error = next(errors, None)
+        for i, number in enumerate(parsed.numbers):
+            while error is not None and error[0] < number:
+                yield PuzzleRecord(error[0], error[1], None, error[2])
+                error = next(errors, None)
+            values = parsed.puzzle(i)
+            board = SudokuBoard(box_size)
+            board.values[:] = values
+            yield PuzzleRecord(number, to_line(values), board)
+        while error is not None:
+            yield PuzzleRecord(error[0], error[1], None, error[2])
+            error = next(errors, None)
+        if not data:
+            return
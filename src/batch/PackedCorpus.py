@@ -0,0 +1,224 @@
+"""
+Binary puzzle corpora.
+
+A corpus file is a HEADER followed by fixed-size records. A record is a packed puzzle (see data.PackedBoard),
+followed by its packed solution if the corpus has solutions; a solution of empty cells only means the puzzle has
+none. Since records have a fixed size, puzzle i is at a known offset: the reader maps the file in memory and
+reads a puzzle without parsing the ones before it, and hands out record slices without copying them.
+"""
+import mmap
+import struct
+from typing import Iterable, Iterator
+
+from batch.PuzzleReader import PuzzleRecord
+from data import SudokuBoard
+from data.PackedBoard import PACKED_SIZE, pack_values, unpack_values
+
+MAGIC: bytes = b"SDKP"
+FORMAT_VERSION: int = 1
+
+# magic, format version, flags, number of records
+HEADER: struct.Struct = struct.Struct("<4sHHQ")
+
+# header flags
+FLAG_SOLUTIONS: int = 1
+
+
+def is_packed_corpus(path: str) -> bool:
+    """
+    Whether the file starts like a corpus file.
+    :param path:
+    :return:
+    """
+    with open(path, "rb") as source:
+        return source.read(len(MAGIC)) == MAGIC
+
+
+class PackedCorpusWriter:
+    """
+    Writes a corpus file record by record, the number of records is written on close.
+    """
+
+    def __init__(self, path: str, with_solutions: bool = False):
+        """
+        :param path:
+        :param with_solutions: Whether each record has a solution
+        """
+        self._file = open(path, "wb")
+        self._with_solutions: bool = with_solutions
+        self._count: int = 0
+        self._write_header()
+
+    def _write_header(self):
+        flags = FLAG_SOLUTIONS if self._with_solutions else 0
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, self._count))
+
+    def write(self, puzzle: bytes | bytearray, solution: bytes | bytearray | None = None):
+        """
+        Appends a record.
+        :param puzzle: The 81 puzzle values
+        :param solution: The 81 solution values, None if the puzzle has no solution. Ignored without solutions.
+        :return:
+        """
+        self._file.write(pack_values(puzzle))
+        if self._with_solutions:
+            self._file.write(pack_values(solution) if solution is not None else bytes(PACKED_SIZE))
+        self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def close(self):
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self) -> "PackedCorpusWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PackedCorpus:
+    """
+    A corpus file mapped in memory, see the module documentation.
+    The memoryviews returned by records must be released before close.
+    """
+
+    def __init__(self, path: str):
+        """
+        throws ValueError if the file is not a corpus of this format
+        :param path:
+        """
+        with open(path, "rb") as source:
+            self._map: mmap.mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(f"{path} is not a packed corpus: too short.")
+        magic, version, flags, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a packed corpus of format {FORMAT_VERSION}.")
+        self._has_solutions: bool = bool(flags & FLAG_SOLUTIONS)
+        self._record_size: int = PACKED_SIZE * (2 if self._has_solutions else 1)
+        self._count: int = count
+        if HEADER.size + count * self._record_size > len(self._map):
+            self._map.close()
+            raise ValueError(f"{path} is truncated: {count} records expected.")
+        self._view: memoryview = memoryview(self._map)
+
+    @property
+    def has_solutions(self) -> bool:
+        return self._has_solutions
+
+    @property
+    def record_size(self) -> int:
+        return self._record_size
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"Record {index} out of range, the corpus has {self._count}.")
+        return HEADER.size + index * self._record_size
+
+    def packed_puzzle(self, index: int) -> bytes:
+        """
+        :param index: The record number, negative from the end
+        :return: The packed puzzle, see data.PackedBoard
+        """
+        offset = self._offset(index)
+        return bytes(self._view[offset:offset + PACKED_SIZE])
+
+    def puzzle_values(self, index: int) -> bytearray:
+        """
+        :param index: The record number, negative from the end
+        :return: The 81 puzzle values
+        """
+        offset = self._offset(index)
+        return unpack_values(self._view[offset:offset + PACKED_SIZE])
+
+    def __getitem__(self, index: int) -> SudokuBoard:
+        """
+        :param index: The record number, negative from the end
+        :return: A new board with the puzzle values
+        """
+        board = SudokuBoard()
+        board.values[:] = self.puzzle_values(index)
+        return board
+
+    def solution(self, index: int) -> SudokuBoard | None:
+        """
+        throws ValueError if the corpus has no solutions
+        :param index: The record number, negative from the end
+        :return: A new board with the solution, None if the puzzle has none
+        """
+        if not self._has_solutions:
+            raise ValueError("The corpus has no solutions.")
+        offset = self._offset(index) + PACKED_SIZE
+        values = unpack_values(self._view[offset:offset + PACKED_SIZE])
+        if not any(values):
+            return None
+        board = SudokuBoard()
+        board.values[:] = values
+        return board
+
+    def records(self, start: int = 0, stop: int | None = None) -> memoryview:
+        """
+        The packed records from start to stop, without a copy.
+        :param start:
+        :param stop: None for the end of the corpus
+        :return: (stop - start) * record_size bytes
+        """
+        start, stop, _ = slice(start, stop).indices(self._count)
+        stop = max(start, stop)
+        return self._view[HEADER.size + start * self._record_size:HEADER.size + stop * self._record_size]
+
+    def __iter__(self) -> Iterator[SudokuBoard]:
+        for index in range(self._count):
+            yield self[index]
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> "PackedCorpus":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_packed_puzzles(corpus: PackedCorpus) -> Iterator[PuzzleRecord]:
+    """
+    The puzzles of a corpus as batch records, the counterpart of batch.read_puzzles.
+    :param corpus:
+    :return:
+    """
+    for number in range(len(corpus)):
+        try:
+            board = corpus[number]
+        except ValueError as e:
+            yield PuzzleRecord(number, corpus.packed_puzzle(number).hex(), None, str(e))
+            continue
+        yield PuzzleRecord(number, board.to_line(), board)
+
+
+def write_packed_corpus(path: str, puzzles: Iterable[tuple[bytes | bytearray, bytes | bytearray | None]],
+                        with_solutions: bool = False) -> int:
+    """
+    Writes a corpus file.
+    :param path:
+    :param puzzles: The values of each puzzle and of its solution, None if it has none or it is not known
+    :param with_solutions: Whether the records hold the solutions
+    :return: the number of records written
+    """
+    with PackedCorpusWriter(path, with_solutions) as writer:
+        for puzzle, solution in puzzles:
+            writer.write(puzzle, solution)
+        return writer.count
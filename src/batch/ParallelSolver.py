@@ -0,0 +1,423 @@
+"""
+Multi-core batch solving.
+
+Puzzles are cut into chunks and solved by a pool of worker processes. A chunk does not travel as pickled boards:
+the main process packs its puzzles into a shared memory block of 81-byte records (one byte per cell, 0 for empty),
+and the worker writes its results into a second block of fixed-size records (solution, status, time).
+Only the block names and counts are pickled, the SolverStats of the chunk when stats are asked for, and the
+message of each puzzle the engine failed on.
+The puzzles of a packed corpus (see batch.PackedCorpus) skip the boards altogether: the records of a chunk are
+copied to its input block as they are stored, and the workers unpack them.
+
+Chunks are consumed in submission order, so results come out in input order, and at most a few chunks per worker
+are in flight, so memory stays bounded whatever the input size.
+The chunk size adapts so that a chunk takes about target_chunk_seconds to solve.
+
+If a worker process dies, the pool breaks and every chunk in flight fails with it. The chunks in flight are then
+re-run one at a time on a fresh pool, so only the chunk that kills a worker again is marked FAILED.
+"""
+import collections
+import concurrent.futures
+import os
+import struct
+import time
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator
+
+from batch.BatchSolver import BatchResult, PuzzleStatus
+from batch.BulkParser import to_line
+from batch.PackedCorpus import PackedCorpus
+from batch.PuzzleReader import PuzzleRecord
+from data import SudokuBoard
+from data.PackedBoard import PACKED_SIZE, unpack_values
+from data.Units import NUM_CELLS
+from solver.Deadline import SolveTimeout
+from solver.Cache import CachedEngine
+from solver.Engine import SolverEngine, get_engine
+from solver.Stats import SolverStats
+
+# input record: the 81 cell values, first byte SKIP_MARK for records that could not be parsed
+INPUT_RECORD_SIZE: int = NUM_CELLS
+SKIP_MARK: int = 0xFF
+
+# output record: the 81 solution values, a status code and the solve time in seconds
+OUTPUT_RECORD: struct.Struct = struct.Struct(f"<{NUM_CELLS}sBf")
+
+_STATUS_CODES: dict[PuzzleStatus, int] = {status: code for code, status in enumerate(PuzzleStatus)}
+_CODE_STATUS: dict[int, PuzzleStatus] = {code: status for status, code in _STATUS_CODES.items()}
+
+MIN_CHUNK_SIZE: int = 8
+MAX_CHUNK_SIZE: int = 4096
+
+
+# the engine of a worker process, created once by _init_worker
+_worker_engine: SolverEngine | None = None
+
+
+def _init_worker(engine_name: str, cache_size: int):
+    global _worker_engine
+    _worker_engine = get_engine(engine_name)
+    if cache_size:
+        _worker_engine = CachedEngine(_worker_engine, cache_size)
+
+
+def _solve_chunk(input_name: str, output_name: str, count: int, timeout: float | None,
+                 with_stats: bool = False, record_size: int = INPUT_RECORD_SIZE,
+                 packed: bool = False) -> tuple[float, list[SolverStats | None] | None, dict[int, str]]:
+    """
+    Worker side: solve count puzzles and write the results.
+    :param record_size: The size of the input records
+    :param packed: Whether the input records are packed corpus records, else input records of INPUT_RECORD_SIZE
+    :return: the time spent on the chunk, in seconds, the stats of each puzzle if with_stats, and the error
+             message of each FAILED puzzle by position in the chunk
+    """
+    start = time.perf_counter()
+    engine = _worker_engine
+    assert engine is not None
+    # the workers are children of the main process and share its resource tracker, so attaching here does not
+    # make the blocks outlive or die with this worker, the main process unlinks them
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    chunk_stats: list[SolverStats | None] | None = [] if with_stats else None
+    errors: dict[int, str] = {}
+    try:
+        puzzles = input_shm.buf
+        results = output_shm.buf
+        for i in range(count):
+            offset = i * record_size
+            if packed:
+                try:
+                    values = unpack_values(puzzles[offset:offset + PACKED_SIZE])
+                except ValueError:
+                    values = None
+            else:
+                values = bytes(puzzles[offset:offset + INPUT_RECORD_SIZE])
+                if values[0] == SKIP_MARK:
+                    values = None
+            solution = b""
+            seconds = 0.0
+            stats = None
+            if values is None:
+                status = PuzzleStatus.INVALID
+            else:
+                board = SudokuBoard()
+                board.values[:] = values
+                stats = SolverStats() if with_stats else None
+                puzzle_start = time.perf_counter()
+                try:
+                    solved = engine.solve(board, timeout, stats)
+                    if solved is None:
+                        status = PuzzleStatus.INVALID
+                    else:
+                        status = PuzzleStatus.SOLVED
+                        solution = bytes(solved.values)
+                except SolveTimeout:
+                    status = PuzzleStatus.TIMEOUT
+                except Exception as e:
+                    status = PuzzleStatus.FAILED
+                    errors[i] = f"Solver error: {e!r}"
+                seconds = time.perf_counter() - puzzle_start
+            OUTPUT_RECORD.pack_into(results, i * OUTPUT_RECORD.size, solution, _STATUS_CODES[status], seconds)
+            if chunk_stats is not None:
+                chunk_stats.append(stats)
+        # the memoryviews must be released before the blocks are closed
+        del puzzles, results
+    finally:
+        input_shm.close()
+        output_shm.close()
+    return time.perf_counter() - start, chunk_stats, errors
+
+
+class _Chunk:
+    """
+    A chunk of puzzles in flight, owns its two shared memory blocks. Subclasses fill the input block.
+    """
+    __slots__ = ("count", "record_size", "packed", "input_shm", "output_shm", "future", "isolated")
+
+    def __init__(self, count: int, record_size: int = INPUT_RECORD_SIZE, packed: bool = False):
+        """
+        :param count: The number of puzzles
+        :param record_size: The size of the input records, see _solve_chunk
+        :param packed: Whether the input records are packed corpus records
+        """
+        self.count: int = count
+        self.record_size: int = record_size
+        self.packed: bool = packed
+        self.input_shm = shared_memory.SharedMemory(create=True, size=max(1, count * record_size))
+        self.output_shm = shared_memory.SharedMemory(create=True, size=max(1, count * OUTPUT_RECORD.size))
+        self.future: concurrent.futures.Future | None = None
+        # True once the chunk was re-run alone after the pool broke
+        self.isolated: bool = False
+
+    def submit(self, pool: concurrent.futures.ProcessPoolExecutor, timeout: float | None, with_stats: bool):
+        self.future = pool.submit(_solve_chunk, self.input_shm.name, self.output_shm.name, self.count,
+                                  timeout, with_stats, self.record_size, self.packed)
+
+    def puzzles(self) -> Iterator[tuple[int, str, str | None]]:
+        """
+        The input number, text and error (None if it could be read) of each puzzle of the chunk.
+        """
+        raise NotImplementedError
+
+    def results(self, chunk_stats: list[SolverStats | None] | None, errors: dict[int, str]) -> list[BatchResult]:
+        """
+        Reads the results written by the worker.
+        :param chunk_stats: The stats returned by the worker, if any
+        :param errors: The messages of the FAILED puzzles returned by the worker
+        """
+        results = []
+        buf = self.output_shm.buf
+        for i, (number, text, error) in enumerate(self.puzzles()):
+            solution, code, seconds = OUTPUT_RECORD.unpack_from(buf, i * OUTPUT_RECORD.size)
+            status = _CODE_STATUS[code]
+            if error is not None:
+                results.append(BatchResult(number, text, None, PuzzleStatus.INVALID, 0.0, error))
+                continue
+            line = "".join(str(v) for v in solution) if status == PuzzleStatus.SOLVED else None
+            message = "No solution." if status == PuzzleStatus.INVALID else errors.get(i)
+            stats = chunk_stats[i] if chunk_stats is not None else None
+            results.append(BatchResult(number, text, line, status, seconds, message, stats))
+        del buf
+        return results
+
+    def failed(self, message: str) -> list[BatchResult]:
+        return [BatchResult(number, text, None, PuzzleStatus.FAILED, 0.0, message)
+                for number, text, _ in self.puzzles()]
+
+    def release(self):
+        for shm in (self.input_shm, self.output_shm):
+            shm.close()
+            shm.unlink()
+
+
+class _RecordChunk(_Chunk):
+    """
+    A chunk of puzzle records, their boards are written to the input block.
+    """
+    __slots__ = ("records",)
+
+    def __init__(self, records: list[PuzzleRecord]):
+        super().__init__(len(records))
+        self.records: list[PuzzleRecord] = records
+        buf = self.input_shm.buf
+        for i, record in enumerate(records):
+            offset = i * INPUT_RECORD_SIZE
+            if record.board is None:
+                buf[offset] = SKIP_MARK
+            else:
+                buf[offset:offset + INPUT_RECORD_SIZE] = record.board.values
+        del buf
+
+    def puzzles(self) -> Iterator[tuple[int, str, str | None]]:
+        for record in self.records:
+            yield record.number, record.text, record.error if record.board is None else None
+
+
+class _CorpusChunk(_Chunk):
+    """
+    A chunk of the records of a packed corpus, copied to the input block as they are stored.
+    """
+    __slots__ = ("corpus", "start")
+
+    def __init__(self, corpus: PackedCorpus, start: int, stop: int):
+        super().__init__(stop - start, corpus.record_size, packed=True)
+        self.corpus: PackedCorpus = corpus
+        self.start: int = start
+        records = corpus.records(start, stop)
+        buf = self.input_shm.buf
+        buf[:len(records)] = records
+        del buf
+        records.release()
+
+    def puzzles(self) -> Iterator[tuple[int, str, str | None]]:
+        # the text of each puzzle, the counterpart of batch.read_packed_puzzles
+        corpus = self.corpus
+        for number in range(self.start, self.start + self.count):
+            try:
+                yield number, to_line(corpus.puzzle_values(number)), None
+            except ValueError as e:
+                yield number, corpus.packed_puzzle(number).hex(), str(e)
+
+
+class ParallelSolver:
+    """
+    Solves a stream of puzzles on a pool of worker processes, see the module documentation.
+    """
+
+    def __init__(self, engine_name: str, jobs: int | None = None, timeout: float | None = None,
+                 target_chunk_seconds: float = 0.1, initial_chunk_size: int = 32, with_stats: bool = False,
+                 cache_size: int = 0):
+        """
+        :param engine_name: The engine each worker creates, see solver.get_engine
+        :param jobs: Number of worker processes, None or 0 for all cores
+        :param timeout: Time budget per puzzle in seconds, None for no limit
+        :param target_chunk_seconds: The chunk size adapts so that a chunk takes about this long
+        :param initial_chunk_size:
+        :param with_stats: Attach the SolverStats of each solve to its result, see batch.solve_record
+        :param cache_size: Capacity of the solution cache of each worker, see solver.CachedEngine, 0 for none
+        """
+        self._engine_name: str = engine_name
+        self._jobs: int = jobs or os.cpu_count() or 1
+        self._timeout: float | None = timeout
+        self._target_chunk_seconds: float = target_chunk_seconds
+        self._chunk_size: int = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, initial_chunk_size))
+        self._pool: concurrent.futures.ProcessPoolExecutor | None = None
+        self._with_stats: bool = with_stats
+        self._cache_size: int = cache_size
+
+    def _new_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self._jobs, initializer=_init_worker,
+            initargs=(self._engine_name, self._cache_size))
+        return self._pool
+
+    def _adapt_chunk_size(self, chunk_seconds: float):
+        # scale toward the target, at most x2 or /2 per chunk
+        if chunk_seconds <= 0:
+            factor = 2.0
+        else:
+            factor = max(0.5, min(2.0, self._target_chunk_seconds / chunk_seconds))
+        self._chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, int(self._chunk_size * factor)))
+
+    def _chunks(self, records: Iterable[PuzzleRecord]) -> Iterator[list[PuzzleRecord]]:
+        chunk: list[PuzzleRecord] = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self._chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _corpus_chunks(self, corpus: PackedCorpus, start: int, stop: int | None) -> Iterator[_CorpusChunk]:
+        start, stop, _ = slice(start, stop).indices(len(corpus))
+        while start < stop:
+            end = min(stop, start + self._chunk_size)
+            yield _CorpusChunk(corpus, start, end)
+            start = end
+
+    def _run_isolated(self, chunks: list[_Chunk]):
+        """
+        After the pool broke, re-run the chunks that failed with it one at a time, each on a fresh pool.
+        A chunk that breaks its pool again keeps the BrokenProcessPool exception and is marked failed by solve.
+        """
+        concurrent.futures.wait([chunk.future for chunk in chunks])
+        for chunk in chunks:
+            if not isinstance(chunk.future.exception(), BrokenProcessPool):
+                continue
+            chunk.isolated = True
+            chunk.submit(self._new_pool(), self._timeout, self._with_stats)
+            concurrent.futures.wait([chunk.future])
+        self._new_pool()
+
+    def solve(self, records: Iterable[PuzzleRecord]) -> Iterator[BatchResult]:
+        """
+        Lazily solves the puzzles, one result per puzzle in input order.
+        :param records: e.g. batch.read_puzzles(file)
+        :return:
+        """
+        return self._solve(_RecordChunk(records_chunk) for records_chunk in self._chunks(records))
+
+    def solve_corpus(self, corpus: PackedCorpus, start: int = 0, stop: int | None = None) -> Iterator[BatchResult]:
+        """
+        Lazily solves the puzzles of a packed corpus, one result per puzzle in corpus order. The records are copied
+        to the workers as they are stored, no board is built in this process.
+        :param corpus: It must stay open until the results are consumed
+        :param start: The first record
+        :param stop: None for the end of the corpus
+        :return:
+        """
+        return self._solve(self._corpus_chunks(corpus, start, stop))
+
+    def _solve(self, chunks: Iterator[_Chunk]) -> Iterator[BatchResult]:
+        """
+        Solves the chunks, created lazily so that they take the chunk size of the time they are submitted.
+        """
+        pool = self._new_pool()
+        max_in_flight = 2 * self._jobs
+        in_flight: collections.deque[_Chunk] = collections.deque()
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    in_flight.append(chunk)
+                    chunk.submit(pool, self._timeout, self._with_stats)
+                if not in_flight:
+                    return
+
+                chunk = in_flight[0]
+                try:
+                    chunk_seconds, chunk_stats, errors = chunk.future.result()
+                except BrokenProcessPool:
+                    if not chunk.isolated:
+                        # every chunk in flight failed with the pool, find the one that kills workers
+                        self._run_isolated(list(in_flight))
+                        pool = self._pool
+                        continue
+                    in_flight.popleft()
+                    results = chunk.failed("A worker process died while solving this chunk.")
+                    chunk.release()
+                    yield from results
+                    continue
+                except Exception as e:
+                    in_flight.popleft()
+                    results = chunk.failed(f"Worker error: {e!r}")
+                    chunk.release()
+                    yield from results
+                    continue
+
+                in_flight.popleft()
+                self._adapt_chunk_size(chunk_seconds)
+                # the blocks are released before the results are yielded, in case the caller stops here
+                results = chunk.results(chunk_stats, errors)
+                chunk.release()
+                yield from results
+        finally:
+            for chunk in in_flight:
+                if chunk.future is not None:
+                    chunk.future.cancel()
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+            for chunk in in_flight:
+                chunk.release()
+
+
+def solve_records_parallel(records: Iterable[PuzzleRecord], engine_name: str, jobs: int | None = None,
+                           timeout: float | None = None, with_stats: bool = False,
+                           cache_size: int = 0) -> Iterator[BatchResult]:
+    """
+    The multi-core counterpart of batch.solve_records, see ParallelSolver.
+    :param records:
+    :param engine_name:
+    :param jobs: Number of worker processes, None or 0 for all cores
+    :param timeout: Time budget per puzzle in seconds, None for no limit
+    :param with_stats: see batch.solve_record
+    :param cache_size: see ParallelSolver
+    :return:
+    """
+    return ParallelSolver(engine_name, jobs, timeout, with_stats=with_stats, cache_size=cache_size).solve(records)
+
+
+def solve_corpus_parallel(corpus: PackedCorpus, engine_name: str, jobs: int | None = None,
+                          timeout: float | None = None, with_stats: bool = False,
+                          cache_size: int = 0) -> Iterator[BatchResult]:
+    """
+    Solves the puzzles of a packed corpus, see ParallelSolver.solve_corpus and solve_records_parallel.
+    :param corpus:
+    :param engine_name:
+    :param jobs: Number of worker processes, None or 0 for all cores
+    :param timeout: Time budget per puzzle in seconds, None for no limit
+    :param with_stats: see batch.solve_record
+    :param cache_size: see ParallelSolver
+    :return:
+    """
+    return ParallelSolver(engine_name, jobs, timeout, with_stats=with_stats,
+                          cache_size=cache_size).solve_corpus(corpus)
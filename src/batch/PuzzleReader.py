@@ -0,0 +1,74 @@
+from typing import Iterable, Iterator
+
+from data import SudokuBoard
+from data.Units import DEFAULT_BOX_SIZE, SYMBOLS, get_geometry
+
+
+class PuzzleRecord:
+    """
+    One puzzle read from an input stream.
+    number is the 0 based position of the puzzle in the input, text is the puzzle in the one line format
+    (or the raw input if it could not be parsed), board is None when error is set.
+    """
+    __slots__ = ("number", "text", "board", "error")
+
+    def __init__(self, number: int, text: str, board: SudokuBoard | None, error: str | None = None):
+        self.number: int = number
+        self.text: str = text
+        self.board: SudokuBoard | None = board
+        self.error: str | None = error
+
+
+def read_puzzles(lines: Iterable[str], box_size: int = DEFAULT_BOX_SIZE) -> Iterator[PuzzleRecord]:
+    """
+    Lazily reads puzzles from lines of text, one at a time, so any number of puzzles can be streamed.
+
+    Accepted formats, with 81 cells per puzzle on a 9x9 board:
+    - one puzzle per line, one character per cell, digits for values (and letters from 10 on, see
+      SudokuBoard.from_line) and '.' or '0' for empty cells
+    - multi line grids like the ones SudokuBoard.from_string reads (see Samples.py): the non whitespace characters
+      are read as cells, digits (and letters) are values and anything else ('?', 'x', '.', ...) is an empty cell.
+      A grid ends when all its cells were read.
+    Empty lines and lines starting with '#' are skipped.
+
+    :param lines: e.g. an open text file or sys.stdin
+    :param box_size: The box size of the puzzles, all have the same
+    :return:
+    """
+    geometry = get_geometry(box_size)
+    num_cells = geometry.num_cells
+    symbols = SYMBOLS[:geometry.size]
+    # characters of values, and of the one line format
+    value_chars = frozenset(symbols + symbols.lower())
+    line_chars = value_chars | frozenset(".0")
+    number = 0
+    cells: list[str] = []  # cells of the multi line grid being read
+    raw_lines: list[str] = []
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if not cells and len(line) == num_cells and line_chars.issuperset(line):
+            yield PuzzleRecord(number, line, SudokuBoard.from_line(line, box_size))
+            number += 1
+            continue
+
+        raw_lines.append(line)
+        cells.extend(ch for ch in line if not ch.isspace())
+        if len(cells) < num_cells:
+            continue
+
+        if len(cells) == num_cells:
+            text = "".join(ch.upper() if ch in value_chars else "." for ch in cells)
+            yield PuzzleRecord(number, text, SudokuBoard.from_line(text, box_size))
+        else:
+            yield PuzzleRecord(number, " ".join(raw_lines), None,
+                               f"Invalid board: found {len(cells)} values, expected {num_cells}.")
+        number += 1
+        cells.clear()
+        raw_lines.clear()
+
+    if cells:
+        yield PuzzleRecord(number, " ".join(raw_lines), None,
+                           f"Invalid board: input ended after {len(cells)} values, expected {num_cells}.")
@@ -0,0 +1,250 @@
+"""
+A persistent store of solved puzzles.
+
+The store is an SQLite file, one row per puzzle keyed by a 64 bit hash of its values. A row holds the puzzle
+(to rule out hash collisions), whether it has a solution, the solution, and optionally the rating and the
+solve stats as JSON. SQLite keeps the rows on disk behind a bounded page cache, so the store can hold millions
+of puzzles, and several processes can read it while one writes.
+
+Lookups and inserts are batched: get_many runs one query per LOOKUP_BATCH puzzles and put_many inserts any
+number of rows in one transaction. solve_with_store puts a store in front of a batch solving stream.
+"""
+import collections
+import hashlib
+import json
+import sqlite3
+from typing import Callable, Iterable, Iterator, Sequence
+
+from batch.BatchSolver import BatchResult, PuzzleStatus
+from batch.PuzzleReader import PuzzleRecord
+from data.Units import SYMBOLS
+
+# puzzles per lookup query, below the SQLite limit of query parameters
+LOOKUP_BATCH: int = 500
+
+# size of the page cache of a connection in KiB
+CACHE_KIB: int = 16 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    key INTEGER PRIMARY KEY,
+    puzzle BLOB NOT NULL,
+    solved INTEGER,
+    solution BLOB,
+    rating TEXT,
+    stats TEXT
+)
+"""
+
+# a new value of a column only replaces the stored one if it is known
+_UPSERT = """
+INSERT INTO puzzles (key, puzzle, solved, solution, rating, stats) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    puzzle = excluded.puzzle,
+    solved = coalesce(excluded.solved, solved),
+    solution = CASE WHEN excluded.solved IS NULL THEN solution ELSE excluded.solution END,
+    rating = coalesce(excluded.rating, rating),
+    stats = coalesce(excluded.stats, stats)
+"""
+
+
+def puzzle_key(values: bytes | bytearray) -> int:
+    """
+    The store key of a puzzle, a signed 64 bit hash of its values.
+    :param values: The values of a board, 0 for empty
+    :return:
+    """
+    return int.from_bytes(hashlib.blake2b(values, digest_size=8).digest(), "little", signed=True)
+
+
+class StoredPuzzle:
+    """
+    What the store knows of a puzzle.
+    solved is None if only the rating is known, False if the puzzle has no solution.
+    solution is the solved values, None unless solved. rating and stats are the to_dict of a solver.Rating and
+    a solver.SolverStats, None if unknown.
+    """
+    __slots__ = ("solved", "solution", "rating", "stats")
+
+    def __init__(self, solved: bool | None, solution: bytes | None = None, rating: dict | None = None,
+                 stats: dict | None = None):
+        self.solved: bool | None = solved
+        self.solution: bytes | None = solution
+        self.rating: dict | None = rating
+        self.stats: dict | None = stats
+
+
+class PuzzleStore:
+    """
+    See the module documentation. Use it as a context manager, or close it.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens the store, creating the file if needed.
+        :param path:
+        """
+        self._connection: sqlite3.Connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute(f"PRAGMA cache_size = {-CACHE_KIB}")
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self) -> "PuzzleStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT count(*) FROM puzzles").fetchone()[0]
+
+    def get(self, values: bytes | bytearray) -> StoredPuzzle | None:
+        """
+        Looks one puzzle up.
+        :param values: The puzzle values
+        :return: None if the puzzle is not stored
+        """
+        return self.get_many([values])[0]
+
+    def get_many(self, puzzles: Sequence[bytes | bytearray]) -> list[StoredPuzzle | None]:
+        """
+        Looks puzzles up, LOOKUP_BATCH per query.
+        :param puzzles: The values of each puzzle
+        :return: What is stored of each puzzle, None for the puzzles that are not stored
+        """
+        found: dict[int, StoredPuzzle] = {}
+        keys = [puzzle_key(values) for values in puzzles]
+        by_key = dict(zip(keys, puzzles))
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            query = ("SELECT key, puzzle, solved, solution, rating, stats FROM puzzles WHERE key IN "
+                     f"({', '.join('?' * len(batch))})")
+            for key, puzzle, solved, solution, rating, stats in self._connection.execute(query, batch):
+                if puzzle != by_key[key]:
+                    # a hash collision, the stored puzzle is another one
+                    continue
+                found[key] = StoredPuzzle(None if solved is None else bool(solved), solution,
+                                          None if rating is None else json.loads(rating),
+                                          None if stats is None else json.loads(stats))
+        return [found.get(key) for key in keys]
+
+    def put(self, values: bytes | bytearray, solved: bool | None, solution: bytes | bytearray | None = None,
+            rating: dict | None = None, stats: dict | None = None):
+        """
+        Stores what is known of one puzzle, see put_many.
+        """
+        self.put_many([(values, StoredPuzzle(solved, solution, rating, stats))])
+
+    def put_many(self, entries: Iterable[tuple[bytes | bytearray, StoredPuzzle]]):
+        """
+        Stores puzzles in one transaction. The fields that are None do not replace stored ones, so a rating can
+        be added to a solved puzzle and the other way around.
+        :param entries: The values of each puzzle and what is known of it
+        :return:
+        """
+        rows = ((puzzle_key(values), bytes(values), None if stored.solved is None else int(stored.solved),
+                 None if stored.solution is None else bytes(stored.solution),
+                 None if stored.rating is None else json.dumps(stored.rating),
+                 None if stored.stats is None else json.dumps(stored.stats))
+                for values, stored in entries)
+        with self._connection:
+            self._connection.executemany(_UPSERT, rows)
+
+
+def looked_up(records: Iterable[PuzzleRecord],
+              store: PuzzleStore) -> Iterator[tuple[PuzzleRecord, StoredPuzzle | None]]:
+    """
+    Lazily pairs the records with what the store knows of them, looked up LOOKUP_BATCH at a time.
+    Records that could not be parsed are never stored.
+    :param records: e.g. batch.read_puzzles(file)
+    :param store:
+    :return: each record, and None if the store does not know it
+    """
+    batch: list[PuzzleRecord] = []
+
+    def flush() -> Iterator[tuple[PuzzleRecord, StoredPuzzle | None]]:
+        parsed = [record for record in batch if record.board is not None]
+        stored = dict(zip((id(record) for record in parsed),
+                          store.get_many([record.board.values for record in parsed])))
+        for record in batch:
+            yield record, stored.get(id(record))
+        batch.clear()
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= LOOKUP_BATCH:
+            yield from flush()
+    yield from flush()
+
+
+def _stored_result(record: PuzzleRecord, stored: StoredPuzzle) -> BatchResult:
+    if stored.solved:
+        solution = "".join(SYMBOLS[v - 1] for v in stored.solution)
+        return BatchResult(record.number, record.text, solution, PuzzleStatus.SOLVED, 0.0, "Stored.")
+    return BatchResult(record.number, record.text, None, PuzzleStatus.INVALID, 0.0, "No solution (stored).")
+
+
+def solve_with_store(records: Iterable[PuzzleRecord],
+                     solve: Callable[[Iterable[PuzzleRecord]], Iterator[BatchResult]],
+                     store: PuzzleStore) -> Iterator[BatchResult]:
+    """
+    Answers the puzzles the store knows from it and solves the others with solve, results in input order.
+    The new solutions, and the puzzles found to have no solution, are added to the store LOOKUP_BATCH at a time,
+    with their stats if the results have some. Timeouts and failures are not stored.
+    :param records: e.g. batch.read_puzzles(file)
+    :param solve: Lazily solves a stream of records in order, e.g. batch.solve_records with its engine bound
+    :param store:
+    :return:
+    """
+    lookups = looked_up(records, store)
+    # records pulled from lookups and not answered yet, in input order
+    pending: collections.deque[tuple[PuzzleRecord, StoredPuzzle | None]] = collections.deque()
+    # records to solve that solve has not pulled yet
+    to_solve: collections.deque[PuzzleRecord] = collections.deque()
+    new_entries: list[tuple[bytes, StoredPuzzle]] = []
+
+    def misses() -> Iterator[PuzzleRecord]:
+        # solve may read ahead, the records it pulls past the queue are looked up here
+        while True:
+            if to_solve:
+                yield to_solve.popleft()
+                continue
+            item = next(lookups, None)
+            if item is None:
+                return
+            pending.append(item)
+            if item[1] is None or item[1].solved is None:
+                yield item[0]
+
+    results = solve(misses())
+    try:
+        while True:
+            if not pending:
+                item = next(lookups, None)
+                if item is None:
+                    break
+                pending.append(item)
+                if item[1] is None or item[1].solved is None:
+                    to_solve.append(item[0])
+            record, stored = pending.popleft()
+            if stored is not None and stored.solved is not None:
+                yield _stored_result(record, stored)
+                continue
+            result = next(results)
+            if record.board is not None and result.status in (PuzzleStatus.SOLVED, PuzzleStatus.INVALID):
+                solved = result.status == PuzzleStatus.SOLVED
+                new_entries.append((bytes(record.board.values), StoredPuzzle(
+                    solved, bytes(SYMBOLS.index(c) + 1 for c in result.solution) if solved else None,
+                    stats=None if result.stats is None else result.stats.to_dict())))
+                if len(new_entries) >= LOOKUP_BATCH:
+                    store.put_many(new_entries)
+                    new_entries.clear()
+            yield result
+    finally:
+        results.close()
+        store.put_many(new_entries)
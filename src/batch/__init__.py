@@ -0,0 +1,6 @@
+from .PuzzleReader import PuzzleRecord, read_puzzles
+from .BatchSolver import BatchResult, PuzzleStatus, solve_records
+from .ParallelSolver import ParallelSolver, solve_corpus_parallel, solve_records_parallel
+from .PuzzleStore import PuzzleStore, StoredPuzzle, looked_up, solve_with_store
+from .PackedCorpus import PackedCorpus, PackedCorpusWriter, read_packed_puzzles, write_packed_corpus
+from .BulkParser import BulkParser, ParsedPuzzles, parse_puzzles, read_puzzles_bulk
@@ -0,0 +1,200 @@
+"""
+Engine benchmarks and baselines.
+
+A run solves every puzzle of a corpus with one engine and measures:
+- throughput (puzzles/s) and the p50 / p99 latency of a puzzle, over `repeat` rounds. The first solve of the run
+  is a warm up and is not measured.
+- the search counters of solver.Stats (nodes, backtracks), from one round, they do not depend on the machine.
+- the peak memory allocated while solving the corpus once, in a separate round under tracemalloc, which slows
+  everything down and would spoil the timings.
+
+Results are saved as a JSON baseline and later runs are compared against it. Timings and memory are allowed a
+tolerance, the search counters are deterministic and must not grow at all.
+Timing baselines only make sense on the machine that recorded them.
+"""
+import json
+import platform
+import time
+import tracemalloc
+from typing import Sequence
+
+from data import SudokuBoard
+from solver.Deadline import SolveTimeout
+from solver.Engine import SolverEngine
+from solver.Stats import SolverStats
+
+BASELINE_FORMAT: int = 1
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """
+    Nearest rank percentile.
+    :param sorted_values: The values, sorted
+    :param fraction: e.g. 0.99 for the 99th percentile
+    :return:
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(fraction * len(sorted_values) + 0.999999)))
+    return sorted_values[rank - 1]
+
+
+class BenchmarkResult:
+    """
+    The measures of one engine on one corpus.
+    """
+    __slots__ = ("engine", "corpus", "puzzles", "solved", "timeouts", "puzzles_per_second", "p50_ms", "p99_ms",
+                 "nodes", "backtracks", "peak_memory_bytes")
+
+    def __init__(self, engine: str, corpus: str, puzzles: int, solved: int, timeouts: int,
+                 puzzles_per_second: float, p50_ms: float, p99_ms: float, nodes: int, backtracks: int,
+                 peak_memory_bytes: int):
+        self.engine: str = engine
+        self.corpus: str = corpus
+        self.puzzles: int = puzzles
+        self.solved: int = solved
+        self.timeouts: int = timeouts
+        self.puzzles_per_second: float = puzzles_per_second
+        self.p50_ms: float = p50_ms
+        self.p99_ms: float = p99_ms
+        self.nodes: int = nodes
+        self.backtracks: int = backtracks
+        self.peak_memory_bytes: int = peak_memory_bytes
+
+    @property
+    def key(self) -> str:
+        return f"{self.engine}/{self.corpus}"
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @staticmethod
+    def from_dict(d: dict) -> "BenchmarkResult":
+        return BenchmarkResult(**{name: d[name] for name in BenchmarkResult.__slots__})
+
+    def __str__(self):
+        return (f"{self.key:<28} {self.solved:>4}/{self.puzzles:<4} {self.puzzles_per_second:>9.1f}/s "
+                f"p50 {self.p50_ms:>8.3f}ms  p99 {self.p99_ms:>8.3f}ms  "
+                f"nodes {self.nodes:>8}  backtracks {self.backtracks:>8}  "
+                f"peak {self.peak_memory_bytes / 1024:>8.1f}KiB"
+                + (f"  timeouts {self.timeouts}" if self.timeouts else ""))
+
+
+def _solve(engine: SolverEngine, board: SudokuBoard, timeout: float | None,
+           stats: SolverStats | None) -> SudokuBoard | None:
+    try:
+        return engine.solve(board, timeout, stats)
+    except SolveTimeout:
+        return None
+
+
+def run_benchmark(engine: SolverEngine, corpus: str, boards: Sequence[SudokuBoard], repeat: int = 3,
+                  timeout: float | None = 10.0) -> BenchmarkResult:
+    """
+    Benchmarks an engine on a corpus, see the module documentation.
+    :param engine:
+    :param corpus: The corpus name, for the report
+    :param boards: The puzzles of the corpus
+    :param repeat: Number of timed rounds
+    :param timeout: Time budget per puzzle in seconds, None for no limit. Puzzles past it count as timeouts.
+    :return:
+    """
+    if boards:
+        _solve(engine, boards[0], timeout, None)
+
+    # counters and correctness, one round
+    stats = SolverStats()
+    solved = 0
+    timeouts = 0
+    for board in boards:
+        try:
+            if engine.solve(board, timeout, stats) is not None:
+                solved += 1
+        except SolveTimeout:
+            timeouts += 1
+
+    # timings
+    latencies: list[float] = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            puzzle_start = time.perf_counter()
+            _solve(engine, board, timeout, None)
+            latencies.append(time.perf_counter() - puzzle_start)
+    seconds = time.perf_counter() - start
+    latencies.sort()
+
+    # memory, the engine and the puzzles already exist, only the solving is measured
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        for board in boards:
+            _solve(engine, board, timeout, None)
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(engine.name, corpus, len(boards), solved, timeouts,
+                           len(latencies) / seconds if seconds > 0 else 0.0,
+                           percentile(latencies, 0.50) * 1000, percentile(latencies, 0.99) * 1000,
+                           stats.nodes, stats.backtracks, max(0, peak))
+
+
+def save_baseline(results: Sequence[BenchmarkResult], path: str):
+    """
+    Writes the results as a JSON baseline.
+    :param results:
+    :param path:
+    :return:
+    """
+    data = {"format": BASELINE_FORMAT,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": {result.key: result.to_dict() for result in results}}
+    with open(path, "w", encoding="utf-8") as target:
+        json.dump(data, target, indent=2)
+        target.write("\n")
+
+
+def load_baseline(path: str) -> dict[str, BenchmarkResult]:
+    """
+    Reads a JSON baseline.
+    throws ValueError if the file is not a baseline of this format
+    :param path:
+    :return: engine/corpus key -> result
+    """
+    with open(path, "r", encoding="utf-8") as source:
+        data = json.load(source)
+    if data.get("format") != BASELINE_FORMAT:
+        raise ValueError(f"{path} is not a benchmark baseline of format {BASELINE_FORMAT}.")
+    return {key: BenchmarkResult.from_dict(d) for key, d in data["results"].items()}
+
+
+def compare(result: BenchmarkResult, baseline: BenchmarkResult, time_tolerance: float = 0.15,
+            memory_tolerance: float = 0.10) -> list[str]:
+    """
+    Compares a result with its baseline.
+    :param result:
+    :param baseline:
+    :param time_tolerance: Allowed relative slowdown of throughput and latencies
+    :param memory_tolerance: Allowed relative growth of the peak memory
+    :return: One message per regression, empty if there is none
+    """
+    regressions = []
+
+    def check(name: str, current: float, base: float, tolerance: float, higher_is_better: bool = False):
+        worse = current < base * (1 - tolerance) if higher_is_better else current > base * (1 + tolerance)
+        if worse:
+            change = (current - base) / base * 100 if base else float("inf")
+            regressions.append(f"{result.key}: {name} {base:g} -> {current:g} ({change:+.1f}%)")
+
+    if result.solved < baseline.solved:
+        regressions.append(f"{result.key}: solved {baseline.solved} -> {result.solved}")
+    check("puzzles/s", result.puzzles_per_second, baseline.puzzles_per_second, time_tolerance, True)
+    check("p50 ms", result.p50_ms, baseline.p50_ms, time_tolerance)
+    check("p99 ms", result.p99_ms, baseline.p99_ms, time_tolerance)
+    check("nodes", result.nodes, baseline.nodes, 0.0)
+    check("backtracks", result.backtracks, baseline.backtracks, 0.0)
+    check("peak memory bytes", result.peak_memory_bytes, baseline.peak_memory_bytes, memory_tolerance)
+    return regressions
@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+
+from benchmark.Benchmark import compare, load_baseline, run_benchmark, save_baseline
+from benchmark.Corpora import TIERS, corpus_name, load_corpus
+from solver import engine_names, get_engine
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the bench command arguments to the given parser.
+    :param parser:
+    :return:
+    """
+    parser.add_argument("-e", "--engine", dest="engines", action="append", choices=engine_names(),
+                        help="engine to benchmark, repeat for several, all engines by default")
+    parser.add_argument("-c", "--corpus", dest="corpora", action="append",
+                        help=f"corpus tier ({', '.join(TIERS)}) or versioned name (e.g. hard-v1), "
+                             f"repeat for several, the latest version of every tier by default")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="timed rounds per corpus")
+    parser.add_argument("-t", "--timeout", type=float, default=10.0, help="time budget per puzzle in seconds")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with a JSON baseline, exit 1 on regression")
+    parser.add_argument("--time-tolerance", type=float, default=0.15,
+                        help="allowed relative slowdown of throughput and latencies")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10,
+                        help="allowed relative growth of the peak memory")
+    parser.add_argument("-f", "--format", dest="output_format", default="text", choices=("text", "jsonl"),
+                        help="report format")
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Runs the bench command.
+    :param args: Parsed by a parser set up with add_arguments
+    :return: process exit code, 1 if a result regressed against the baseline
+    """
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    corpora = [name if "-v" in name else corpus_name(name) for name in (args.corpora or TIERS)]
+    results = []
+    regressions: list[str] = []
+    for corpus in corpora:
+        boards = load_corpus(corpus)
+        for name in args.engines or engine_names():
+            result = run_benchmark(get_engine(name), corpus, boards, args.repeat, args.timeout)
+            results.append(result)
+            print(json.dumps(result.to_dict()) if args.output_format == "jsonl" else str(result), flush=True)
+            if result.key in baseline:
+                regressions.extend(compare(result, baseline[result.key], args.time_tolerance,
+                                           args.memory_tolerance))
+
+    if args.save:
+        save_baseline(results, args.save)
+    if args.baseline:
+        missing = [result.key for result in results if result.key not in baseline]
+        if missing:
+            print(f"not in the baseline: {', '.join(missing)}", file=sys.stderr)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if not regressions:
+            print("no regression against the baseline", file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,68 @@
+"""
+The bundled benchmark corpora.
+
+A corpus file is corpora/<tier>-v<version>.txt, in the batch input format (one 81 character line per puzzle,
+'#' comment lines). A corpus is never edited once released: a change is a new version, so a baseline recorded
+on hard-v1 stays comparable.
+"""
+import re
+from pathlib import Path
+
+from batch.PuzzleReader import read_puzzles
+from data import SudokuBoard
+
+CORPORA_DIR: Path = Path(__file__).parent / "corpora"
+
+TIERS: tuple[str, ...] = ("easy", "hard", "pathological")
+
+_CORPUS_FILE = re.compile(r"^(?P<tier>[a-z]+)-v(?P<version>\d+)\.txt$")
+
+
+def corpus_versions(tier: str) -> list[int]:
+    """
+    Returns the versions of a tier, oldest first.
+    :param tier:
+    :return:
+    """
+    versions = []
+    for path in CORPORA_DIR.iterdir():
+        match = _CORPUS_FILE.match(path.name)
+        if match and match["tier"] == tier:
+            versions.append(int(match["version"]))
+    return sorted(versions)
+
+
+def corpus_name(tier: str, version: int | None = None) -> str:
+    """
+    Returns the name of a corpus, e.g. "hard-v1".
+    throws ValueError if the tier or version does not exist
+    :param tier: one of TIERS
+    :param version: None for the latest version
+    :return:
+    """
+    versions = corpus_versions(tier)
+    if not versions:
+        raise ValueError(f"Unknown corpus tier '{tier}', expected one of {', '.join(TIERS)}.")
+    if version is None:
+        version = versions[-1]
+    elif version not in versions:
+        raise ValueError(f"Corpus {tier} has no version {version}.")
+    return f"{tier}-v{version}"
+
+
+def load_corpus(name: str) -> list[SudokuBoard]:
+    """
+    Loads a corpus by name, see corpus_name.
+    throws ValueError if a puzzle of the corpus cannot be read
+    :param name: e.g. "hard-v1", or a tier name for its latest version
+    :return:
+    """
+    if _CORPUS_FILE.match(name + ".txt") is None:
+        name = corpus_name(name)
+    with open(CORPORA_DIR / f"{name}.txt", "r", encoding="utf-8") as source:
+        boards = []
+        for record in read_puzzles(source):
+            if record.board is None:
+                raise ValueError(f"Corpus {name}, puzzle {record.number}: {record.error}")
+            boards.append(record.board)
+    return boards
@@ -0,0 +1,2 @@
+from .Benchmark import BenchmarkResult, run_benchmark, save_baseline, load_baseline, compare
+from .Corpora import TIERS, corpus_name, corpus_versions, load_corpus
@@ -1,12 +1,40 @@
+from typing import Iterator
+
+from data.Units import DEFAULT_BOX_SIZE
+
+# all 9 notes of a 9x9 board cell set, bit (note - 1) represents note
+ALL_NOTES_MASK: int = 0x1FF
+
+
 class Cell:
+    """
+    A single Sudoku cell, of a board of box size b: values and notes go from 1 to b * b (9 on a 9x9 board).
+
+    The notes (candidates) are kept as a (b * b)-bit integer mask, bit (n - 1) is set when note n is present.
+    The b x b note grid used by the GUI (get_note, set_note_by_loc, ...) is a thin view over this mask.
+    """
+
+    __slots__ = ("_value", "_notes_mask", "_box_size")
+
     _value: int | None
 
-    # represents a 3x3 grid of notes, each cell can have a note from 1 to 9
-    _notes: list[bool]
+    # represents a b x b grid of notes, bit (n - 1) is set when note n is present
+    _notes_mask: int
+
+    _box_size: int
 
-    def __init__(self, value: int | None = None):
+    def __init__(self, value: int | None = None, box_size: int = DEFAULT_BOX_SIZE):
+        self._box_size = box_size
         self._value = value
-        self._notes = [False] * 9
+        self._notes_mask = 0
+
+    @property
+    def size(self) -> int:
+        """
+            The largest value of the cell, b * b.
+            :return:
+        """
+        return self._box_size * self._box_size
 
 
     def set_value(self,  value: int | None):
@@ -14,14 +42,14 @@ class Cell:
             Sets the value of the cell
             This also clears the notes of the cell.
 
-            throws ValueError if the value is not between 1 and 9
+            throws ValueError if the value is not between 1 and size
             :param value:
             :return:
         """
-        if value is not None and (value < 1 or value > 9):
-            raise ValueError("Value must be between 1 and 9 or None.")
+        if value is not None and (value < 1 or value > self.size):
+            raise ValueError(f"Value must be between 1 and {self.size} or None.")
         self._value = value
-        self._notes = [False] * 9
+        self._notes_mask = 0
 
     def get_value(self) -> int | None:
         """
@@ -35,39 +63,39 @@ class Cell:
         """
         Sets a note for the cell.
 
-        This method clears the cell's value and sets a note in the notes list at the index corresponding to the given note (1-9).
-        Raises a ValueError if the note is not between 1 and 9.
+        This method clears the cell's value and sets a note in the notes list at the index corresponding to the given note (1-size).
+        Raises a ValueError if the note is not between 1 and size.
 
-        :param note: The note to set (must be between 1 and 9).
-        :raises ValueError: If note is not in the range 1-9.
+        :param note: The note to set (must be between 1 and size).
+        :raises ValueError: If note is not in the range 1-size.
         :return: None
         """
 
-        if note < 1 or note > 9:
-            raise ValueError("Note must be between 1 and 9.")
+        if note < 1 or note > self.size:
+            raise ValueError(f"Note must be between 1 and {self.size}.")
         self._value = None
-        self._notes[note-1] = True
+        self._notes_mask |= 1 << (note - 1)
 
     def clear_note(self, note: int):
         """
         Clears the note of the cell for the given note value.
         This also clears the value of the cell.
-        Raises ValueError if the note is not between 1 and 9.
+        Raises ValueError if the note is not between 1 and size.
 
-        :param note: The note to clear (must be between 1 and 9).
+        :param note: The note to clear (must be between 1 and size).
         :return: None
         """
 
-        if note < 1 or note > 9:
-            raise ValueError("Note must be between 1 and 9.")
+        if note < 1 or note > self.size:
+            raise ValueError(f"Note must be between 1 and {self.size}.")
         self._value = None
-        self._notes[note-1] = False
+        self._notes_mask &= ~(1 << (note - 1))
 
     def set_notes(self, *notes: int):
         """
             Sets the notes of the cell.
             This clear the value of the cell.
-            throws ValueError if the note is not between 1 and 9
+            throws ValueError if the note is not between 1 and size
             :param notes:
             :return:
         """
@@ -78,17 +106,68 @@ class Cell:
     def get_notes(self) -> list[int | None]:
         """
             Returns the notes of the cell.
-            The list contains 9 elements, each element can be None or a number between 1 and 9.
+            The list contains size elements, each element can be None or a number between 1 and size.
+            Prefer get_notes_mask / iter_notes in hot code, this method allocates a new list.
             :return:
         """
-        notes: list[int | None ] = []
-        for i in range(9):
-            if self._notes[i]:
-                notes.append(i + 1)
-            else:
-                notes.append(None)
+        mask = self._notes_mask
+        return [n + 1 if mask >> n & 1 else None for n in range(self.size)]
 
-        return notes
+    def get_notes_mask(self) -> int:
+        """
+            Returns the notes of the cell as a size-bit mask, bit (n - 1) is set when note n is present.
+            :return:
+        """
+        return self._notes_mask
+
+    def set_notes_mask(self, mask: int):
+        """
+            Replaces all the notes of the cell with the given size-bit mask.
+            This clears the value of the cell.
+            throws ValueError if the mask has bits outside the size notes
+            :param mask:
+            :return:
+        """
+        if mask >> self.size:
+            raise ValueError(f"Notes mask must fit in {self.size} bits.")
+        self._value = None
+        self._notes_mask = mask
+
+    def has_note(self, note: int) -> bool:
+        """
+            Returns True if the given note (1-size) is present.
+            :param note:
+            :return:
+        """
+        return bool(self._notes_mask >> (note - 1) & 1)
+
+    def count_notes(self) -> int:
+        """
+            Returns the number of notes in the cell.
+            :return:
+        """
+        return self._notes_mask.bit_count()
+
+    def get_single_note(self) -> int | None:
+        """
+            If the cell has exactly one note, returns it, otherwise returns None.
+            :return:
+        """
+        mask = self._notes_mask
+        if mask and not mask & (mask - 1):
+            return mask.bit_length()
+        return None
+
+    def iter_notes(self) -> Iterator[int]:
+        """
+            Iterates over the notes of the cell in increasing order, without building a list.
+            :return:
+        """
+        mask = self._notes_mask
+        while mask:
+            low = mask & -mask
+            yield low.bit_length()
+            mask ^= low
 
     def get_note(self, i, j) -> int | None:
         """
@@ -97,9 +176,11 @@ class Cell:
             :param j:
             :return:
         """
-        if 0 <= i < 3 and 0 <= j < 3:
-            if self._notes[i * 3 + j]:
-                return i * 3 + j + 1
+        box_size = self._box_size
+        if 0 <= i < box_size and 0 <= j < box_size:
+            n = i * box_size + j
+            if self._notes_mask >> n & 1:
+                return n + 1
             else:
                 return None
         else:
@@ -109,26 +190,28 @@ class Cell:
         """
             Sets the note of the cell at the given row and column.
             This clear the value of the cell.
-            throws ValueError if the note is not between 1 and 9
+            throws ValueError if the note is not between 1 and size
             :param note_row:
             :param note_col:
             :return:
         """
-        if (0 > note_row or note_row >= 3) or (0 > note_col or note_col >= 3):
-            raise IndexError("Note Row or column index out of range or note out of range [0,3).")
+        box_size = self._box_size
+        if (0 > note_row or note_row >= box_size) or (0 > note_col or note_col >= box_size):
+            raise IndexError(f"Note Row or column index out of range or note out of range [0,{box_size}).")
         else:
-            self.set_note(note_row * 3 + note_col + 1)  # +1 because notes are 1-indexed (1-9), not 0-indexed (0-8)
+            self.set_note(note_row * box_size + note_col + 1)  # +1 because notes are 1-indexed (1-size), not 0-indexed
 
     def clear_note_by_loc(self, note_row: int, note_col:int):
         """
             Sets the note of the cell at the given row and column.
             This clear the value of the cell.
-            throws ValueError if the note is not between 1 and 9
+            throws ValueError if the note is not between 1 and size
             :param note_row:
             :param note_col:
             :return:
         """
-        if (0 > note_row or note_row >= 3) or (0 > note_col or note_col >= 3):
-            raise IndexError("Note Row or column index out of range or note out of range [0,3).")
+        box_size = self._box_size
+        if (0 > note_row or note_row >= box_size) or (0 > note_col or note_col >= box_size):
+            raise IndexError(f"Note Row or column index out of range or note out of range [0,{box_size}).")
         else:
-            self.clear_note(note_row * 3 + note_col + 1)
+            self.clear_note(note_row * box_size + note_col + 1)
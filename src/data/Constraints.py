@@ -0,0 +1,267 @@
+"""
+Constraints of the Sudoku variants.
+
+A constraint adds to the classic rules of a board:
+- groups of cells whose values are all different (groups). A group of size cells is a unit, it holds every value
+  once (e.g. a diagonal). Smaller groups only forbid repeated values (e.g. the two cells of a knight move).
+- optionally a rule on the values of some cells (rule_cells, feasible, restrict), e.g. the sum of a killer cage.
+
+A board is created with its constraints, SudokuBoard(constraints=[...]). Its geometry (see data.Units) holds the
+units and peers of all the constraints, and the constraints with a rule that watch each cell, built once per set of
+constraints. Solvers only check a rule when a value is placed in one of its cells.
+
+The constraints without parameters are registered by name, see get_constraint.
+"""
+import functools
+from typing import Callable, Iterable
+
+from data.Units import Geometry
+
+
+class Constraint:
+    """
+    Base class of the variant constraints, subclasses implement groups and, if they have a rule, rule_cells,
+    feasible and restrict.
+    Constraints are values: two constraints with the same parameters are equal, so boards with the same
+    constraints share their geometry.
+    """
+
+    # short name, the registry name of the constraints without parameters
+    name: str = ""
+
+    def groups(self, geometry: Geometry) -> Iterable[tuple[int, ...]]:
+        """
+        The groups of cells whose values are all different.
+        :param geometry: The classic tables of the board size
+        :return: flat indexes of the cells of each group
+        """
+        raise NotImplementedError
+
+    def rule_cells(self, geometry: Geometry) -> tuple[int, ...]:
+        """
+        The cells of the rule of the constraint, the rule is checked when a value is placed in one of them.
+        :param geometry: The classic tables of the board size
+        :return: () if the constraint has no rule beyond distinct values
+        """
+        return ()
+
+    def feasible(self, values: bytearray | bytes, size: int) -> bool:
+        """
+        A quick check that the values placed so far can still satisfy the rule, exact once all its cells are set.
+        :param values: The board values, 0 for empty
+        :param size: The largest value
+        :return:
+        """
+        return True
+
+    def restrict(self, values: bytearray | bytes, notes: list[int], eliminations: dict[int, int]) -> bool:
+        """
+        Collects the notes of the empty cells of the rule that no completion of the rule can use.
+        :param values: The board values, 0 for empty
+        :param notes: The board notes masks
+        :param eliminations: flat index -> mask of notes to remove, filled by the constraint
+        :return: False if the rule cannot be satisfied any more
+        """
+        return True
+
+    def _key(self) -> tuple:
+        # the parameters of the constraint
+        return ()
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and other._key() == self._key()
+
+    def __hash__(self) -> int:
+        return hash((type(self), self._key()))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self._key() or '()'}"
+
+
+class DiagonalConstraint(Constraint):
+    """
+    The two main diagonals are units (Sudoku X).
+    """
+
+    name = "diagonal"
+
+    def groups(self, geometry: Geometry) -> Iterable[tuple[int, ...]]:
+        size = geometry.size
+        return (tuple(i * size + i for i in range(size)),
+                tuple(i * size + size - 1 - i for i in range(size)))
+
+
+class WindokuConstraint(Constraint):
+    """
+    The windows between the boxes are units (Windoku, hyper Sudoku): the boxes whose corner is one cell past the
+    corner of a box, four of them on a 9x9 board.
+    """
+
+    name = "windoku"
+
+    def groups(self, geometry: Geometry) -> Iterable[tuple[int, ...]]:
+        box_size, size = geometry.box_size, geometry.size
+        starts = range(1, size - box_size, box_size + 1)
+        return (tuple((top + r) * size + left + c for r in range(box_size) for c in range(box_size))
+                for top in starts for left in starts)
+
+
+class AntiKnightConstraint(Constraint):
+    """
+    Two cells a chess knight move apart have different values.
+    """
+
+    name = "anti_knight"
+
+    def groups(self, geometry: Geometry) -> Iterable[tuple[int, ...]]:
+        size = geometry.size
+        for index in range(geometry.num_cells):
+            row, col = divmod(index, size)
+            # the moves to later rows only, so each pair is listed once
+            for dr, dc in ((1, -2), (1, 2), (2, -1), (2, 1)):
+                r, c = row + dr, col + dc
+                if r < size and 0 <= c < size:
+                    yield index, r * size + c
+
+
+class KillerCage(Constraint):
+    """
+    The values of the cells of a cage are all different and add up to its total (killer Sudoku).
+    """
+
+    name = "killer_cage"
+
+    def __init__(self, cells: Iterable[int], total: int):
+        """
+        throws ValueError if the cage has no cells or repeats one
+        :param cells: The flat indexes of the cells of the cage
+        :param total: The sum of their values
+        """
+        self.cells: tuple[int, ...] = tuple(sorted(cells))
+        self.total: int = total
+        if not self.cells or len(set(self.cells)) != len(self.cells):
+            raise ValueError("A cage must have distinct cells.")
+
+    def _key(self) -> tuple:
+        return self.cells, self.total
+
+    def groups(self, geometry: Geometry) -> Iterable[tuple[int, ...]]:
+        return (self.cells,)
+
+    def rule_cells(self, geometry: Geometry) -> tuple[int, ...]:
+        return self.cells
+
+    def feasible(self, values: bytearray | bytes, size: int) -> bool:
+        placed = 0
+        remaining = self.total
+        empty = 0
+        for index in self.cells:
+            value = values[index]
+            if value:
+                bit = 1 << (value - 1)
+                if placed & bit:
+                    return False
+                placed |= bit
+                remaining -= value
+            else:
+                empty += 1
+        if not empty:
+            return remaining == 0
+        low, high = _sum_bounds(placed, empty, size)
+        return low <= remaining <= high
+
+    def restrict(self, values: bytearray | bytes, notes: list[int], eliminations: dict[int, int]) -> bool:
+        placed = 0
+        remaining = self.total
+        empty: list[int] = []
+        open_notes = 0
+        for index in self.cells:
+            value = values[index]
+            if value:
+                placed |= 1 << (value - 1)
+                remaining -= value
+            else:
+                empty.append(index)
+                open_notes |= notes[index]
+        if not empty:
+            return remaining == 0
+        # the values of each completion, that the notes of the empty cells can hold
+        allowed = 0
+        for combination in _sum_combinations(open_notes & ~placed, len(empty), remaining):
+            allowed |= combination
+        if not allowed:
+            return False
+        for index in empty:
+            removed = notes[index] & ~allowed
+            if removed:
+                eliminations[index] = eliminations.get(index, 0) | removed
+        return True
+
+
+@functools.lru_cache(maxsize=1 << 12)
+def _sum_bounds(placed: int, count: int, size: int) -> tuple[int, int]:
+    """
+    The smallest and the largest sum of count distinct values from 1 to size that are not in the placed mask.
+    """
+    free = [value for value in range(1, size + 1) if not placed >> (value - 1) & 1]
+    if count > len(free):
+        return 1, 0
+    return sum(free[:count]), sum(free[len(free) - count:])
+
+
+@functools.lru_cache(maxsize=1 << 14)
+def _sum_combinations(available: int, count: int, total: int) -> tuple[int, ...]:
+    """
+    The masks of the sets of count distinct values of the available mask that add up to total.
+    """
+    if count == 0:
+        return (0,) if total == 0 else ()
+    if count > available.bit_count():
+        return ()
+    low = available & -available
+    value = low.bit_length()
+    # the values only grow from here, so count of them add up to at least value * count
+    if value * count > total:
+        return ()
+    rest = available ^ low
+    return (tuple(combination | low for combination in _sum_combinations(rest, count - 1, total - value))
+            + _sum_combinations(rest, count, total))
+
+
+_CONSTRAINTS: dict[str, Callable[[], Constraint]] = {}
+
+
+def register_constraint(name: str, factory: Callable[[], Constraint]):
+    """
+    Registers a constraint factory under the given name.
+    :param name:
+    :param factory: Called with no arguments, returns a new constraint.
+    :return:
+    """
+    _CONSTRAINTS[name] = factory
+
+
+def constraint_names() -> list[str]:
+    """
+    Returns the names of the registered constraints.
+    :return:
+    """
+    return sorted(_CONSTRAINTS)
+
+
+def get_constraint(name: str) -> Constraint:
+    """
+    Creates the constraint registered under the given name.
+    throws ValueError if no such constraint
+    :param name:
+    :return:
+    """
+    factory = _CONSTRAINTS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown constraint '{name}', known constraints: {', '.join(constraint_names())}.")
+    return factory()
+
+
+register_constraint(DiagonalConstraint.name, DiagonalConstraint)
+register_constraint(WindokuConstraint.name, WindokuConstraint)
+register_constraint(AntiKnightConstraint.name, AntiKnightConstraint)
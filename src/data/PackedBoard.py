@@ -0,0 +1,45 @@
+"""
+The packed binary format of a board: 4 bits per cell, two cells per byte, the first cell in the high nibble.
+81 cells take PACKED_SIZE = 41 bytes, the low nibble of the last byte is 0.
+
+Packing and unpacking run on whole byte strings (translate and big integers), not cell by cell.
+"""
+from data.Units import NUM_CELLS
+
+PACKED_SIZE: int = (NUM_CELLS + 1) // 2
+
+# byte -> its high nibble, byte -> its low nibble
+_HIGH: bytes = bytes(b >> 4 for b in range(256))
+_LOW: bytes = bytes(b & 0x0F for b in range(256))
+
+
+def pack_values(values: bytes | bytearray | memoryview) -> bytes:
+    """
+    Packs 81 values.
+    throws ValueError if there are not 81 values or a value is above 9, a nibble cannot hold it
+    :param values: 81 values from 0 to 9, 0 for empty
+    :return: PACKED_SIZE bytes
+    """
+    if len(values) != NUM_CELLS or max(values) > 9:
+        raise ValueError(f"Invalid board: {NUM_CELLS} values from 0 to 9 expected.")
+    # the bytes of high and low are below 16, so high << 4 | low combines them byte by byte
+    high = int.from_bytes(values[0::2], "big")
+    low = int.from_bytes(bytes(values[1::2]) + b"\0", "big")
+    return (high << 4 | low).to_bytes(PACKED_SIZE, "big")
+
+
+def unpack_values(packed: bytes | bytearray | memoryview) -> bytearray:
+    """
+    Unpacks 81 values.
+    throws ValueError if a cell is above 9
+    :param packed: PACKED_SIZE bytes, see pack_values
+    :return: the 81 values
+    """
+    packed = bytes(packed)
+    values = bytearray(NUM_CELLS + 1)
+    values[0::2] = packed.translate(_HIGH)
+    values[1::2] = packed.translate(_LOW)
+    del values[NUM_CELLS]
+    if values and max(values) > 9:
+        raise ValueError("Invalid packed board: a cell is above 9.")
+    return values
@@ -1,11 +1,103 @@
 from data.Cell import Cell
+from typing import Sequence
+
+from data.Units import DEFAULT_BOX_SIZE, SYMBOLS, Geometry, box_size_of, get_geometry
+
+
+class _BoardCell(Cell):
+    """
+    A Cell view over one slot of a SudokuBoard.
+    All reads and writes go to the board flat buffers, so the object API and the flat API always agree.
+    """
+
+    __slots__ = ("_board", "_index")
+
+    def __init__(self, board: "SudokuBoard", index: int):
+        # the base Cell storage is not used, the value and notes live in the board
+        self._board = board
+        self._index = index
+
+    @property
+    def _value(self) -> int | None:
+        return self._board._values[self._index] or None
+
+    @_value.setter
+    def _value(self, value: int | None):
+        self._board._values[self._index] = value or 0
+
+    @property
+    def _notes_mask(self) -> int:
+        return self._board._notes[self._index]
+
+    @_notes_mask.setter
+    def _notes_mask(self, mask: int):
+        self._board._notes[self._index] = mask
+
+    @property
+    def _box_size(self) -> int:
+        return self._board._geometry.box_size
 
 
 class SudokuBoard:
-    _grid: list[list[Cell]]
+    """
+    A Sudoku board of box size b, side b * b: 9x9 by default, 16x16 (hexadoku) for b = 4, 25x25 for b = 5.
+
+    The board is backed by flat buffers indexed by index = row * side + col (see data.Units):
+    - _values: one byte per cell, 0 means no value.
+    - _notes: one side-bit notes mask per cell.
+    The index tables of the board size are in the geometry, shared by all boards of that size and constraints.
+    A variant board (diagonal, killer, ...) is created with its constraints, see data.Constraints.
+
+    The flat API (get_value_at, set_value_at, get_notes_mask_at, ...) is what the solvers use.
+    The row/column API and the Cell objects returned by get_cell are kept for the GUI, they are views over the
+    same buffers.
+    """
+    _geometry: Geometry
+    _values: bytearray
+    _notes: list[int]
+    _cells: list[_BoardCell] | None
+
+    def __init__(self, box_size: int = DEFAULT_BOX_SIZE, constraints: Sequence = ()):
+        """
+        throws ValueError if the box size is not supported, see data.Units.get_geometry
+        :param box_size: 3 for the 9x9 board
+        :param constraints: The data.Constraints of a variant, none for the classic rules
+        """
+        self._init_empty(get_geometry(box_size, constraints))
 
-    def __init__(self):
-        self._grid = [[Cell() for _ in range(9)] for _ in range(9)]
+    def _init_empty(self, geometry: Geometry):
+        self._geometry = geometry
+        self._values = bytearray(geometry.num_cells)
+        self._notes = [0] * geometry.num_cells
+        self._cells = None  # created on first get_cell
+
+    @property
+    def geometry(self) -> Geometry:
+        """
+        The index tables of the board size, see data.Units.
+        :return:
+        """
+        return self._geometry
+
+    @property
+    def constraints(self) -> tuple:
+        """
+        The variant constraints of the board, () for the classic rules.
+        :return:
+        """
+        return self._geometry.constraints
+
+    @property
+    def box_size(self) -> int:
+        return self._geometry.box_size
+
+    @property
+    def size(self) -> int:
+        """
+        The side of the board, also its largest value.
+        :return:
+        """
+        return self._geometry.size
 
     def get_cell(self, row: int, col: int) -> Cell:
         """
@@ -15,8 +107,12 @@ class SudokuBoard:
             :return:
         """
 
-        if 0 <= row < 9 and 0 <= col < 9:
-            return self._grid[row][col]
+        size = self._geometry.size
+        if 0 <= row < size and 0 <= col < size:
+            cells = self._cells
+            if cells is None:
+                cells = self._cells = [_BoardCell(self, i) for i in range(self._geometry.num_cells)]
+            return cells[row * size + col]
         else:
             raise IndexError("Row or column index out of range.")
 
@@ -24,28 +120,32 @@ class SudokuBoard:
         """
             Sets the value of the cell at the given row and column.
             This also clears the notes of the cell.
-            throws if row or column index is out of range [0, 9)
-            throws ValueError if the value is not between 1 and 9
+            throws if row or column index is out of range [0, size)
+            throws ValueError if the value is not between 1 and size
             :param row:
             :param col:
             :param value:
             :return:
         """
-        if 0 <= row < 9 and 0 <= col < 9:
-            self._grid[row][col].set_value(value)
+        size = self._geometry.size
+        if 0 <= row < size and 0 <= col < size:
+            if value is not None and (value < 1 or value > size):
+                raise ValueError(f"Value must be between 1 and {size} or None.")
+            self.set_value_at(row * size + col, value or 0)
         else:
             raise IndexError("Row or column index out of range.")
 
     def get_cell_value(self, row: int, col: int) -> int | None:
         """
             Returns the value of the cell at the given row and column.
-            throws if row or column index is out of range [0, 9)
+            throws if row or column index is out of range [0, size)
             :param row:
             :param col:
             :return:
         """
-        if 0 <= row < 9 and 0 <= col < 9:
-            return self._grid[row][col].get_value()
+        size = self._geometry.size
+        if 0 <= row < size and 0 <= col < size:
+            return self._values[row * size + col] or None
         else:
             raise IndexError("Row or column index out of range.")
 
@@ -54,18 +154,21 @@ class SudokuBoard:
             Sets the note of the cell at the given row and column.
             This clear the value of the cell.
 
-            throws if row or column index is out of range [0, 9)
-            throws ValueError if the note is not between 1 and 9
+            throws if row or column index is out of range [0, size)
+            throws ValueError if the note is not between 1 and size
 
             :param row:
             :param col:
             :param note:
             :return:
         """
-        if 0 <= row < 9 and 0 <= col < 9 and 1 <= note <= 9:
+        size = self._geometry.size
+        if 0 <= row < size and 0 <= col < size and 1 <= note <= size:
 
             # Clear the value of the cell before setting the note
-            self._grid[row][col].set_note(note)
+            index = row * size + col
+            self._values[index] = 0
+            self._notes[index] |= 1 << (note - 1)
         else:
             raise IndexError("Row or column index out of range or note out of range.")
 
@@ -74,8 +177,8 @@ class SudokuBoard:
             Sets the note of the cell at the given row and column.
             This clear the value of the cell.
 
-            throws if row or column index is out of range [0, 9)
-            throws ValueError if the note is not between 1 and 9
+            throws if row or column index is out of range [0, size)
+            throws ValueError if the note is not between 1 and size
 
             :param cell_row:
             :param cell_col:
@@ -83,143 +186,330 @@ class SudokuBoard:
             :param note_col:
             :return:
         """
-        if (0 > cell_row or cell_row >= 9) or (0 > cell_col or cell_col >= 9):
-
-            raise IndexError("Cell Row or column index out of range  [0,9).")
-
-        # check the same for note_row and note_col
-        if (0 > note_row or note_row >= 3) or (0 > note_col or note_col >= 3):
-            raise IndexError("Note Row or column index out of range or note out of range [0,3).")
-
-
-        else:
-            self._grid[cell_row][cell_col].set_note_by_loc(note_row, note_col)
+        self._check_note_location(cell_row, cell_col, note_row, note_col)
+        self.get_cell(cell_row, cell_col).set_note_by_loc(note_row, note_col)
 
     def clear_cell_note_by_loc(self, cell_row: int, cell_col: int, note_row: int, note_col):
         """
             Clears the note at the specified location in the cell at the given row and column.
 
-            Throws IndexError if cell or note indices are out of range [0, 9) for cells and [0, 3) for notes.
+            Throws IndexError if cell or note indices are out of range [0, size) for cells and [0, box size) for
+            notes.
 
-            :param cell_row: Row index of the cell (0-8)
-            :param cell_col: Column index of the cell (0-8)
-            :param note_row: Row index of the note (0-2)
-            :param note_col: Column index of the note (0-2)
+            :param cell_row: Row index of the cell (0-8 on a 9x9 board)
+            :param cell_col: Column index of the cell (0-8 on a 9x9 board)
+            :param note_row: Row index of the note (0-2 on a 9x9 board)
+            :param note_col: Column index of the note (0-2 on a 9x9 board)
             :return: None
         """
-        if (0 > cell_row or cell_row >= 9) or (0 > cell_col or cell_col >= 9):
+        self._check_note_location(cell_row, cell_col, note_row, note_col)
+        self.get_cell(cell_row, cell_col).clear_note_by_loc(note_row, note_col)
 
-            raise IndexError("Cell Row or column index out of range  [0,9).")
+    def _check_note_location(self, cell_row: int, cell_col: int, note_row: int, note_col: int):
+        size = self._geometry.size
+        if (0 > cell_row or cell_row >= size) or (0 > cell_col or cell_col >= size):
 
-        # check the same for note_row and note_col
-        if (0 > note_row or note_row >= 3) or (0 > note_col or note_col >= 3):
-            raise IndexError("Note Row or column index out of range or note out of range [0,3).")
+            raise IndexError(f"Cell Row or column index out of range  [0,{size}).")
 
-
-        else:
-            self._grid[cell_row][cell_col].clear_note_by_loc(note_row, note_col)
+        # check the same for note_row and note_col
+        box_size = self._geometry.box_size
+        if (0 > note_row or note_row >= box_size) or (0 > note_col or note_col >= box_size):
+            raise IndexError(f"Note Row or column index out of range or note out of range [0,{box_size}).")
 
     def get_cell_notes(self, row: int, col: int) -> list[int | None]:
         """
             Returns the notes of the cell at the given row and column.
-            throws if row or column index is out of range [0, 9)
+            throws if row or column index is out of range [0, size)
             :param row:
             :param col:
             :return:
         """
-        if 0 <= row < 9 and 0 <= col < 9:
-            return self._grid[row][col].get_notes()
+        size = self._geometry.size
+        if 0 <= row < size and 0 <= col < size:
+            mask = self._notes[row * size + col]
+            return [n + 1 if mask >> n & 1 else None for n in range(size)]
         else:
             raise IndexError("Row or column index out of range.")
 
     def __str__(self):
         """
         Returns a string representation of the Sudoku board.
+        Values from 10 on are written as letters, see data.Units.SYMBOLS.
         :return:
         """
         board_str = ""
-        for row in self._grid:
-            for cell in row:
-                value = cell.get_value()
-                if value is None:
+        values = self._values
+        size = self._geometry.size
+        for row in range(size):
+            for col in range(size):
+                value = values[row * size + col]
+                if not value:
                     board_str += "? "
                 else:
-                    board_str += str(value) + " "
+                    board_str += SYMBOLS[value - 1] + " "
             board_str += "\n"
         return board_str
 
     def get_values_in_3_areas(self, cell_row, cell_col):
         """
-        Returns a list of values in the 3 areas (row, column, and 3x3 grid) that contain the specified cell.
-        :param cell_row: Row index of the cell (0-8)
-        :param cell_col: Column index of the cell (0-8)
+        Returns a list of values in the 3 areas (row, column, and box) that contain the specified cell, and in the
+        groups of the constraints of the board that contain it.
+        :param cell_row: Row index of the cell (0-8 on a 9x9 board)
+        :param cell_col: Column index of the cell (0-8 on a 9x9 board)
         :return: List of values in the 3 areas
         """
-        values = set()
-
-        # Get values in the same row
-        for col in range(9):
-            value = self.get_cell_value(cell_row, col)
-            if value is not None:
-                values.add(value)
+        index = cell_row * self._geometry.size + cell_col
+        values = self._values
+        # the cell itself is part of its 3 areas
+        found = {values[p] for p in self._geometry.peers[index]}
+        found.add(values[index])
+        found.discard(0)
 
-        # Get values in the same column
-        for row in range(9):
-            value = self.get_cell_value(row, cell_col)
-            if value is not None:
-                values.add(value)
+        return list(found)
 
-        # Get values in the same 3x3 grid
-        start_row = (cell_row // 3) * 3
-        start_col = (cell_col // 3) * 3
-        for r in range(start_row, start_row + 3):
-            for c in range(start_col, start_col + 3):
-                value = self.get_cell_value(r, c)
-                if value is not None:
-                    values.add(value)
+    def get_used_mask_at(self, index: int) -> int:
+        """
+        Returns a mask of the values found in the peers of the cell at the given flat index.
+        Bit (v - 1) is set when value v is used by a peer.
+        :param index: Flat index of the cell (0-80 on a 9x9 board)
+        :return:
+        """
+        values = self._values
+        mask = 0
+        for p in self._geometry.peers[index]:
+            v = values[p]
+            if v:
+                mask |= 1 << (v - 1)
+        return mask
+
+    def get_group_used_masks(self) -> list[int]:
+        """
+        Returns, for each group of the geometry (the units first), the mask of the values placed in it.
+        One pass over the board, so the notes of all cells can be computed from it without visiting their peers.
+        :return: bit (v - 1) of masks[g] is set when value v is placed in group g
+        """
+        masks = [0] * len(self._geometry.groups)
+        groups_of = self._geometry.groups_of
+        for index, value in enumerate(self._values):
+            if value:
+                bit = 1 << (value - 1)
+                for g in groups_of[index]:
+                    masks[g] |= bit
+        return masks
+
+    def is_consistent(self) -> bool:
+        """
+        Returns True if no value appears twice in a row, column, box or group of the constraints, and the rules of
+        the constraints (e.g. cage sums) can still be met.
+        Empty cells are not checked, a consistent board may still have no solution.
+        :return:
+        """
+        geometry = self._geometry
+        values = self._values
+        if geometry.constraints:
+            return (self._groups_consistent(geometry.groups_of, len(geometry.groups))
+                    and all(rule.feasible(values, geometry.size) for rule in geometry.rules))
+        units_of = geometry.units_of
+        seen = [0] * len(geometry.units)
+        for index, value in enumerate(values):
+            if not value:
+                continue
+            bit = 1 << value
+            row, col, box = units_of[index]
+            if (seen[row] | seen[col] | seen[box]) & bit:
+                return False
+            seen[row] |= bit
+            seen[col] |= bit
+            seen[box] |= bit
+        return True
+
+    def _groups_consistent(self, groups_of: tuple[tuple[int, ...], ...], num_groups: int) -> bool:
+        seen = [0] * num_groups
+        for index, value in enumerate(self._values):
+            if not value:
+                continue
+            bit = 1 << value
+            for g in groups_of[index]:
+                if seen[g] & bit:
+                    return False
+                seen[g] |= bit
+        return True
 
-        return list(values)
+    @staticmethod
+    def _symbol_value(symbol: str, size: int) -> int:
+        """
+        The value of a cell character, 0 if it is not a value of a board of the given size.
+        """
+        value = SYMBOLS.find(symbol.upper()) + 1
+        return value if value <= size else 0
 
     @staticmethod
-    def from_string(board_str: str) -> 'SudokuBoard':
+    def from_string(board_str: str, box_size: int | None = None) -> 'SudokuBoard':
         """
         Creates a SudokuBoard instance from a string representation of the board.
 
-        Read the string ignore all whitespace. on each non white space advance col and row as needed
+        Read the string ignore all whitespace. on each non white space advance col and row as needed.
+        A value is a number (1 to size) or a letter for the values from 10 on (A is 10, see data.Units.SYMBOLS),
+        any other character is an empty cell.
         :param board_str: String representation of the board
+        :param box_size: The box size of the board, if None it is found from the number of values (81 for 9x9)
         :return: SudokuBoard instance
         """
-        board = SudokuBoard()
-
         values = board_str.strip().split()
+        if box_size is None:
+            box_size = box_size_of(len(values)) or DEFAULT_BOX_SIZE
+        board = SudokuBoard(box_size)
+        size = board.size
+        num_cells = board.geometry.num_cells
+
         row = 0
         col = 0
         n = 0
         for value in values:
             if value.isdigit():
                 board.set_cell_value(row, col, int(value))
+            elif len(value) == 1 and size > 9:
+                board.set_cell_value(row, col, SudokuBoard._symbol_value(value, size) or None)
             col += 1
             n += 1
-            if n > 9 * 9:
-                raise ValueError(f"Invalid board string: too many values. found {n}, expected 81.")
-            if col == 9:
+            if n > num_cells:
+                raise ValueError(f"Invalid board string: too many values. found {n}, expected {num_cells}.")
+            if col == size:
                 col = 0
                 row += 1
 
-        if n < 9 * 9:
-            raise ValueError(f"Invalid board string: not enough values. found {n}, expected 81.")
+        if n < num_cells:
+            raise ValueError(f"Invalid board string: not enough values. found {n}, expected {num_cells}.")
 
         return board
 
+    @staticmethod
+    def from_line(line: str, box_size: int | None = None) -> 'SudokuBoard':
+        """
+        Creates a SudokuBoard from the common one line format: one character per cell, digits 1-9 for values and
+        letters for the values from 10 on (A is 10, see data.Units.SYMBOLS), '.' or '0' for empty cells.
+        Surrounding whitespace is ignored.
+        :param line:
+        :param box_size: The box size of the board, if None it is found from the length of the line (81 for 9x9)
+        :return: SudokuBoard instance
+        """
+        line = line.strip()
+        if box_size is None:
+            box_size = box_size_of(len(line)) or DEFAULT_BOX_SIZE
+        board = SudokuBoard(box_size)
+        size = board.size
+        num_cells = board.geometry.num_cells
+        if len(line) != num_cells:
+            raise ValueError(f"Invalid board line: found {len(line)} characters, expected {num_cells}.")
+        values = board._values
+        for index, ch in enumerate(line):
+            if "1" <= ch <= "9" and ord(ch) - 48 <= size:
+                values[index] = ord(ch) - 48
+            elif ch != "." and ch != "0":
+                value = SudokuBoard._symbol_value(ch, size) if size > 9 else 0
+                if not value:
+                    raise ValueError(f"Invalid board line: unexpected character '{ch}' at {index}.")
+                values[index] = value
+        return board
+
+    def to_line(self, empty: str = ".") -> str:
+        """
+        Returns the board values in the one line format, see from_line.
+        :param empty: The character used for empty cells
+        :return:
+        """
+        return "".join(SYMBOLS[v - 1] if v else empty for v in self._values)
+
     def copy_values_from(self, target: "SudokuBoard") -> None:
         """
         Copies the values from another SudokuBoard instance to this instance.
         Notes are not copied, only the values.
+        throws ValueError if the boards are not of the same size
         :param target: The SudokuBoard instance to copy values from
         :return: None
         """
-        for row in range(9):
-            for col in range(9):
-                value = target.get_cell_value(row, col)
-                self.set_cell_value(row, col, value)
+        if len(target._values) != len(self._values):
+            raise ValueError("Cannot copy the values of a board of another size.")
+        self._values[:] = target._values
+        self._notes[:] = [0] * self._geometry.num_cells
+
+    def copy(self) -> "SudokuBoard":
+        """
+        Returns a copy of this board, values and notes, with the same constraints.
+        :return:
+        """
+        board = SudokuBoard.__new__(SudokuBoard)
+        board._init_empty(self._geometry)
+        board._values[:] = self._values
+        board._notes[:] = self._notes
+        return board
+
+    def __deepcopy__(self, memo) -> "SudokuBoard":
+        return self.copy()
+
+    # ------------------------------------------------------------------
+    # flat API, cells are addressed by index = row * size + col, see data.Units
+
+    @property
+    def values(self) -> bytearray:
+        """
+        The raw values buffer, one byte per cell, 0 means no value.
+        Engines may read it directly and undo logs may restore saved values in place,
+        other writers should use set_value_at.
+        :return:
+        """
+        return self._values
+
+    @property
+    def notes_masks(self) -> list[int]:
+        """
+        The raw notes buffer, one size-bit mask per cell.
+        Engines may read it directly and remove notes of empty cells in place (e.g. peer elimination),
+        other writers should use set_notes_mask_at.
+        :return:
+        """
+        return self._notes
+
+    def get_value_at(self, index: int) -> int:
+        """
+        Returns the value of the cell at the given flat index, 0 if the cell has no value.
+        :param index: Flat index of the cell (0-80 on a 9x9 board)
+        :return:
+        """
+        return self._values[index]
 
+    def set_value_at(self, index: int, value: int):
+        """
+        Sets the value of the cell at the given flat index, 0 clears the value.
+        This also clears the notes of the cell.
+        throws ValueError if the value is not between 0 and size
+        :param index: Flat index of the cell (0-80 on a 9x9 board)
+        :param value:
+        :return:
+        """
+        if value < 0 or value > self._geometry.size:
+            raise ValueError(f"Value must be between 1 and {self._geometry.size} or 0.")
+        self._values[index] = value
+        self._notes[index] = 0
+
+    def get_notes_mask_at(self, index: int) -> int:
+        """
+        Returns the size-bit notes mask of the cell at the given flat index.
+        :param index: Flat index of the cell (0-80 on a 9x9 board)
+        :return:
+        """
+        return self._notes[index]
+
+    def set_notes_mask_at(self, index: int, mask: int):
+        """
+        Replaces the notes of the cell at the given flat index.
+        This clears the value of the cell.
+        throws ValueError if the mask has bits outside the size notes
+        :param index: Flat index of the cell (0-80 on a 9x9 board)
+        :param mask:
+        :return:
+        """
+        if mask & ~self._geometry.all_notes_mask:
+            raise ValueError(f"Notes mask must fit in {self._geometry.size} bits.")
+        self._values[index] = 0
+        self._notes[index] = mask
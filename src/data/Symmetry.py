@@ -0,0 +1,195 @@
+"""
+Validity preserving transformations of the board and canonical forms.
+
+A Transform is a transposition, a row order, a column order and a digit relabeling. Row and column orders only
+move whole bands (stacks) and the lines inside a band (stack), so a valid grid stays valid and a puzzle keeps
+the same number of solutions.
+
+The canonical form of a puzzle is the smallest image of the puzzle under all transformations, digits relabeled
+in order of first appearance, so equivalent puzzles have the same canonical form. Trying all 2 * 1296 * 1296
+line orders is too slow, so the lines are first sorted by invariants (clue counts per line, per box and digit
+frequencies) and only the orders that keep that sort are tried. Puzzles with many tied lines have more orders
+than MAX_CANONICAL_CANDIDATES, only the first ones are tried: the form is then still the image of the puzzle by
+a transformation, but an equivalent puzzle may get a different one.
+"""
+import itertools
+import random
+
+from data.Units import BOX_SIZE, NUM_CELLS, SIZE
+
+# the most line orders tried by canonical_form, for each orientation
+MAX_CANONICAL_CANDIDATES: int = 1024
+
+
+class Transform:
+    """
+    The image of a grid is image[r * 9 + c] = digits[source[rows[r] * 9 + cols[c]]], where source is the grid,
+    transposed first if transpose is True.
+    """
+    __slots__ = ("transpose", "rows", "cols", "digits", "_inverse_digits")
+
+    def __init__(self, transpose: bool, rows: list[int], cols: list[int], digits: list[int]):
+        """
+        :param transpose:
+        :param rows: The source row of each row of the image
+        :param cols: The source column of each column of the image
+        :param digits: digits[d] is the image of digit d, digits[0] must be 0
+        """
+        self.transpose: bool = transpose
+        self.rows: list[int] = rows
+        self.cols: list[int] = cols
+        self.digits: list[int] = digits
+        self._inverse_digits: list[int] = [0] * (SIZE + 1)
+        for d, image in enumerate(digits):
+            self._inverse_digits[image] = d
+
+    def _source_index(self, r: int, c: int) -> int:
+        if self.transpose:
+            return self.cols[c] * SIZE + self.rows[r]
+        return self.rows[r] * SIZE + self.cols[c]
+
+    def apply(self, values: bytes | bytearray) -> bytearray:
+        """
+        Returns the image of the values.
+        :param values: 81 values, 0 for empty
+        :return:
+        """
+        digits = self.digits
+        result = bytearray(NUM_CELLS)
+        for r in range(SIZE):
+            for c in range(SIZE):
+                result[r * SIZE + c] = digits[values[self._source_index(r, c)]]
+        return result
+
+    def invert(self, values: bytes | bytearray) -> bytearray:
+        """
+        Returns the values whose image is the given values, e.g. a solution of the image back in the orientation
+        of the source.
+        :param values: 81 values, 0 for empty
+        :return:
+        """
+        inverse = self._inverse_digits
+        result = bytearray(NUM_CELLS)
+        for r in range(SIZE):
+            for c in range(SIZE):
+                result[self._source_index(r, c)] = inverse[values[r * SIZE + c]]
+        return result
+
+
+def random_transform(rng: random.Random) -> Transform:
+    """
+    Returns a random transformation, every transformation is equally likely.
+    :param rng:
+    :return:
+    """
+    def line_order() -> list[int]:
+        # permute the bands (or stacks), then the lines inside each one
+        bands = rng.sample(range(BOX_SIZE), BOX_SIZE)
+        return [band * BOX_SIZE + line for band in bands for line in rng.sample(range(BOX_SIZE), BOX_SIZE)]
+
+    rows = line_order()
+    cols = line_order()
+    digits = [0] + rng.sample(range(1, SIZE + 1), SIZE)
+    return Transform(rng.random() < 0.5, rows, cols, digits)
+
+
+def _transposed(values: bytes | bytearray) -> bytes:
+    return bytes(values[c * SIZE + r] for r in range(SIZE) for c in range(SIZE))
+
+
+def _line_signatures(grid: bytes, digit_counts: list[int]) -> list[tuple]:
+    """
+    An invariant of each row: the number of clues, the clue counts in its 3 boxes and the frequencies in the
+    whole grid of its digits, the last two sorted. None of them changes when the columns are reordered or the
+    digits relabeled.
+    """
+    signatures = []
+    for r in range(SIZE):
+        row = grid[r * SIZE:(r + 1) * SIZE]
+        per_box = sorted(sum(1 for v in row[b * BOX_SIZE:(b + 1) * BOX_SIZE] if v) for b in range(BOX_SIZE))
+        frequencies = sorted(digit_counts[v] for v in row if v)
+        signatures.append((len(frequencies), tuple(per_box), tuple(frequencies)))
+    return signatures
+
+
+def _tied_orders(items: list[int], key) -> list[list[int]]:
+    """
+    The orders of items sorted by key, with every order of the items of equal key.
+    """
+    groups = [list(group) for _, group in itertools.groupby(sorted(items, key=key), key=key)]
+    return [[item for part in parts for item in part]
+            for parts in itertools.product(*(itertools.permutations(group) for group in groups))]
+
+
+def _line_orders(signatures: list[tuple]) -> list[list[int]]:
+    """
+    The line orders that sort the bands by the sorted signatures of their lines, then the lines of each band by
+    signature, ties in every order.
+    """
+    bands = range(BOX_SIZE)
+    band_key = {band: tuple(sorted(signatures[band * BOX_SIZE + line] for line in range(BOX_SIZE))) for band in bands}
+    per_band = {band: _tied_orders([band * BOX_SIZE + line for line in range(BOX_SIZE)], signatures.__getitem__)
+                for band in bands}
+    orders = []
+    for band_order in _tied_orders(list(bands), band_key.__getitem__):
+        for lines in itertools.product(*(per_band[band] for band in band_order)):
+            orders.append([line for part in lines for line in part])
+    return orders
+
+
+def canonical_form(values: bytes | bytearray) -> tuple[bytes, Transform]:
+    """
+    Returns the canonical form of a puzzle, see the module documentation.
+    :param values: 81 values, 0 for empty
+    :return: the canonical values, and the transformation whose image of values they are
+    """
+    digit_counts = [0] * (SIZE + 1)
+    for v in values:
+        digit_counts[v] += 1
+
+    best: list[int] | None = None
+    best_transform: tuple[bool, list[int], list[int], list[int]] | None = None
+    for transpose in (False, True):
+        grid = _transposed(values) if transpose else bytes(values)
+        row_orders = _line_orders(_line_signatures(grid, digit_counts))
+        col_orders = _line_orders(_line_signatures(_transposed(grid), digit_counts))
+        candidates = itertools.islice(itertools.product(row_orders, col_orders), MAX_CANONICAL_CANDIDATES)
+        for rows, cols in candidates:
+            # relabel in order of first appearance, stop as soon as the candidate is larger than the best
+            digits = [0] * (SIZE + 1)
+            next_digit = 1
+            image: list[int] = []
+            smaller = best is None
+            larger = False
+            for r in rows:
+                base = r * SIZE
+                for c in cols:
+                    v = grid[base + c]
+                    if v:
+                        d = digits[v]
+                        if not d:
+                            d = digits[v] = next_digit
+                            next_digit += 1
+                    else:
+                        d = 0
+                    if not smaller:
+                        other = best[len(image)]
+                        if d < other:
+                            smaller = True
+                        elif d > other:
+                            larger = True
+                            break
+                    image.append(d)
+                if larger:
+                    break
+            if larger or not smaller:
+                continue
+            best = image
+            best_transform = (transpose, rows, cols, digits)
+
+    assert best is not None and best_transform is not None
+    transpose, rows, cols, digits = best_transform
+    # the digits missing from the puzzle get the remaining labels
+    unused = iter(d for d in range(1, SIZE + 1) if d not in digits)
+    digits = [d if d or v == 0 else next(unused) for v, d in enumerate(digits)]
+    return bytes(best), Transform(transpose, rows, cols, digits)
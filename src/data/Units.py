@@ -0,0 +1,174 @@
+"""
+Precomputed index tables of the board.
+
+A board of box size b has side b * b (9 for the classic 3x3 boxes, 16 for hexadoku, 25 for 5x5 boxes).
+A cell is addressed by its flat index: index = row * side + col.
+The tables of a size are built once, on the first get_geometry call for it, so looking up a unit or the peers of a
+cell is a tuple index. The module constants below are the tables of the classic 9x9 board.
+
+Variants (see data.Constraints) add their own groups of cells to the tables of a size: a geometry built with
+constraints has their units and peers, and indexes their extra rules by cell.
+"""
+import functools
+from typing import Sequence
+
+MIN_BOX_SIZE: int = 2
+MAX_BOX_SIZE: int = 5
+DEFAULT_BOX_SIZE: int = 3
+
+# the character of each value in the text formats, value v is SYMBOLS[v - 1]: digits, then letters from 10 on
+SYMBOLS: str = "123456789ABCDEFGHIJKLMNOP"
+
+
+class Geometry:
+    """
+    The index tables of the board of one box size and its constraints, get them with get_geometry.
+
+    The values of a group of cells are all different. A unit is a group of size cells, which holds every value
+    once: the rows, columns and boxes, and the full groups of the constraints (e.g. diagonals). groups starts with
+    the units, followed by the smaller groups of the constraints (e.g. killer cages, cells a knight move apart).
+    Without constraints, groups is units.
+    """
+    __slots__ = ("box_size", "size", "num_cells", "all_notes_mask",
+                 "row_of", "col_of", "box_of", "rows", "cols", "boxes", "units", "units_of", "peers",
+                 "groups", "groups_of", "constraints", "rules", "rules_of")
+
+    def __init__(self, box_size: int, constraints: tuple = ()):
+        size = box_size * box_size
+        num_cells = size * size
+        self.box_size: int = box_size
+        self.size: int = size
+        self.num_cells: int = num_cells
+        # all notes set, bit (note - 1) represents note
+        self.all_notes_mask: int = (1 << size) - 1
+
+        # row / column / box number of each flat index
+        self.row_of: tuple[int, ...] = tuple(i // size for i in range(num_cells))
+        self.col_of: tuple[int, ...] = tuple(i % size for i in range(num_cells))
+        self.box_of: tuple[int, ...] = tuple(
+            (self.row_of[i] // box_size) * box_size + self.col_of[i] // box_size for i in range(num_cells))
+
+        # the flat indexes of the cells in each row, column and box
+        self.rows: tuple[tuple[int, ...], ...] = tuple(
+            tuple(r * size + c for c in range(size)) for r in range(size))
+        self.cols: tuple[tuple[int, ...], ...] = tuple(
+            tuple(r * size + c for r in range(size)) for c in range(size))
+        boxes: list[list[int]] = [[] for _ in range(size)]
+        for i in range(num_cells):
+            boxes[self.box_of[i]].append(i)
+        self.boxes: tuple[tuple[int, ...], ...] = tuple(tuple(box) for box in boxes)
+
+        # the 3 * size units, rows first, then columns, then boxes, then the units of the constraints
+        self.units: tuple[tuple[int, ...], ...] = self.rows + self.cols + self.boxes
+        partial: list[tuple[int, ...]] = []
+        for constraint in constraints:
+            for group in constraint.groups(self):
+                if len(group) == size:
+                    self.units += (tuple(group),)
+                else:
+                    partial.append(tuple(group))
+        self.groups: tuple[tuple[int, ...], ...] = self.units + tuple(partial)
+
+        # the units that contain each cell, as indexes into units: (row, column, box) without constraints
+        self.units_of: tuple[tuple[int, ...], ...] = _groups_of(self.units, num_cells)
+        # the groups that contain each cell, as indexes into groups
+        self.groups_of: tuple[tuple[int, ...], ...] = self.units_of if not partial else _groups_of(
+            self.groups, num_cells)
+
+        # the cells that share a group with each cell (20 on a 9x9 board), the cell itself is not included
+        self.peers: tuple[tuple[int, ...], ...] = tuple(
+            tuple(sorted({p for g in self.groups_of[i] for p in self.groups[g]} - {i})) for i in range(num_cells))
+
+        # the constraints with a rule beyond distinct values (e.g. cage sums), and the ones that watch each cell
+        self.constraints: tuple = constraints
+        self.rules: tuple = tuple(constraint for constraint in constraints if constraint.rule_cells(self))
+        rules_of: list[list] = [[] for _ in range(num_cells)]
+        for rule in self.rules:
+            for i in rule.rule_cells(self):
+                rules_of[i].append(rule)
+        self.rules_of: tuple[tuple, ...] = tuple(tuple(rules) for rules in rules_of)
+
+    def __repr__(self) -> str:
+        if self.constraints:
+            return f"Geometry({self.box_size}, {self.constraints!r})"
+        return f"Geometry({self.box_size})"
+
+
+def _groups_of(groups: tuple[tuple[int, ...], ...], num_cells: int) -> tuple[tuple[int, ...], ...]:
+    groups_of: list[list[int]] = [[] for _ in range(num_cells)]
+    for g, group in enumerate(groups):
+        for i in group:
+            groups_of[i].append(g)
+    return tuple(tuple(of) for of in groups_of)
+
+
+def get_geometry(box_size: int = DEFAULT_BOX_SIZE, constraints: Sequence = ()) -> Geometry:
+    """
+    Returns the tables of the board of the given box size and constraints, built on the first call and shared
+    after. The tables of the classic boards are kept for good, those of the MAX_CONSTRAINED_GEOMETRIES last used
+    sets of constraints too.
+    throws ValueError if the box size is not between MIN_BOX_SIZE and MAX_BOX_SIZE
+    :param box_size:
+    :param constraints: The data.Constraints of a variant, in order, none for the classic board
+    :return:
+    """
+    if box_size < MIN_BOX_SIZE or box_size > MAX_BOX_SIZE:
+        raise ValueError(f"Box size must be between {MIN_BOX_SIZE} and {MAX_BOX_SIZE}.")
+    if constraints:
+        return _constrained_geometry(box_size, tuple(constraints))
+    return _classic_geometry(box_size)
+
+
+# variants such as killer sudoku have constraints of their own per puzzle, so their tables are not kept for good
+MAX_CONSTRAINED_GEOMETRIES: int = 64
+
+
+@functools.lru_cache(maxsize=None)
+def _classic_geometry(box_size: int) -> Geometry:
+    return Geometry(box_size)
+
+
+@functools.lru_cache(maxsize=MAX_CONSTRAINED_GEOMETRIES)
+def _constrained_geometry(box_size: int, constraints: tuple) -> Geometry:
+    return Geometry(box_size, constraints)
+
+
+def box_size_of(num_cells: int) -> int | None:
+    """
+    Returns the box size of the boards with the given number of cells, None if no supported size has that many.
+    :param num_cells:
+    :return:
+    """
+    for box_size in range(MIN_BOX_SIZE, MAX_BOX_SIZE + 1):
+        if box_size ** 4 == num_cells:
+            return box_size
+    return None
+
+
+DEFAULT_GEOMETRY: Geometry = get_geometry(DEFAULT_BOX_SIZE)
+
+BOX_SIZE: int = DEFAULT_GEOMETRY.box_size
+SIZE: int = DEFAULT_GEOMETRY.size
+NUM_CELLS: int = DEFAULT_GEOMETRY.num_cells
+
+
+def cell_index(row: int, col: int) -> int:
+    """
+    Returns the flat index of the cell at the given row and column of a 9x9 board.
+    :param row:
+    :param col:
+    :return:
+    """
+    return row * SIZE + col
+
+
+# the tables of the classic 9x9 board, see Geometry
+ROW_OF: tuple[int, ...] = DEFAULT_GEOMETRY.row_of
+COL_OF: tuple[int, ...] = DEFAULT_GEOMETRY.col_of
+BOX_OF: tuple[int, ...] = DEFAULT_GEOMETRY.box_of
+ROWS: tuple[tuple[int, ...], ...] = DEFAULT_GEOMETRY.rows
+COLS: tuple[tuple[int, ...], ...] = DEFAULT_GEOMETRY.cols
+BOXES: tuple[tuple[int, ...], ...] = DEFAULT_GEOMETRY.boxes
+UNITS: tuple[tuple[int, ...], ...] = DEFAULT_GEOMETRY.units
+UNITS_OF: tuple[tuple[int, ...], ...] = DEFAULT_GEOMETRY.units_of
+PEERS: tuple[tuple[int, ...], ...] = DEFAULT_GEOMETRY.peers
@@ -1,2 +1,4 @@
 from .SudokuBoard import SudokuBoard
 #from .Cell import Cell
+from .Constraints import (AntiKnightConstraint, Constraint, DiagonalConstraint, KillerCage, WindokuConstraint,
+                          constraint_names, get_constraint, register_constraint)
@@ -0,0 +1,112 @@
+import argparse
+import json
+import sys
+import time
+
+from batch.PuzzleReader import read_puzzles
+from generator.Minimizer import minimize
+from generator.ParallelGenerator import generate_parallel
+from solver import engine_names, get_engine
+from solver.Rating import Grade
+
+_GRADES: list[str] = [grade.value for grade in Grade]
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the generate command arguments to the given parser.
+    :param parser:
+    :return:
+    """
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of puzzles, 0 for an endless stream")
+    parser.add_argument("-c", "--clues", type=int, default=0,
+                        help="target clue count, 0 removes as many clues as possible")
+    parser.add_argument("--min-grade", default=Grade.EASY.value, choices=_GRADES, help="discard easier puzzles")
+    parser.add_argument("--max-grade", default=Grade.EVIL.value, choices=_GRADES,
+                        help="keep the clues whose removal makes the puzzle harder")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("-e", "--engine", default="dlx", choices=engine_names(),
+                        help="engine that completes grids and checks uniqueness")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="worker processes, 1 generates in this process, 0 uses all cores")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="random seed, for reproducible runs")
+    parser.add_argument("-f", "--format", dest="output_format", default="text", choices=("text", "jsonl"),
+                        help="text writes the 81 character puzzle lines, jsonl adds the solution and rating")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the summary to stderr")
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Runs the generate command.
+    :param args: Parsed by a parser set up with add_arguments
+    :return: process exit code
+    """
+    count = args.count or None
+    min_grade = Grade(args.min_grade)
+    max_grade = Grade(args.max_grade)
+    # one job generates in this process, with the chunk seeds of the workers, so a seed gives the same puzzles
+    puzzles = generate_parallel(count, args.clues, min_grade, max_grade, args.engine, args.jobs or None, args.seed)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    total = 0
+    try:
+        for puzzle in puzzles:
+            output.write(json.dumps(puzzle.to_dict()) if args.output_format == "jsonl" else puzzle.puzzle.to_line())
+            output.write("\n")
+            total += 1
+    except KeyboardInterrupt:
+        # an endless stream is stopped with Ctrl-C
+        pass
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    seconds = time.perf_counter() - start
+
+    if not args.quiet:
+        rate = total * 60 / seconds if seconds > 0 else 0.0
+        print(f"{total} puzzles in {seconds:.3f}s ({rate:.0f} puzzles/min)", file=sys.stderr)
+    return 0
+
+
+def add_minimize_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the minimize command arguments to the given parser.
+    :param parser:
+    :return:
+    """
+    parser.add_argument("input", nargs="?", default="-", help="puzzle file, see the batch command, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("-e", "--engine", default="dlx", choices=engine_names(), help="engine that checks uniqueness")
+
+
+def run_minimize(args: argparse.Namespace) -> int:
+    """
+    Runs the minimize command: one minimal puzzle line per input puzzle, or the error of the puzzles that do not
+    have a unique solution.
+    :param args: Parsed by a parser set up with add_minimize_arguments
+    :return: process exit code, 0 if all puzzles were minimized, 1 otherwise
+    """
+    engine = get_engine(args.engine)
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failed = 0
+    try:
+        for record in read_puzzles(source):
+            if record.board is None:
+                error = record.error
+            else:
+                try:
+                    output.write(minimize(record.board, engine).to_line())
+                    output.write("\n")
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            failed += 1
+            print(f"puzzle {record.number}: {error}", file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0 if not failed else 1
@@ -0,0 +1,89 @@
+"""
+Puzzle minimization: remove clues while the solution stays unique.
+
+A clue that cannot be removed at some point cannot be removed later either (fewer clues only allow more solutions),
+so a single pass over the clues gives a minimal puzzle, each clue is checked once.
+
+Removing the clue v at cell i keeps the solution unique iff the remaining clues still force v at cell i.
+Most redundant clues are forced by the clues around them, which is checked without any search:
+- naked single: the peers of the cell leave v as its only candidate.
+- hidden single: in a unit of the cell, every other empty cell sees a v among its peers.
+Only the other clues need the engine, which enumerates up to two solutions of the puzzle without the clue.
+"""
+import random
+
+from data import SudokuBoard
+from data.Cell import ALL_NOTES_MASK
+from data.Units import NUM_CELLS, UNITS, UNITS_OF
+from solver.Engine import SolverEngine, get_engine
+
+
+class Minimizer:
+    """
+    Clue removal checks, see the module documentation.
+    """
+
+    def __init__(self, engine: SolverEngine | None = None):
+        """
+        :param engine: Checks the clues that are not forced, the dlx engine if None.
+        """
+        self._engine: SolverEngine = engine if engine is not None else get_engine("dlx")
+        # number of checks decided without search, and by a search
+        self.forced: int = 0
+        self.searched: int = 0
+
+    @staticmethod
+    def _forced(puzzle: SudokuBoard, index: int, value: int) -> bool:
+        bit = 1 << (value - 1)
+        if ALL_NOTES_MASK & ~puzzle.get_used_mask_at(index) == bit:
+            return True
+        values = puzzle.values
+        for unit in UNITS_OF[index]:
+            if all(values[j] or j == index or puzzle.get_used_mask_at(j) & bit for j in UNITS[unit]):
+                return True
+        return False
+
+    def can_remove(self, puzzle: SudokuBoard, index: int) -> bool:
+        """
+        Checks if the clue at the given flat index can be removed with the solution staying unique.
+        :param puzzle: A puzzle with a unique solution, it is left unchanged.
+        :param index: Flat index of a clue
+        :return:
+        """
+        values = puzzle.values
+        value = values[index]
+        values[index] = 0
+        try:
+            if self._forced(puzzle, index, value):
+                self.forced += 1
+                return True
+            self.searched += 1
+            return self._engine.count_solutions(puzzle, limit=2) == 1
+        finally:
+            values[index] = value
+
+
+def minimize(board: SudokuBoard, engine: SolverEngine | None = None, rng: random.Random | None = None) -> SudokuBoard:
+    """
+    Returns a minimal puzzle with the same solution: removing any of its clues makes the solution not unique.
+    throws ValueError if the board does not have a unique solution
+    :param board: The puzzle, it is not modified.
+    :param engine: The engine used for the checks, the dlx engine if None.
+    :param rng: The clues are tried in a random order if given, in cell order otherwise.
+        Different orders give different minimal puzzles.
+    :return: A new board
+    """
+    engine = engine if engine is not None else get_engine("dlx")
+    if engine.count_solutions(board, limit=2) != 1:
+        raise ValueError("The puzzle does not have a unique solution.")
+
+    puzzle = SudokuBoard()
+    puzzle.values[:] = board.values
+    minimizer = Minimizer(engine)
+    clues = [index for index in range(NUM_CELLS) if puzzle.values[index]]
+    if rng is not None:
+        rng.shuffle(clues)
+    for index in clues:
+        if minimizer.can_remove(puzzle, index):
+            puzzle.values[index] = 0
+    return puzzle
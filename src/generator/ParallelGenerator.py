@@ -0,0 +1,107 @@
+"""
+Multi-core puzzle generation.
+
+Each worker process holds its own PuzzleGenerator, the work is cut into chunks of a few puzzles, each chunk with
+its own seed, so a run with a given seed generates the same puzzles whatever the number of workers. With one job
+the chunks are generated in the calling process, with the same seeds.
+Chunks are consumed in submission order and at most a few chunks per worker are in flight.
+"""
+import collections
+import concurrent.futures
+import os
+import random
+from typing import Iterator
+
+from data import SudokuBoard
+from generator.PuzzleGenerator import GeneratedPuzzle, PuzzleGenerator
+from solver.Engine import get_engine
+from solver.Rating import Grade, Rating
+
+# the generator options of a worker process, set once by _init_worker
+_worker_options: dict | None = None
+
+
+def _init_worker(options: dict):
+    global _worker_options
+    _worker_options = options
+
+
+def _chunk_generator(options: dict, seed: int) -> PuzzleGenerator:
+    """
+    The generator of the chunk of the given seed.
+    """
+    return PuzzleGenerator(seed=seed, engine=get_engine(options["engine_name"]),
+                           target_clues=options["target_clues"],
+                           min_grade=options["min_grade"], max_grade=options["max_grade"])
+
+
+def _generate_chunk(seed: int, count: int) -> list[tuple[bytes, bytes, Rating]]:
+    """
+    Worker side: generate count puzzles.
+    :return: the puzzle values, solution values and rating of each puzzle
+    """
+    assert _worker_options is not None
+    return [(bytes(p.puzzle.values), bytes(p.solution.values), p.rating)
+            for p in _chunk_generator(_worker_options, seed).generate_many(count)]
+
+
+def _chunk_sizes(count: int | None, chunk_size: int) -> Iterator[int]:
+    """
+    The number of puzzles of each chunk, endless if count is None.
+    """
+    remaining = count
+    while remaining is None or remaining > 0:
+        n = chunk_size if remaining is None else min(chunk_size, remaining)
+        yield n
+        if remaining is not None:
+            remaining -= n
+
+
+def _to_board(values: bytes) -> SudokuBoard:
+    board = SudokuBoard()
+    board.values[:] = values
+    return board
+
+
+def generate_parallel(count: int | None, target_clues: int = 0, min_grade: Grade = Grade.EASY,
+                      max_grade: Grade = Grade.EVIL, engine_name: str = "dlx",
+                      jobs: int | None = None, seed: int | None = None,
+                      chunk_size: int = 8) -> Iterator[GeneratedPuzzle]:
+    """
+    The multi-core counterpart of PuzzleGenerator.generate_many, see the module documentation.
+    :param count: Number of puzzles, None for an endless stream
+    :param target_clues: see PuzzleGenerator
+    :param min_grade: see PuzzleGenerator
+    :param max_grade: see PuzzleGenerator
+    :param engine_name: The engine each worker creates, see solver.get_engine
+    :param jobs: Number of worker processes, None or 0 for all cores, 1 generates in the calling process
+    :param seed: Seed of the chunk seeds, None for a random seed
+    :param chunk_size: Puzzles per chunk
+    :return:
+    """
+    jobs = jobs or os.cpu_count() or 1
+    options = {"engine_name": engine_name, "target_clues": target_clues,
+               "min_grade": min_grade, "max_grade": max_grade}
+    seeds = random.Random(seed)
+    chunks = _chunk_sizes(count, chunk_size)
+    if jobs == 1:
+        for n in chunks:
+            yield from _chunk_generator(options, seeds.getrandbits(64)).generate_many(n)
+        return
+    in_flight: collections.deque[concurrent.futures.Future] = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                initargs=(options,)) as pool:
+        try:
+            while True:
+                while len(in_flight) < 2 * jobs:
+                    n = next(chunks, 0)
+                    if not n:
+                        break
+                    in_flight.append(pool.submit(_generate_chunk, seeds.getrandbits(64), n))
+                if not in_flight:
+                    return
+                for puzzle, solution, rating in in_flight.popleft().result():
+                    yield GeneratedPuzzle(_to_board(puzzle), _to_board(solution), rating)
+        finally:
+            for future in in_flight:
+                future.cancel()
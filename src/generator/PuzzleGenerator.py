@@ -0,0 +1,136 @@
+"""
+Random puzzle generation.
+
+A puzzle is made in two steps:
+- a random full grid: the three diagonal boxes do not constrain each other, so they are filled with random
+  permutations and the engine completes the grid, which is then shuffled by a random validity preserving
+  transformation (digit relabeling, row and column swaps inside bands and stacks, band and stack swaps, transpose).
+- clue removal: the clues are visited in random order and each one is removed if the puzzle keeps a unique
+  solution, until the target clue count is reached or no clue can be removed.
+
+The uniqueness check is the check of generator.Minimizer. When the puzzle must stay below EVIL, the check is the
+rating of solver.Rating instead: a puzzle the techniques solve without branching has a unique solution.
+"""
+import random
+from typing import Iterator
+
+from data import SudokuBoard
+from data.Symmetry import random_transform
+from data.Units import BOX_SIZE, BOXES, NUM_CELLS, SIZE
+from generator.Minimizer import Minimizer
+from solver.Engine import SolverEngine, get_engine
+from solver.Rating import Grade, Rater, Rating, grade_order
+
+
+class GeneratedPuzzle:
+    """
+    A generated puzzle, with its unique solution and its rating.
+    """
+    __slots__ = ("puzzle", "solution", "clues", "rating")
+
+    def __init__(self, puzzle: SudokuBoard, solution: SudokuBoard, rating: Rating):
+        self.puzzle: SudokuBoard = puzzle
+        self.solution: SudokuBoard = solution
+        self.clues: int = NUM_CELLS - puzzle.values.count(0)
+        self.rating: Rating = rating
+
+    def to_dict(self) -> dict:
+        return {"puzzle": self.puzzle.to_line(), "solution": self.solution.to_line(), "clues": self.clues,
+                "grade": self.rating.grade.value, "score": self.rating.score}
+
+
+class PuzzleGenerator:
+    """
+    Generates random puzzles with a unique solution, see the module documentation.
+    """
+
+    def __init__(self, target_clues: int = 0, min_grade: Grade = Grade.EASY, max_grade: Grade = Grade.EVIL,
+                 engine: SolverEngine | None = None, seed: int | None = None):
+        """
+        :param target_clues: Stop removing clues at this count, 0 removes as many as possible.
+            Targets below about 22 clues are rarely reached and make generation slow.
+        :param min_grade: Puzzles easier than this are discarded.
+        :param max_grade: Clues whose removal makes the puzzle harder than this are kept.
+        :param engine: Completes the grids and counts solutions, the dlx engine if None.
+        :param seed: Seed of the random generator, None for a random seed.
+        """
+        if grade_order(min_grade) > grade_order(max_grade):
+            raise ValueError("min_grade is harder than max_grade.")
+        self._target_clues: int = target_clues
+        self._min_grade: Grade = min_grade
+        self._max_grade: Grade = max_grade
+        self._engine: SolverEngine = engine if engine is not None else get_engine("dlx")
+        self._rater: Rater = Rater()
+        self._rng: random.Random = random.Random(seed)
+        # number of generated grids whose puzzle was discarded, for tuning
+        self.attempts: int = 0
+
+    def full_grid(self) -> SudokuBoard:
+        """
+        Returns a random full grid.
+        :return:
+        """
+        rng = self._rng
+        board = SudokuBoard()
+        for b in range(0, SIZE, BOX_SIZE + 1):
+            for index, value in zip(BOXES[b], rng.sample(range(1, SIZE + 1), SIZE)):
+                board.set_value_at(index, value)
+        solved = self._engine.solve(board)
+        # the diagonal boxes are independent, a completion always exists
+        assert solved is not None
+        solved.values[:] = random_transform(rng).apply(solved.values)
+        return solved
+
+    def remove_clues(self, solution: SudokuBoard) -> SudokuBoard:
+        """
+        Removes clues from a full grid while the solution stays unique and within max_grade.
+        :param solution: A full grid, it is not modified.
+        :return: The puzzle
+        """
+        puzzle = solution.copy()
+        values = puzzle.values
+        minimizer = Minimizer(self._engine)
+        max_order = grade_order(self._max_grade)
+        clues = NUM_CELLS
+        for index in self._rng.sample(range(NUM_CELLS), NUM_CELLS):
+            if clues <= self._target_clues:
+                break
+            if self._max_grade != Grade.EVIL:
+                # solved by the techniques means unique, no count needed
+                value = values[index]
+                values[index] = 0
+                rating = self._rater.rate_logic(puzzle)
+                if rating is not None and grade_order(rating.grade) <= max_order:
+                    clues -= 1
+                else:
+                    values[index] = value
+            elif minimizer.can_remove(puzzle, index):
+                values[index] = 0
+                clues -= 1
+        return puzzle
+
+    def generate(self) -> GeneratedPuzzle:
+        """
+        Generates one puzzle, retrying with new grids until the clue target and grade band are met.
+        :return:
+        """
+        while True:
+            solution = self.full_grid()
+            puzzle = self.remove_clues(solution)
+            clues = NUM_CELLS - puzzle.values.count(0)
+            if clues <= self._target_clues or not self._target_clues:
+                rating = self._rater.rate(puzzle)
+                if grade_order(rating.grade) >= grade_order(self._min_grade):
+                    return GeneratedPuzzle(puzzle, solution, rating)
+            self.attempts += 1
+
+    def generate_many(self, count: int | None = None) -> Iterator[GeneratedPuzzle]:
+        """
+        Lazily generates puzzles.
+        :param count: Number of puzzles, None for an endless stream
+        :return:
+        """
+        n = 0
+        while count is None or n < count:
+            yield self.generate()
+            n += 1
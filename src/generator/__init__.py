@@ -0,0 +1,3 @@
+from .PuzzleGenerator import GeneratedPuzzle, PuzzleGenerator
+from .ParallelGenerator import generate_parallel
+from .Minimizer import Minimizer, minimize
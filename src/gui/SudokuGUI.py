@@ -1,11 +1,12 @@
 import tkinter as tk
 from tkinter import Button
-from typing import Generator
+from typing import Generator, Iterable
 import copy
 
 from data.Cell import Cell
 from data.SudokuBoard import SudokuBoard
 from solver import Solver
+from solver.Events import PrintSink
 
 
 class SudokuGUI:
@@ -20,6 +21,8 @@ class SudokuGUI:
         - If the cell has no value, it displays a smaller 3x3 grid of labels, each representing a possible note (1-9).
     - The GUI allows users to input values or notes, and provides buttons for solving the puzzle or confirming input.
     - The class maintains references to all Entry widgets and note label widgets for synchronizing the GUI with the underlying Sudoku board model.
+    - While solving, only the cells the solver changed on a step are redrawn (see refresh_gui), and of those only the
+      note labels whose text or color changed.
     """
     _solver_gen: Generator[bool, bool, None] | None
     ok_button: Button
@@ -39,6 +42,12 @@ class SudokuGUI:
         self.notes_labels: list[list[list[list[tk.Label]] | None]] = [
             [ None for _ in range(9)] for _ in range(9)
         ]
+        # the 3x3 frames of the sub grids, parents of the cell widgets
+        self._subgrid_frames: list[list[tk.Frame | None]] = [[None for _ in range(3)] for _ in range(3)]
+        # what the note labels of each cell show, by flat index: the notes mask (None if the cell shows an Entry)
+        # and whether the labels are red, so a refresh only configures the labels that change
+        self._drawn_notes: list[int | None] = [None] * 81
+        self._drawn_red: list[bool] = [False] * 81
 
         self._debug_var = tk.BooleanVar(value=False)
 
@@ -90,7 +99,7 @@ class SudokuGUI:
         validate_cmd = self.root.register(self.validate_input)
 
         # Create 3x3 grid of frames for sub grids
-        subgrid_frames: list[list[tk.Frame | None]] = [[None for _ in range(3)] for _ in range(3)]
+        subgrid_frames = self._subgrid_frames
 
         for y in range(3):
             for x in range(3):
@@ -127,6 +136,7 @@ class SudokuGUI:
                             label_row.append(note)
                         labels_list.append(label_row)
                     self.notes_labels[i][j] = labels_list
+                    self._drawn_notes[i * 9 + j] = cell.get_notes_mask()
                     for ni in range(3):
                         frame.grid_rowconfigure(ni, weight=1)
                         frame.grid_columnconfigure(ni, weight=1)
@@ -152,102 +162,104 @@ class SudokuGUI:
         self.reset_button.grid(row=10, column=3, columnspan=3, pady=5, sticky="e")
         #
 
-    def refresh_gui(self) -> None:
+    def refresh_gui(self, changed: Iterable[int] | None = None) -> None:
         """
         Efficiently synchronizes the GUI with the current state of the Sudoku board.
-        Only updates or recreates widgets if the cell type (value/notes) has changed.
+        Only the given cells are redrawn, and only updates or recreates widgets if the cell type (value/notes) has
+        changed. Note labels whose text and color are unchanged are not configured.
         Ensures that self.entries and self.notes are mutually exclusive for each cell.
+        :param changed: The flat indexes (row * 9 + col) of the cells to redraw, all cells if None,
+                        see Solver.take_changed_cells
         """
-        for i in range(9):
-            for j in range(9):
-                cell: Cell = self.board.get_cell(i, j)
-                cell_value = cell.get_value()
-                subgrid_row, subgrid_col = i // 3, j // 3
-                parent_frame = self.root.grid_slaves(row=subgrid_row, column=subgrid_col)[0]
+        for index in range(81) if changed is None else changed:
+            self._refresh_cell(*divmod(index, 9))
 
-                if cell_value:
-                    # If Entry already exists, just update its value
-                    entry = self.entries[i][j]
-                    if entry is not None:
-                        current_val = entry.get()
-                        if current_val != str(cell_value):
-                            entry.delete(0, tk.END)
-                            entry.insert(0, str(cell_value))
-                    else:
-                        # Remove note widgets if present
-                        notes_at_i_j = self.notes_labels[i][j]
-                        if notes_at_i_j is not None:
-                            for ni in range(3):
-                                for nj in range(3):
-                                    note_label = notes_at_i_j[ni][nj]
-                                    if note_label is not None:
-                                        note_label.master.destroy()
-                            self.notes_labels[i][j] = None
-                        # Create Entry widget
-                        e = tk.Entry(parent_frame, width=4, font=('Arial', 18), justify='center',
-                                     validate="key", validatecommand=(self.root.register(self.validate_input), "%P"))
-                        e.grid(row=i % 3, column=j % 3, padx=1, pady=1, sticky="nsew")
-                        e.insert(0, str(cell_value))
-                        self.entries[i][j] = e
-                    # Always nullify notes if Entry exists
+    def _refresh_solver_cells(self) -> None:
+        """
+        Redraws the cells the solver changed since the last refresh.
+        """
+        self.refresh_gui(self._solver.take_changed_cells())
+
+    def _refresh_cell(self, i: int, j: int) -> None:
+        cell: Cell = self.board.get_cell(i, j)
+        cell_value = cell.get_value()
+        index = i * 9 + j
+        parent_frame = self._subgrid_frames[i // 3][j // 3]
+
+        if cell_value:
+            # If Entry already exists, just update its value
+            entry = self.entries[i][j]
+            if entry is not None:
+                current_val = entry.get()
+                if current_val != str(cell_value):
+                    entry.delete(0, tk.END)
+                    entry.insert(0, str(cell_value))
+            else:
+                # Remove note widgets if present
+                notes_at_i_j = self.notes_labels[i][j]
+                if notes_at_i_j is not None:
+                    # the labels of a cell share one frame
+                    notes_at_i_j[0][0].master.destroy()
                     self.notes_labels[i][j] = None
-                else:
-                    # If notes grid already exists, just update note labels
-                    entry_at_i_j = self.entries[i][j]
-                    if entry_at_i_j is not None:
-                        entry_at_i_j.destroy()
-                        self.entries[i][j] = None
-                    notes_at_i_j = self.notes_labels[i][j]
-                    if notes_at_i_j is not None:
-                        all_none = True
-                        for ni in range(3):
-                            for nj in range(3):
-                                note_label = notes_at_i_j[ni][nj]
-                                assert note_label  # must be not None
-                                note_val = cell.get_note(ni, nj)
-                                note_label.config(text=str(note_val) if note_val else "")
-                                if note_val:
-                                    all_none = False
-                        # if all notes are None, set background to red
-                        for ni in range(3):
-                            for nj in range(3):
-                                note_label = notes_at_i_j[ni][nj]
-                                if all_none and self._solving:
-                                    note_label.config(bg="red")
-                                else:
-                                    note_label.config(bg="SystemButtonFace")
-                    else:
-                        # Create 3x3 grid of labels for notes
-                        frame = tk.Frame(parent_frame, width=40, height=40, bd=1, relief="solid")
-                        frame.grid(row=i % 3, column=j % 3, padx=1, pady=1, sticky="nsew")
-                        notes_at_i_j = []
-                        all_none = True
-                        for ni in range(3):
-                            notes_row = []
-                            for nj in range(3):
-                                note_val = cell.get_note(ni, nj)
-                                note = tk.Label(frame, text=str(note_val) if note_val else "", font=('Arial', 6),
-                                                width=2, height=1)
-                                note.grid(row=ni, column=nj, sticky="nsew")
-                                if note_val:
-                                    all_none = False
-                                notes_row.append(note)
-                            notes_at_i_j.append(notes_row)
-                        self.notes_labels[i][j] = notes_at_i_j
-                        # Set background color based on notes
-                        for ni in range(3):
-                            for nj in range(3):
-                                note_label = notes_at_i_j[ni][nj]
-                                if all_none and self._solving:
-                                    note_label.config(bg="red")
-                                else:
-                                    note_label.config(bg="SystemButtonFace")
-
-                        for ni in range(3):
-                            frame.grid_rowconfigure(ni, weight=1)
-                            frame.grid_columnconfigure(ni, weight=1)
-                    # Always nullify entry if notes exist
-                    self.entries[i][j] = None
+                # Create Entry widget
+                e = tk.Entry(parent_frame, width=4, font=('Arial', 18), justify='center',
+                             validate="key", validatecommand=(self.root.register(self.validate_input), "%P"))
+                e.grid(row=i % 3, column=j % 3, padx=1, pady=1, sticky="nsew")
+                e.insert(0, str(cell_value))
+                self.entries[i][j] = e
+            # Always nullify notes if Entry exists
+            self.notes_labels[i][j] = None
+            self._drawn_notes[index] = None
+            return
+
+        # If notes grid already exists, just update note labels
+        entry_at_i_j = self.entries[i][j]
+        if entry_at_i_j is not None:
+            entry_at_i_j.destroy()
+            self.entries[i][j] = None
+        notes_mask = cell.get_notes_mask()
+        # if all notes are None, set background to red
+        red = not notes_mask and self._solving
+        notes_at_i_j = self.notes_labels[i][j]
+        if notes_at_i_j is not None:
+            drawn = self._drawn_notes[index]
+            # only the labels of the notes that were added or removed
+            diff = notes_mask ^ drawn if drawn is not None else 0x1FF
+            while diff:
+                bit = diff & -diff
+                diff ^= bit
+                n = bit.bit_length() - 1
+                note_label = notes_at_i_j[n // 3][n % 3]
+                assert note_label  # must be not None
+                note_label.config(text=str(n + 1) if notes_mask & bit else "")
+            if red != self._drawn_red[index]:
+                for label_row in notes_at_i_j:
+                    for note_label in label_row:
+                        note_label.config(bg="red" if red else "SystemButtonFace")
+        else:
+            # Create 3x3 grid of labels for notes
+            frame = tk.Frame(parent_frame, width=40, height=40, bd=1, relief="solid")
+            frame.grid(row=i % 3, column=j % 3, padx=1, pady=1, sticky="nsew")
+            notes_at_i_j = []
+            for ni in range(3):
+                notes_row = []
+                for nj in range(3):
+                    note_val = cell.get_note(ni, nj)
+                    # Set background color based on notes
+                    note = tk.Label(frame, text=str(note_val) if note_val else "", font=('Arial', 6),
+                                    width=2, height=1, bg="red" if red else "SystemButtonFace")
+                    note.grid(row=ni, column=nj, sticky="nsew")
+                    notes_row.append(note)
+                notes_at_i_j.append(notes_row)
+            self.notes_labels[i][j] = notes_at_i_j
+
+            for ni in range(3):
+                frame.grid_rowconfigure(ni, weight=1)
+                frame.grid_columnconfigure(ni, weight=1)
+        self._drawn_notes[index] = notes_mask
+        self._drawn_red[index] = red
+        # Always nullify entry if notes exist
+        self.entries[i][j] = None
 
     # noinspection PyMethodMayBeStatic
     def validate_input(self, value: str) -> bool:
@@ -262,6 +274,11 @@ class SudokuGUI:
         self.refresh_model()
 
         self._solver = Solver(self.board)
+        # each step redraws only the cells the solver changed
+        self._solver.track_changes()
+        if self._debug_var.get():
+            # in debug mode, trace the search to the console
+            self._solver.add_sink(PrintSink())
         self._solver_gen = self._solver.solve()
         self._step_solver(first=True)
 
@@ -275,11 +292,12 @@ class SudokuGUI:
 
     def _auto_solve_step(self):
         try:
+            # the step refreshes the cells it changed
             self._step_solver(first=False, continue_solving=True)
-            self.refresh_gui()
-            # Schedule the next step after a short delay (e.g., 10 ms)
-            # noinspection PyTypeChecker
-            self.root.after(10, self._auto_solve_step)
+            if self._solving:
+                # Schedule the next step after a short delay (e.g., 10 ms)
+                # noinspection PyTypeChecker
+                self.root.after(10, self._auto_solve_step)
         except StopIteration:
             self._exit_solving_mode()
 
@@ -295,10 +313,11 @@ class SudokuGUI:
         except StopIteration:
             # noinspection PyTypeChecker
             self._exit_solving_mode()
+            # all cells, the red cells of the search go back to normal
             self.refresh_gui()
             return
 
-        self.refresh_gui()
+        self._refresh_solver_cells()
         if not result:
             # noinspection PyTypeChecker
             self.next_button.config(state=tk.NORMAL)
@@ -1,9 +1,12 @@
+import argparse
+import sys
+
 import Samples
 
-if __name__ == '__main__':
+
+def run_gui() -> None:
     from gui.SudokuGUI import SudokuGUI
     from data.SudokuBoard import SudokuBoard
-    from data.SudokuBoard import SudokuBoard
 
     #fill the board with numbers
     # board = SudokuBoard.from_string(Samples.EXPERT_1)
@@ -15,3 +18,40 @@ if __name__ == '__main__':
 
     print(board)
 
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Sudoku solver")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("gui", help="open the interactive board (default)")
+
+    from batch import BatchCli
+    BatchCli.add_arguments(commands.add_parser("batch", help="solve a file of puzzles without the GUI"))
+    BatchCli.add_rate_arguments(commands.add_parser("rate", help="rate the difficulty of a file of puzzles"))
+    BatchCli.add_pack_arguments(commands.add_parser("pack", help="convert a file of puzzles to a packed corpus"))
+    from generator import GeneratorCli
+    GeneratorCli.add_arguments(commands.add_parser("generate", help="generate random puzzles"))
+    GeneratorCli.add_minimize_arguments(commands.add_parser("minimize", help="remove the redundant clues of puzzles"))
+
+    from benchmark import BenchmarkCli
+    BenchmarkCli.add_arguments(commands.add_parser("bench", help="benchmark the engines on the bundled corpora"))
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        return BatchCli.run(args)
+    if args.command == "rate":
+        return BatchCli.run_rate(args)
+    if args.command == "pack":
+        return BatchCli.run_pack(args)
+    if args.command == "bench":
+        return BenchmarkCli.run(args)
+    if args.command == "generate":
+        return GeneratorCli.run(args)
+    if args.command == "minimize":
+        return GeneratorCli.run_minimize(args)
+
+    run_gui()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+A solution cache in front of an engine.
+
+Puzzles are looked up by their canonical form (see data.Symmetry), so a puzzle that is a relabeled, reflected or
+shuffled copy of a cached one is a hit. The cache stores the solution of the canonical form and maps it back to
+the orientation of each caller. Puzzles with no solution are cached too, timeouts are not.
+"""
+import collections
+from typing import Iterator
+
+from data import SudokuBoard
+from data.Symmetry import canonical_form
+from data.Units import DEFAULT_GEOMETRY
+from solver.Engine import SolverEngine
+from solver.Stats import SolverStats
+
+DEFAULT_CACHE_SIZE: int = 10_000
+
+
+class SolutionCache:
+    """
+    A bounded LRU map from canonical puzzle values to canonical solution values, None for no solution.
+    """
+    __slots__ = ("capacity", "hits", "misses", "evictions", "_entries")
+
+    def __init__(self, capacity: int = DEFAULT_CACHE_SIZE):
+        """
+        throws ValueError if capacity is not positive
+        :param capacity: The most entries kept, the least recently used entry is evicted past it
+        """
+        if capacity < 1:
+            raise ValueError(f"The cache capacity must be positive, got {capacity}.")
+        self.capacity: int = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: collections.OrderedDict[bytes, bytes | None] = collections.OrderedDict()
+
+    def get(self, key: bytes) -> tuple[bool, bytes | None]:
+        """
+        Looks a puzzle up and counts a hit or a miss.
+        :param key: The canonical values of the puzzle
+        :return: whether the puzzle is cached, and its canonical solution, None for no solution
+        """
+        entries = self._entries
+        if key not in entries:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        entries.move_to_end(key)
+        return True, entries[key]
+
+    def put(self, key: bytes, solution: bytes | None):
+        """
+        Stores the canonical solution of a puzzle, None for no solution.
+        :param key: The canonical values of the puzzle
+        :param solution:
+        :return:
+        """
+        entries = self._entries
+        entries[key] = solution
+        entries.move_to_end(key)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all entries, the counters are kept.
+        :return:
+        """
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def to_dict(self) -> dict:
+        return {"size": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+    def __str__(self):
+        return (f"{len(self._entries)}/{self.capacity} entries, {self.hits} hits, {self.misses} misses, "
+                f"{self.evictions} evictions")
+
+
+class CachedEngine(SolverEngine):
+    """
+    An engine that answers repeated puzzles from a SolutionCache and solves the others with a wrapped engine.
+    Only solve is cached, iter_solutions and count_solutions go to the wrapped engine.
+    A hit adds nothing to the stats given to solve.
+    The canonical form is that of 9x9 boards, boards of other sizes go to the wrapped engine uncached.
+    """
+
+    def __init__(self, engine: SolverEngine, capacity: int = DEFAULT_CACHE_SIZE):
+        """
+        :param engine: Solves the puzzles that are not cached
+        :param capacity: see SolutionCache
+        """
+        self._engine: SolverEngine = engine
+        self._cache: SolutionCache = SolutionCache(capacity)
+        self.name = engine.name
+
+    @property
+    def cache(self) -> SolutionCache:
+        return self._cache
+
+    def solve(self, board: SudokuBoard, timeout: float | None = None,
+              stats: SolverStats | None = None) -> SudokuBoard | None:
+        if board.geometry is not DEFAULT_GEOMETRY:
+            return self._engine.solve(board, timeout, stats)
+        key, transform = canonical_form(board.values)
+        cached, solution = self._cache.get(key)
+        if not cached:
+            solved = self._engine.solve(board, timeout, stats)
+            self._cache.put(key, None if solved is None else bytes(transform.apply(solved.values)))
+            return solved
+        if solution is None:
+            return None
+        solved = SudokuBoard()
+        solved.values[:] = transform.invert(solution)
+        return solved
+
+    def iter_solutions(self, board: SudokuBoard, timeout: float | None = None) -> Iterator[SudokuBoard]:
+        return self._engine.iter_solutions(board, timeout)
+
+    def count_solutions(self, board: SudokuBoard, limit: int | None = None, timeout: float | None = None) -> int:
+        return self._engine.count_solutions(board, limit, timeout)
@@ -0,0 +1,44 @@
+import time
+
+
+class SolveTimeout(Exception):
+    """
+    Raised by a solver when its deadline has passed.
+    """
+    pass
+
+
+class Deadline:
+    """
+    A time budget for a search.
+    check() is called once per search node, it reads the clock only every CHECK_INTERVAL calls.
+    """
+
+    __slots__ = ("_end", "_countdown")
+
+    CHECK_INTERVAL: int = 256
+
+    def __init__(self, seconds: float):
+        self._end: float = time.perf_counter() + seconds
+        self._countdown: int = self.CHECK_INTERVAL
+
+    def check(self):
+        """
+        throws SolveTimeout if the deadline has passed
+        :return:
+        """
+        self._countdown -= 1
+        if self._countdown:
+            return
+        self._countdown = self.CHECK_INTERVAL
+        if time.perf_counter() > self._end:
+            raise SolveTimeout()
+
+    @staticmethod
+    def of(seconds: float | None) -> "Deadline | None":
+        """
+        Returns a deadline for the given number of seconds, or None if seconds is None (no limit).
+        :param seconds:
+        :return:
+        """
+        return Deadline(seconds) if seconds is not None else None
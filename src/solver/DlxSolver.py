@@ -0,0 +1,438 @@
+"""
+Knuth's Algorithm X with Dancing Links, Sudoku as an exact cover problem.
+
+The matrix has 729 rows, one per (cell, digit) choice, and 324 columns, one per constraint:
+- cell c has a value                  columns   0..80
+- row r has digit d                   columns  81..161
+- column c has digit d                columns 162..242
+- box b has digit d                   columns 243..323
+Each row covers exactly 4 columns. Boards of another size have the same four groups of columns, with size * size
+columns per group and size rows per cell, a DlxSolver builds the matrix of each size the first time it solves one.
+
+Variant boards (see data.Constraints) add size columns per group of their constraints, after the classic ones:
+a full group (e.g. a diagonal) is a unit, its digits are covered exactly once like those of a row. The digits of a
+smaller group (e.g. a killer cage) are covered at most once: its columns are secondary, they are not linked into the
+header ring so the search never chooses them. The rules of the constraints (cage sums) are not exact cover, a row
+that makes one of them infeasible is not chosen.
+Groups of two cells (e.g. anti-knight pairs) only ever remove rows, the column sizes do not see them coming and
+branching on the digits of the units gets lost on sparse boards (an empty anti-knight board did not finish). On the
+boards that have them the search branches on the cells with the fewest digits left, and on the other columns only
+when they have a single row or none.
+
+The links are kept in flat int lists (node number -> left/right/up/down/column) and built once per DlxSolver.
+Solving a puzzle covers the columns of its givens, searches, and uncovers everything again, so the same matrix is
+reused for the next puzzle. A DlxSolver is therefore not thread safe, use one per thread or process.
+"""
+from typing import Iterator, Sequence
+
+from data import SudokuBoard
+from data.Units import DEFAULT_BOX_SIZE, NUM_CELLS, SIZE, Geometry, get_geometry
+from solver.Deadline import Deadline
+from solver.Engine import SolverEngine, register_engine
+from solver.Stats import SolverStats
+
+# the matrix of the 9x9 board
+NUM_COLUMNS: int = 4 * NUM_CELLS
+NUM_ROWS: int = NUM_CELLS * SIZE
+
+# the matrices of other board sizes and constraints a DlxSolver keeps, see DlxSolver._engine_for
+MAX_OTHER_ENGINES: int = 8
+
+
+def _row_columns(geometry: Geometry, index: int, digit: int) -> list[int]:
+    """
+    The columns covered by putting digit (1-size) in the cell at the given flat index: the cell, then the digit in
+    each group of the cell. Groups are numbered units first, so on a classic board these are its row, column and
+    box, and the secondary columns of the smaller groups come last.
+    """
+    d = digit - 1
+    num_cells, size = geometry.num_cells, geometry.size
+    return [index] + [num_cells + g * size + d for g in geometry.groups_of[index]]
+
+
+class DlxSolver(SolverEngine):
+    """
+    Exact cover solving engine, see the module documentation.
+    """
+
+    name = "dlx"
+
+    def __init__(self, box_size: int = DEFAULT_BOX_SIZE, constraints: Sequence = ()):
+        """
+        :param box_size: The size of the boards of the matrix built here, boards of other sizes are solved by
+                         engines built on demand
+        :param constraints: The data.Constraints of the boards of the matrix, same as above for other boards
+        """
+        self._init_matrix(get_geometry(box_size, constraints))
+
+    def _init_matrix(self, geometry: Geometry):
+        self._geometry: Geometry = geometry
+        # one column per cell, then size per group: the units are primary columns, the smaller groups secondary
+        self._num_primary: int = geometry.num_cells + len(geometry.units) * geometry.size
+        self._num_columns: int = geometry.num_cells + len(geometry.groups) * geometry.size
+        num_rows = geometry.num_cells * geometry.size
+        # the engines of the boards of other sizes or constraints, see _engine_for
+        self._others: dict[Geometry, DlxSolver] = {}
+        # the rules of the constraints that watch each cell, None without rules, see data.Constraints
+        self._rules_of: tuple[tuple, ...] | None = geometry.rules_of if geometry.rules else None
+        # the values of the current solve, kept only to check the rules
+        self._values: bytearray = bytearray(geometry.num_cells)
+        # branch on the cell columns only, on the boards with groups of two cells, see the module documentation
+        self._cells_first: bool = any(len(group) == 2 for group in geometry.groups[len(geometry.units):])
+        # node 0 is the root, nodes 1.._num_columns are the column headers, then one node per column of each row
+        row_length = sum(1 + len(geometry.groups_of[index]) for index in range(geometry.num_cells))
+        total = 1 + self._num_columns + row_length * geometry.size
+        self._left: list[int] = [0] * total
+        self._right: list[int] = [0] * total
+        self._up: list[int] = list(range(total))
+        self._down: list[int] = list(range(total))
+        self._column: list[int] = [0] * total
+        # the matrix row (index * size + digit - 1) of each node
+        self._row: list[int] = [0] * total
+        # number of nodes in each column, indexed by header node
+        self._size: list[int] = [0] * (1 + self._num_columns)
+        # the first node of each matrix row
+        self._row_first: list[int] = [0] * num_rows
+        # time budget of the current solve, checked once per search node
+        self._deadline: Deadline | None = None
+        # search counters of the current solve, see solver.Stats
+        self._nodes: int = 0
+        self._backtracks: int = 0
+        self._max_depth: int = 0
+        self._singles: int = 0  # rows chosen in a column with a single row
+        self._build()
+
+    def _build(self):
+        left, right, up, down, column = self._left, self._right, self._up, self._down, self._column
+        geometry = self._geometry
+        num_columns = self._num_columns
+        num_primary = self._num_primary
+        size = geometry.size
+
+        # header ring: root <-> 1 <-> 2 ... <-> num_primary <-> root
+        for h in range(1 + num_primary):
+            left[h] = h - 1 if h > 0 else num_primary
+            right[h] = h + 1 if h < num_primary else 0
+            column[h] = h
+        # the secondary headers link to themselves, covering them still removes their rows
+        for h in range(1 + num_primary, 1 + num_columns):
+            left[h] = right[h] = column[h] = h
+
+        node = 1 + num_columns
+        for index in range(geometry.num_cells):
+            for digit in range(1, size + 1):
+                matrix_row = index * size + digit - 1
+                self._row_first[matrix_row] = node
+                first = node
+                columns = _row_columns(geometry, index, digit)
+                last = first + len(columns) - 1
+                for c in columns:
+                    h = c + 1
+                    # append the node at the bottom of column h
+                    column[node] = h
+                    self._row[node] = matrix_row
+                    up[node] = up[h]
+                    down[node] = h
+                    down[up[h]] = node
+                    up[h] = node
+                    self._size[h] += 1
+                    # link into the row ring
+                    left[node] = node - 1 if node > first else last
+                    right[node] = node + 1 if node < last else first
+                    node += 1
+
+    def _cover(self, h: int):
+        left, right, up, down, column, size = \
+            self._left, self._right, self._up, self._down, self._column, self._size
+        right[left[h]] = right[h]
+        left[right[h]] = left[h]
+        i = down[h]
+        while i != h:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, h: int):
+        left, right, up, down, column, size = \
+            self._left, self._right, self._up, self._down, self._column, self._size
+        i = up[h]
+        while i != h:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[h]] = h
+        left[right[h]] = h
+
+    def _choose_column(self) -> int:
+        """
+        The column with the fewest rows, 0 if all columns are covered.
+        """
+        if self._cells_first:
+            return self._choose_cell_column()
+        right, size = self._right, self._size
+        h = right[0]
+        best = h
+        best_size = size[h] if h else 0
+        while h != 0:
+            if size[h] < best_size:
+                best = h
+                best_size = size[h]
+                if best_size <= 1:
+                    break
+            h = right[h]
+        return best
+
+    def _choose_cell_column(self) -> int:
+        """
+        The first column with at most one row, else the cell column with the fewest rows, 0 if all columns are covered.
+        """
+        right, size = self._right, self._size
+        # the headers of the cell columns come first, 1..num_cells
+        num_cells = self._geometry.num_cells
+        h = right[0]
+        best = 0
+        best_size = self._geometry.size + 1
+        while h != 0:
+            if size[h] <= 1:
+                return h
+            if h <= num_cells and size[h] < best_size:
+                best = h
+                best_size = size[h]
+            h = right[h]
+        return best
+
+    def _search(self, chosen: list[int]) -> bool:
+        """
+        Algorithm X, choose the column with the fewest rows and try each of them.
+        On success the chosen nodes are left in chosen and the matrix is left covered, the caller unwinds it.
+        """
+        if self._deadline is not None:
+            # nothing is covered yet at this level, so a timeout leaves chosen matching the covered columns
+            self._deadline.check()
+        self._nodes += 1
+        if len(chosen) > self._max_depth:
+            self._max_depth = len(chosen)
+
+        right, left, down, column = self._right, self._left, self._down, self._column
+
+        best = self._choose_column()
+        if best == 0:
+            return True
+        if self._size[best] == 0:
+            return False
+
+        if self._size[best] == 1:
+            self._singles += 1
+        rules_of = self._rules_of
+        self._cover(best)
+        r = down[best]
+        while r != best:
+            if rules_of is not None and not self._rules_allow(r):
+                r = down[r]
+                continue
+            chosen.append(r)
+            j = right[r]
+            while j != r:
+                self._cover(column[j])
+                j = right[j]
+            if self._search(chosen):
+                return True
+            chosen.pop()
+            if rules_of is not None:
+                self._values[self._row[r] // self._geometry.size] = 0
+            self._backtracks += 1
+            j = left[r]
+            while j != r:
+                self._uncover(column[j])
+                j = left[j]
+            r = down[r]
+        self._uncover(best)
+        return False
+
+    def _search_all(self, chosen: list[int]) -> Iterator[None]:
+        """
+        Algorithm X continued after each solution, yields each time chosen holds a full solution.
+        Once exhausted the matrix and chosen are as on entry. While suspended, chosen matches the covered columns,
+        so a caller that stops early unwinds chosen.
+        """
+        if self._deadline is not None:
+            self._deadline.check()
+
+        right, left, down, column = self._right, self._left, self._down, self._column
+
+        best = self._choose_column()
+        if best == 0:
+            yield None
+            return
+        if self._size[best] == 0:
+            return
+
+        rules_of = self._rules_of
+        self._cover(best)
+        r = down[best]
+        while r != best:
+            if rules_of is not None and not self._rules_allow(r):
+                r = down[r]
+                continue
+            chosen.append(r)
+            j = right[r]
+            while j != r:
+                self._cover(column[j])
+                j = right[j]
+            yield from self._search_all(chosen)
+            chosen.pop()
+            if rules_of is not None:
+                self._values[self._row[r] // self._geometry.size] = 0
+            j = left[r]
+            while j != r:
+                self._uncover(column[j])
+                j = left[j]
+            r = down[r]
+        self._uncover(best)
+
+    def _rules_allow(self, r: int) -> bool:
+        """
+        Places the value of the matrix row of node r in _values, if the rules that watch its cell can still be met.
+        """
+        size = self._geometry.size
+        index, d = divmod(self._row[r], size)
+        values = self._values
+        values[index] = d + 1
+        for rule in self._rules_of[index]:
+            if not rule.feasible(values, size):
+                values[index] = 0
+                return False
+        return True
+
+    def _unwind(self, chosen: list[int]):
+        """
+        Uncover, in reverse order, the columns covered for the given chosen nodes.
+        Every chosen node covered its own column first, then the rest of its row, left to right.
+        """
+        left, column = self._left, self._column
+        for r in reversed(chosen):
+            j = left[r]
+            while j != r:
+                self._uncover(column[j])
+                j = left[j]
+            self._uncover(column[r])
+
+    def _select_givens(self, values: bytearray, chosen: list[int]) -> bool:
+        """
+        Selects the rows of the givens, as if the search chose them, their nodes are appended to chosen.
+        :return: False if two givens are in conflict, or break a rule of the constraints
+        """
+        if self._rules_of is not None:
+            self._values[:] = values
+            size = self._geometry.size
+            if not all(rule.feasible(values, size) for rule in self._geometry.rules):
+                return False
+        right, column = self._right, self._column
+        size = self._geometry.size
+        covered = bytearray(1 + self._num_columns)
+        for index in range(self._geometry.num_cells):
+            value = values[index]
+            if not value:
+                continue
+            r = self._row_first[index * size + value - 1]
+            # two givens in conflict share a column, the second one cannot be selected
+            j = r
+            while True:
+                if covered[column[j]]:
+                    return False
+                j = right[j]
+                if j == r:
+                    break
+            chosen.append(r)
+            while True:
+                covered[column[j]] = 1
+                self._cover(column[j])
+                j = right[j]
+                if j == r:
+                    break
+        return True
+
+    def _solution(self, board: SudokuBoard, chosen: list[int], number_of_givens: int) -> SudokuBoard:
+        solved = board.copy()
+        for r in chosen[number_of_givens:]:
+            index, d = divmod(self._row[r], self._geometry.size)
+            solved.set_value_at(index, d + 1)
+        return solved
+
+    def _engine_for(self, board: SudokuBoard) -> "DlxSolver":
+        """
+        The engine of the size and constraints of the board, built on first use. The MAX_OTHER_ENGINES last built
+        are kept, a killer puzzle has constraints of its own so its matrix is rarely reused.
+        """
+        geometry = board.geometry
+        engine = self._others.get(geometry)
+        if engine is None:
+            if len(self._others) >= MAX_OTHER_ENGINES:
+                del self._others[next(iter(self._others))]
+            engine = self._others[geometry] = DlxSolver.__new__(DlxSolver)
+            engine._init_matrix(geometry)
+        return engine
+
+    def solve(self, board: SudokuBoard, timeout: float | None = None,
+              stats: SolverStats | None = None) -> SudokuBoard | None:
+        if board.geometry is not self._geometry:
+            return self._engine_for(board).solve(board, timeout, stats)
+        self._deadline = Deadline.of(timeout)
+        self._nodes = self._backtracks = self._max_depth = self._singles = 0
+        chosen: list[int] = []
+        number_of_givens = 0
+        try:
+            if not self._select_givens(board.values, chosen):
+                return None
+            number_of_givens = len(chosen)
+            if not self._search(chosen):
+                return None
+            return self._solution(board, chosen, number_of_givens)
+        finally:
+            # leave the matrix as it was built, for the next puzzle
+            self._unwind(chosen)
+            if stats is not None:
+                stats.nodes += self._nodes
+                stats.backtracks += self._backtracks
+                # the depth counts the search choices, not the givens
+                stats.max_depth = max(stats.max_depth, self._max_depth - number_of_givens)
+                stats.solves += 1
+                # every node below the root placed one value
+                placements = stats.placements
+                branches = self._nodes - 1 - self._singles
+                if self._singles:
+                    placements["single"] = placements.get("single", 0) + self._singles
+                if branches > 0:
+                    placements["branch"] = placements.get("branch", 0) + branches
+
+    def iter_solutions(self, board: SudokuBoard, timeout: float | None = None) -> Iterator[SudokuBoard]:
+        """
+        See SolverEngine.iter_solutions.
+        The matrix is shared, the engine must not be used for another puzzle until the generator is exhausted
+        or closed.
+        """
+        if board.geometry is not self._geometry:
+            yield from self._engine_for(board).iter_solutions(board, timeout)
+            return
+        self._deadline = Deadline.of(timeout)
+        chosen: list[int] = []
+        try:
+            if not self._select_givens(board.values, chosen):
+                return
+            number_of_givens = len(chosen)
+            for _ in self._search_all(chosen):
+                yield self._solution(board, chosen, number_of_givens)
+        finally:
+            # a generator closed early leaves the search path covered
+            self._unwind(chosen)
+
+
+register_engine(DlxSolver.name, DlxSolver)
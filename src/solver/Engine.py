@@ -0,0 +1,128 @@
+import itertools
+from typing import Callable, Iterator
+
+from data import SudokuBoard
+from solver.Propagation import PropagationPipeline
+from solver.Solver import Solver
+from solver.Stats import SolverStats
+
+
+class SolverEngine:
+    """
+    Common interface of the headless solving engines.
+
+    An engine takes a puzzle and returns a new solved board, the puzzle itself is not modified.
+    Engines are selected by name with get_engine, see register_engine.
+    """
+
+    # the name the engine is registered under
+    name: str = ""
+
+    def solve(self, board: SudokuBoard, timeout: float | None = None,
+              stats: SolverStats | None = None) -> SudokuBoard | None:
+        """
+        Solves the puzzle.
+        :param board: The puzzle, it is not modified.
+        :param timeout: Time budget in seconds, None for no limit.
+        :param stats: The search counters are added to it if given, see solver.Stats.
+        :return: A new solved board, or None if the puzzle has no solution.
+        :raises SolveTimeout: If the timeout passed before the search ended.
+        """
+        raise NotImplementedError
+
+    def iter_solutions(self, board: SudokuBoard, timeout: float | None = None) -> Iterator[SudokuBoard]:
+        """
+        Lazily yields every solution of the puzzle, the search resumes where it found the previous one.
+        :param board: The puzzle, it is not modified.
+        :param timeout: Time budget in seconds for the whole enumeration, None for no limit.
+        :return: A new board per solution.
+        :raises SolveTimeout: If the timeout passed before the enumeration ended.
+        """
+        raise NotImplementedError
+
+    def count_solutions(self, board: SudokuBoard, limit: int | None = None, timeout: float | None = None) -> int:
+        """
+        Counts the solutions of the puzzle, stopping as soon as limit solutions were found.
+        count_solutions(board, limit=2) == 1 is a uniqueness check.
+        :param board: The puzzle, it is not modified.
+        :param limit: Stop counting at this number of solutions, None counts them all.
+        :param timeout: Time budget in seconds, None for no limit.
+        :return: The number of solutions, at most limit.
+        :raises SolveTimeout: If the timeout passed before the count ended.
+        """
+        return sum(1 for _ in itertools.islice(self.iter_solutions(board, timeout), limit))
+
+
+class BacktrackingEngine(SolverEngine):
+    """
+    The note propagation and backtracking search of solver.Solver.
+    """
+
+    name = "backtracking"
+
+    def __init__(self, pipeline: PropagationPipeline | None = None):
+        """
+        :param pipeline: The propagation run at each search node, None places single note cells only.
+        """
+        self._pipeline: PropagationPipeline | None = pipeline
+
+    def solve(self, board: SudokuBoard, timeout: float | None = None,
+              stats: SolverStats | None = None) -> SudokuBoard | None:
+        return Solver.solve_to_completion(board, self._pipeline, timeout, stats)
+
+    def iter_solutions(self, board: SudokuBoard, timeout: float | None = None) -> Iterator[SudokuBoard]:
+        return Solver.iter_solutions(board, self._pipeline, timeout)
+
+    def count_solutions(self, board: SudokuBoard, limit: int | None = None, timeout: float | None = None) -> int:
+        return Solver.count_solutions(board, limit, self._pipeline, timeout)
+
+
+class PropagationEngine(BacktrackingEngine):
+    """
+    The backtracking search with the full technique pipeline (singles, subsets, pointing, box/line) at each node.
+    """
+
+    name = "propagation"
+
+    def __init__(self):
+        super().__init__(PropagationPipeline())
+
+
+_ENGINES: dict[str, Callable[[], SolverEngine]] = {}
+
+DEFAULT_ENGINE: str = BacktrackingEngine.name
+
+
+def register_engine(name: str, factory: Callable[[], SolverEngine]):
+    """
+    Registers an engine factory under the given name.
+    :param name:
+    :param factory: Called with no arguments, returns a new engine.
+    :return:
+    """
+    _ENGINES[name] = factory
+
+
+def engine_names() -> list[str]:
+    """
+    Returns the names of the registered engines.
+    :return:
+    """
+    return sorted(_ENGINES)
+
+
+def get_engine(name: str = DEFAULT_ENGINE) -> SolverEngine:
+    """
+    Creates the engine registered under the given name.
+    throws ValueError if no such engine
+    :param name:
+    :return:
+    """
+    factory = _ENGINES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown solver engine '{name}', known engines: {', '.join(engine_names())}.")
+    return factory()
+
+
+register_engine(BacktrackingEngine.name, BacktrackingEngine)
+register_engine(PropagationEngine.name, PropagationEngine)
@@ -0,0 +1,188 @@
+"""
+Structured trace events of the solver and the sinks that consume them.
+
+The solver only builds an event when an attached sink accepts its level, so with no sink attached tracing costs
+one integer comparison per event site.
+"""
+import collections
+import enum
+import json
+import logging
+import sys
+from typing import IO, Any
+
+from data.Units import SIZE
+
+
+class EventLevel(enum.IntEnum):
+    """
+    Verbosity of an event, a sink receives the events at or above its level.
+    """
+    TRACE = 5       # note eliminations, many per placement
+    DEBUG = 10      # single note placements
+    INFO = 20       # branches, backtracks, contradictions and the end of the search
+
+
+class EventKind(enum.Enum):
+    PLACE = "place"                  # a value deduced by a technique (single note cells by default) was set
+    ELIMINATE = "eliminate"          # a note was removed from a cell
+    BRANCH = "branch"                # a note of a branch cell was tried
+    BACKTRACK = "backtrack"          # all notes of a branch cell failed
+    CONTRADICTION = "contradiction"  # a cell was left with no notes
+    SOLVED = "solved"
+    NO_SOLUTION = "no_solution"
+
+
+# the level of each event kind
+EVENT_LEVELS: dict[EventKind, EventLevel] = {
+    EventKind.PLACE: EventLevel.DEBUG,
+    EventKind.ELIMINATE: EventLevel.TRACE,
+    EventKind.BRANCH: EventLevel.INFO,
+    EventKind.BACKTRACK: EventLevel.INFO,
+    EventKind.CONTRADICTION: EventLevel.INFO,
+    EventKind.SOLVED: EventLevel.INFO,
+    EventKind.NO_SOLUTION: EventLevel.INFO,
+}
+
+
+class SolverEvent:
+    """
+    A single trace event.
+    index is the flat index of the cell (-1 if the event is not about a cell), value is the placed or eliminated
+    note (0 if not relevant), depth is the number of open choice points, size is the side of the board,
+    technique is the technique that deduced a placed value ("" if not relevant).
+    """
+    __slots__ = ("kind", "index", "value", "depth", "size", "technique")
+
+    def __init__(self, kind: EventKind, index: int = -1, value: int = 0, depth: int = 0, size: int = SIZE,
+                 technique: str = ""):
+        self.kind: EventKind = kind
+        self.index: int = index
+        self.value: int = value
+        self.depth: int = depth
+        self.size: int = size
+        self.technique: str = technique
+
+    @property
+    def level(self) -> EventLevel:
+        return EVENT_LEVELS[self.kind]
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns a JSON friendly representation of the event.
+        :return:
+        """
+        d: dict[str, Any] = {"kind": self.kind.value, "depth": self.depth}
+        if self.index >= 0:
+            d["row"], d["col"] = divmod(self.index, self.size)
+        if self.value:
+            d["value"] = self.value
+        if self.technique:
+            d["technique"] = self.technique
+        return d
+
+    def __str__(self) -> str:
+        where = " ({},{})".format(*divmod(self.index, self.size)) if self.index >= 0 else ""
+        value = f" {self.value}" if self.value else ""
+        technique = f" [{self.technique}]" if self.technique else ""
+        return f"{'  ' * self.depth}{self.kind.value}{where}{value}{technique}"
+
+    def __repr__(self) -> str:
+        return f"SolverEvent({self.kind}, index={self.index}, value={self.value}, depth={self.depth})"
+
+
+class EventSink:
+    """
+    Base class of event consumers, subclasses implement emit.
+    """
+
+    def __init__(self, level: EventLevel = EventLevel.INFO):
+        self.level: EventLevel = level
+
+    def emit(self, event: SolverEvent):
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases any resource held by the sink, the default does nothing.
+        :return:
+        """
+        pass
+
+
+class RingBufferSink(EventSink):
+    """
+    Keeps the last capacity events in memory, useful to inspect how a search ended.
+    """
+
+    def __init__(self, capacity: int = 1000, level: EventLevel = EventLevel.INFO):
+        super().__init__(level)
+        self._events: collections.deque[SolverEvent] = collections.deque(maxlen=capacity)
+
+    def emit(self, event: SolverEvent):
+        self._events.append(event)
+
+    def events(self) -> list[SolverEvent]:
+        """
+        Returns the buffered events, oldest first.
+        :return:
+        """
+        return list(self._events)
+
+    def clear(self):
+        self._events.clear()
+
+
+class JsonLinesSink(EventSink):
+    """
+    Writes one JSON object per event to a file.
+    """
+
+    def __init__(self, target: str | IO[str], level: EventLevel = EventLevel.INFO):
+        """
+        :param target: A path (the file is created and owned by the sink) or an open text stream.
+        :param level:
+        """
+        super().__init__(level)
+        if isinstance(target, str):
+            self._stream: IO[str] = open(target, "w", encoding="utf-8")
+            self._owns_stream = True
+        else:
+            self._stream = target
+            self._owns_stream = False
+
+    def emit(self, event: SolverEvent):
+        self._stream.write(json.dumps(event.to_dict()))
+        self._stream.write("\n")
+
+    def close(self):
+        if self._owns_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+
+
+class PrintSink(EventSink):
+    """
+    Prints the events, indented by search depth, the replacement of the old debug prints.
+    """
+
+    def __init__(self, level: EventLevel = EventLevel.INFO, stream: IO[str] | None = None):
+        super().__init__(level)
+        self._stream = stream
+
+    def emit(self, event: SolverEvent):
+        print(event, file=self._stream or sys.stdout)
+
+
+class LoggingSink(EventSink):
+    """
+    Forwards the events to a logging.Logger, INFO events at logging.INFO, the others at logging.DEBUG.
+    """
+
+    def __init__(self, logger: logging.Logger | None = None, level: EventLevel = EventLevel.INFO):
+        super().__init__(level)
+        self._logger = logger or logging.getLogger("solver")
+
+    def emit(self, event: SolverEvent):
+        self._logger.log(logging.INFO if event.level >= EventLevel.INFO else logging.DEBUG, "%s", event)
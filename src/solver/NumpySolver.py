@@ -0,0 +1,174 @@
+"""
+A NumPy engine that propagates many boards in lockstep.
+
+N boards are held as an (N, 81) array of values. Each round computes, for all boards at once, the candidates of
+every cell (from the peer table of data.Units as an index array), and places all naked and hidden singles.
+Boards that are solved or found invalid leave the round, boards on which a round changes nothing are stuck and
+drop to a per-board branching engine, starting from their propagated state.
+
+Easy and medium puzzles are usually solved by singles alone, so they never leave NumPy.
+The arrays are those of the 9x9 board, puzzles of other sizes are solved by the per-board engine alone.
+
+NumPy is optional, the engine is registered as "numpy" only when it can be imported.
+"""
+from typing import Iterator, Sequence
+
+from data import SudokuBoard
+from data.Cell import ALL_NOTES_MASK
+from data.Units import DEFAULT_GEOMETRY, NUM_CELLS, PEERS, UNITS, SIZE
+from solver.Engine import SolverEngine, BacktrackingEngine, register_engine
+from solver.Stats import SolverStats
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# propagation status of a board
+STATUS_STUCK: int = 0
+STATUS_SOLVED: int = 1
+STATUS_INVALID: int = -1
+
+if np is not None:
+    # the data.Units tables as index arrays
+    PEERS_INDEX = np.array(PEERS, dtype=np.intp)                # (81, 20)
+    UNITS_INDEX = np.array(UNITS, dtype=np.intp)                # (27, 9)
+    DIGIT_SHIFTS = np.arange(SIZE, dtype=np.uint16)             # (9,)
+    # value (0-9) -> its note bit, 0 for empty
+    VALUE_BIT = np.array([0] + [1 << d for d in range(SIZE)], dtype=np.uint16)
+    # notes mask -> number of notes, and -> the value of its lowest note
+    POPCOUNT = np.array([m.bit_count() for m in range(ALL_NOTES_MASK + 1)], dtype=np.uint8)
+    LOWEST_VALUE = np.array([(m & -m).bit_length() for m in range(ALL_NOTES_MASK + 1)], dtype=np.uint8)
+
+
+class NumpySolver(SolverEngine):
+    """
+    Lockstep propagation of many boards, see the module documentation.
+    solve() works on one board, solve_many() and propagate() are the batch entry points.
+    """
+
+    name = "numpy"
+
+    def __init__(self, fallback: SolverEngine | None = None, block_size: int = 4096, max_rounds: int = NUM_CELLS):
+        """
+        :param fallback: The engine that finishes the boards singles cannot solve, the backtracking engine if None
+        :param block_size: Boards propagated together, bounds the size of the temporary arrays
+        :param max_rounds: Upper bound of propagation rounds, each round places at least one value
+        """
+        if np is None:
+            raise ImportError("The numpy engine requires NumPy, install it with 'pip install numpy'.")
+        self._fallback: SolverEngine = fallback if fallback is not None else BacktrackingEngine()
+        self._block_size: int = block_size
+        self._max_rounds: int = max_rounds
+
+    def solve(self, board: SudokuBoard, timeout: float | None = None,
+              stats: SolverStats | None = None) -> SudokuBoard | None:
+        return self.solve_many([board], timeout, stats)[0]
+
+    def solve_many(self, boards: Sequence[SudokuBoard], timeout: float | None = None,
+                   stats: SolverStats | None = None) -> list[SudokuBoard | None]:
+        """
+        Solves many puzzles, propagating them together.
+        :param boards: The puzzles, they are not modified
+        :param timeout: Time budget in seconds of each fallback search, None for no limit
+        :param stats: The search counters of the fallback searches are added to it if given
+        :return: A new solved board per puzzle, None for the puzzles with no solution
+        """
+        if not boards:
+            return []
+        if any(board.geometry is not DEFAULT_GEOMETRY for board in boards):
+            return [self.solve_many([board], timeout, stats)[0] if board.geometry is DEFAULT_GEOMETRY
+                    else self._fallback.solve(board, timeout, stats) for board in boards]
+        values = np.frombuffer(b"".join(bytes(b.values) for b in boards), dtype=np.uint8).reshape(-1, NUM_CELLS)
+        values, status = self.propagate(values)
+
+        solutions: list[SudokuBoard | None] = []
+        for row, board_status in zip(values, status):
+            if board_status == STATUS_INVALID:
+                solutions.append(None)
+                continue
+            board = SudokuBoard()
+            board.values[:] = row.tobytes()
+            if board_status == STATUS_STUCK:
+                # the propagated values are forced, so the solution of this board is the solution of the puzzle
+                board = self._fallback.solve(board, timeout, stats)
+            solutions.append(board)
+        return solutions
+
+    def iter_solutions(self, board: SudokuBoard, timeout: float | None = None) -> Iterator[SudokuBoard]:
+        if board.geometry is not DEFAULT_GEOMETRY:
+            yield from self._fallback.iter_solutions(board, timeout)
+            return
+        values, status = self.propagate(np.frombuffer(bytes(board.values), dtype=np.uint8))
+        if status[0] == STATUS_INVALID:
+            return
+        propagated = SudokuBoard()
+        propagated.values[:] = values[0].tobytes()
+        if status[0] == STATUS_SOLVED:
+            yield propagated
+            return
+        # singles are forced, the propagated board has the same solutions as the puzzle
+        yield from self._fallback.iter_solutions(propagated, timeout)
+
+    def propagate(self, values: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+        """
+        Places singles on all boards until each one is solved, invalid or stuck.
+        :param values: (N, 81) uint8 array of values, 0 for empty, it is not modified
+        :return: the propagated values and an (N,) int8 array of STATUS_SOLVED / STATUS_INVALID / STATUS_STUCK
+        """
+        values = np.array(values, dtype=np.uint8, copy=True).reshape(-1, NUM_CELLS)
+        status = np.zeros(len(values), dtype=np.int8)
+        for start in range(0, len(values), self._block_size):
+            end = start + self._block_size
+            self._propagate_block(values[start:end], status[start:end])
+        return values, status
+
+    def _propagate_block(self, values: "np.ndarray", status: "np.ndarray"):
+        """
+        Propagates a block of boards in place, status is filled in place.
+        """
+        active = np.arange(len(values))
+        for _ in range(self._max_rounds + 1):
+            if active.size == 0:
+                return
+            v = values[active]                                              # (A, 81)
+            bits = VALUE_BIT[v]                                             # (A, 81)
+
+            # a unit holds a digit twice when the sum of its bits differs from their union
+            unit_bits = bits[:, UNITS_INDEX]                                # (A, 27, 9)
+            unit_used = np.bitwise_or.reduce(unit_bits, axis=2)             # (A, 27)
+            duplicate = (unit_bits.sum(axis=2, dtype=np.uint16) != unit_used).any(axis=1)
+
+            empty = v == 0
+            peer_used = np.bitwise_or.reduce(bits[:, PEERS_INDEX], axis=2)  # (A, 81)
+            candidates = np.where(empty, ALL_NOTES_MASK & ~peer_used, 0).astype(np.uint16)
+            dead_cell = (empty & (candidates == 0)).any(axis=1)
+
+            # for each unit and digit, the cells of the unit where the digit may go
+            unit_has = ((candidates[:, UNITS_INDEX][..., None] >> DIGIT_SHIFTS) & 1).astype(np.uint8)  # (A,27,9,9)
+            counts = unit_has.sum(axis=2)                                   # (A, 27, 9)
+            placed = ((unit_used[..., None] >> DIGIT_SHIFTS) & 1).astype(bool)
+            missing = ((counts == 0) & ~placed).any(axis=(1, 2))
+
+            invalid = duplicate | dead_cell | missing
+            solved = ~empty.any(axis=1) & ~invalid
+
+            # naked singles
+            new_v = np.where(empty & (POPCOUNT[candidates] == 1), LOWEST_VALUE[candidates], v)
+            # hidden singles, a cell forced to two digits makes a digit missing on the next round
+            a, u, d = np.nonzero(counts == 1)
+            if a.size:
+                position = unit_has[a, u, :, d].argmax(axis=1)
+                new_v[a, UNITS_INDEX[u, position]] = d + 1
+
+            changed = (new_v != v).any(axis=1)
+            keep = ~invalid & ~solved
+            values[active[keep]] = new_v[keep]
+            status[active[invalid]] = STATUS_INVALID
+            status[active[solved]] = STATUS_SOLVED
+            # boards a round did not change are stuck, they keep STATUS_STUCK
+            active = active[keep & changed]
+
+
+if np is not None:
+    register_engine(NumpySolver.name, NumpySolver)
@@ -0,0 +1,342 @@
+"""
+Human solving techniques and the propagation pipeline that runs them.
+
+A technique looks at the board notes and collects deductions: values to place and notes to remove.
+It does not change the board, the pipeline applies all the deductions of a pass in bulk through callbacks, so the
+solver can record them in its trail and keep its own state up to date.
+The units a technique visits are those of the board geometry, so the techniques work on boards of any size.
+"""
+import enum
+import itertools
+from typing import Callable, Sequence
+
+from data import SudokuBoard
+from solver.Stats import SolverStats
+
+# place(index, value, technique) and eliminate(index, mask), both return False on contradiction, technique is the
+# name of the technique that deduced the value
+PlaceCallback = Callable[[int, int, str], bool]
+EliminateCallback = Callable[[int, int], bool]
+
+
+class PassResult(enum.Enum):
+    CHANGED = "changed"               # deductions were found and applied
+    FIXED_POINT = "fixed_point"       # no technique found anything
+    CONTRADICTION = "contradiction"   # the board has no solution
+
+
+class Technique:
+    """
+    Base class of the solving techniques, subclasses implement find.
+    """
+
+    # short name, used in traces and ratings
+    name: str = ""
+
+    def find(self, board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int]) -> bool:
+        """
+        Collects the deductions of this technique, the board is not modified.
+        :param board:
+        :param placements: flat index -> value to place, filled by the technique
+        :param eliminations: flat index -> mask of notes to remove, filled by the technique
+        :return: False if the technique found that the board has no solution
+        """
+        raise NotImplementedError
+
+
+def _add_placement(placements: dict[int, int], index: int, value: int) -> bool:
+    # two different values forced into the same cell is a contradiction
+    old = placements.setdefault(index, value)
+    return old == value
+
+
+def _add_elimination(eliminations: dict[int, int], notes: list[int], index: int, mask: int):
+    # only record notes that are actually present
+    mask &= notes[index]
+    if mask:
+        eliminations[index] = eliminations.get(index, 0) | mask
+
+
+def _digit_positions(notes: list[int], unit: tuple[int, ...], bit: int) -> list[int]:
+    return [index for index in unit if notes[index] & bit]
+
+
+class NakedSingles(Technique):
+    """
+    A cell with a single note gets that note as value.
+    """
+
+    name = "naked_single"
+
+    def find(self, board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int]) -> bool:
+        notes = board.notes_masks
+        values = board.values
+        for index, mask in enumerate(notes):
+            if mask and not mask & (mask - 1):
+                placements[index] = mask.bit_length()
+            elif not mask and not values[index]:
+                return False
+        return True
+
+
+class HiddenSingles(Technique):
+    """
+    A digit that has a single possible cell in a unit goes there.
+    A digit that has no possible cell in a unit, and is not placed in it, is a contradiction.
+    """
+
+    name = "hidden_single"
+
+    def find(self, board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int]) -> bool:
+        notes = board.notes_masks
+        values = board.values
+        all_notes_mask = board.geometry.all_notes_mask
+        for unit in board.geometry.units:
+            once = 0
+            twice = 0
+            placed = 0
+            for index in unit:
+                mask = notes[index]
+                twice |= once & mask
+                once |= mask
+                if values[index]:
+                    placed |= 1 << (values[index] - 1)
+            if (once | placed) != all_notes_mask:
+                return False
+            singles = once & ~twice
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for index in unit:
+                    if notes[index] & bit:
+                        if not _add_placement(placements, index, bit.bit_length()):
+                            return False
+                        break
+        return True
+
+
+class NakedSubsets(Technique):
+    """
+    size cells of a unit whose notes together are exactly size digits (naked pair, triple),
+    those digits can be removed from the other cells of the unit.
+    """
+
+    def __init__(self, size: int):
+        self.size: int = size
+        self.name = {2: "naked_pair", 3: "naked_triple"}.get(size, f"naked_subset_{size}")
+
+    def find(self, board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int]) -> bool:
+        notes = board.notes_masks
+        size = self.size
+        for unit in board.geometry.units:
+            empty = [index for index in unit if notes[index]]
+            if len(empty) <= size:
+                continue
+            candidates = [index for index in empty if notes[index].bit_count() <= size]
+            for subset in itertools.combinations(candidates, size):
+                union = 0
+                for index in subset:
+                    union |= notes[index]
+                count = union.bit_count()
+                if count < size:
+                    # size cells share fewer than size digits
+                    return False
+                if count == size:
+                    for index in empty:
+                        if index not in subset:
+                            _add_elimination(eliminations, notes, index, union)
+        return True
+
+
+class HiddenSubsets(Technique):
+    """
+    size digits of a unit that together fit only in size cells (hidden pair, triple),
+    the other notes can be removed from those cells.
+    """
+
+    def __init__(self, size: int):
+        self.size: int = size
+        self.name = {2: "hidden_pair", 3: "hidden_triple"}.get(size, f"hidden_subset_{size}")
+
+    def find(self, board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int]) -> bool:
+        notes = board.notes_masks
+        size = self.size
+        all_notes_mask = board.geometry.all_notes_mask
+        for unit in board.geometry.units:
+            # for each digit still open in the unit, the mask of unit positions where it may go
+            positions: dict[int, int] = {}
+            for pos, index in enumerate(unit):
+                mask = notes[index]
+                while mask:
+                    bit = mask & -mask
+                    mask ^= bit
+                    positions[bit] = positions.get(bit, 0) | (1 << pos)
+            if len(positions) <= size:
+                continue
+            digits = [bit for bit, where in positions.items() if where.bit_count() <= size]
+            for subset in itertools.combinations(digits, size):
+                where = 0
+                digits_mask = 0
+                for bit in subset:
+                    where |= positions[bit]
+                    digits_mask |= bit
+                count = where.bit_count()
+                if count < size:
+                    # size digits fit in fewer than size cells
+                    return False
+                if count == size:
+                    for pos, index in enumerate(unit):
+                        if where >> pos & 1:
+                            _add_elimination(eliminations, notes, index, ~digits_mask & all_notes_mask)
+        return True
+
+
+class PointingPairs(Technique):
+    """
+    If the notes of a digit in a box are all in one row (or column),
+    the digit can be removed from the rest of that row (or column).
+    """
+
+    name = "pointing"
+
+    def find(self, board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int]) -> bool:
+        notes = board.notes_masks
+        geometry = board.geometry
+        row_of, col_of, box_of = geometry.row_of, geometry.col_of, geometry.box_of
+        for box in geometry.boxes:
+            for d in range(geometry.size):
+                bit = 1 << d
+                where = _digit_positions(notes, box, bit)
+                if len(where) < 2:
+                    continue
+                b = box_of[where[0]]
+                row = row_of[where[0]]
+                if all(row_of[i] == row for i in where):
+                    for index in geometry.rows[row]:
+                        if box_of[index] != b:
+                            _add_elimination(eliminations, notes, index, bit)
+                col = col_of[where[0]]
+                if all(col_of[i] == col for i in where):
+                    for index in geometry.cols[col]:
+                        if box_of[index] != b:
+                            _add_elimination(eliminations, notes, index, bit)
+        return True
+
+
+class BoxLineReduction(Technique):
+    """
+    If the notes of a digit in a row (or column) are all in one box,
+    the digit can be removed from the rest of that box.
+    """
+
+    name = "box_line"
+
+    def find(self, board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int]) -> bool:
+        notes = board.notes_masks
+        geometry = board.geometry
+        box_of = geometry.box_of
+        for lines, line_of in ((geometry.rows, geometry.row_of), (geometry.cols, geometry.col_of)):
+            for line in lines:
+                for d in range(geometry.size):
+                    bit = 1 << d
+                    where = _digit_positions(notes, line, bit)
+                    if len(where) < 2:
+                        continue
+                    b = box_of[where[0]]
+                    if all(box_of[i] == b for i in where):
+                        line_number = line_of[where[0]]
+                        for index in geometry.boxes[b]:
+                            if line_of[index] != line_number:
+                                _add_elimination(eliminations, notes, index, bit)
+        return True
+
+
+def default_techniques() -> list[Technique]:
+    """
+    All the techniques, cheapest first.
+    :return:
+    """
+    return [NakedSingles(), HiddenSingles(),
+            NakedSubsets(2), HiddenSubsets(2),
+            PointingPairs(), BoxLineReduction(),
+            NakedSubsets(3), HiddenSubsets(3)]
+
+
+class PropagationPipeline:
+    """
+    Runs techniques until a fixed point is reached.
+
+    A pass runs the techniques in order and stops at the first one that finds deductions, all of which are applied
+    in bulk. The next pass starts again from the first (cheapest) technique.
+    """
+
+    def __init__(self, techniques: Sequence[Technique] | None = None):
+        """
+        :param techniques: The techniques to run, in order, default_techniques() if None.
+        """
+        self._techniques: list[Technique] = list(techniques) if techniques is not None else default_techniques()
+
+    @property
+    def techniques(self) -> list[Technique]:
+        return self._techniques
+
+    def run_pass(self, board: SudokuBoard, place: PlaceCallback, eliminate: EliminateCallback,
+                 stats: SolverStats | None = None) -> PassResult:
+        """
+        Runs one propagation pass.
+        :param board: The board, changed only through place and eliminate
+        :param place: place(index, value, technique), sets a value and removes it from the peers notes
+        :param eliminate: eliminate(index, mask), removes notes from a cell
+        :param stats: The passes, placements and technique eliminations are added to it if given.
+        :return:
+        """
+        for technique in self._techniques:
+            placements: dict[int, int] = {}
+            eliminations: dict[int, int] = {}
+            if not technique.find(board, placements, eliminations):
+                return PassResult.CONTRADICTION
+            if not placements and not eliminations:
+                continue
+            if stats is not None:
+                name = technique.name
+                stats.passes += 1
+                if placements:
+                    stats.placements[name] = stats.placements.get(name, 0) + len(placements)
+                if eliminations:
+                    stats.technique_eliminations[name] = stats.technique_eliminations.get(name, 0) + len(eliminations)
+            if not self._apply(board, placements, eliminations, place, eliminate, technique.name):
+                return PassResult.CONTRADICTION
+            return PassResult.CHANGED
+        return PassResult.FIXED_POINT
+
+    def propagate(self, board: SudokuBoard, place: PlaceCallback, eliminate: EliminateCallback,
+                  stats: SolverStats | None = None) -> bool:
+        """
+        Runs passes until a fixed point is reached.
+        :param stats: see run_pass
+        :return: False on contradiction
+        """
+        while True:
+            result = self.run_pass(board, place, eliminate, stats)
+            if result == PassResult.FIXED_POINT:
+                return True
+            if result == PassResult.CONTRADICTION:
+                return False
+
+    @staticmethod
+    def _apply(board: SudokuBoard, placements: dict[int, int], eliminations: dict[int, int],
+               place: PlaceCallback, eliminate: EliminateCallback, technique: str) -> bool:
+        notes = board.notes_masks
+        values = board.values
+        for index, value in placements.items():
+            # an earlier placement of this pass may have removed the note, both were forced
+            if not notes[index] >> (value - 1) & 1:
+                return False
+            if not place(index, value, technique):
+                return False
+        for index, mask in eliminations.items():
+            if values[index]:
+                continue
+            if not eliminate(index, mask):
+                return False
+        return True
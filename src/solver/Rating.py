@@ -0,0 +1,175 @@
+"""
+Difficulty rating from the techniques a human solver needs.
+
+The puzzle is propagated with the technique pipeline, which always restarts from the cheapest technique after a
+change, so each technique is only used when all cheaper ones are stuck. The number of deductions of each technique
+is recorded, in the same single Solver run that keeps the notes up to date.
+
+- the grade is set by the most expensive technique needed, see TECHNIQUE_COSTS and GRADE_LIMITS.
+- the score is the sum of the costs of all the deductions, so it orders puzzles inside a grade.
+- when the techniques are not enough, the puzzle is EVIL and the branching search finishes it from the propagated
+  state. The notes tried and the deepest nesting of tried notes are added to the score. The search is bounded by
+  a time budget, past it the search part of the score is SEARCH_SCORE_CAP.
+"""
+import enum
+
+from data import SudokuBoard
+from solver.Deadline import SolveTimeout
+from solver.Propagation import PropagationPipeline
+from solver.Solver import Solver
+from solver.Stats import SolverStats
+
+
+class Grade(enum.Enum):
+    """
+    Difficulty grades, the labels of Samples.py.
+    """
+    EASY = "easy"
+    MEDIUM = "medium"
+    EXPERT = "expert"
+    EVIL = "evil"
+
+
+# cost of one deduction of each technique of solver.Propagation, by technique name
+TECHNIQUE_COSTS: dict[str, int] = {
+    "naked_single": 1,
+    "hidden_single": 2,
+    "naked_pair": 8,
+    "hidden_pair": 10,
+    "pointing": 6,
+    "box_line": 6,
+    "naked_triple": 15,
+    "hidden_triple": 18,
+}
+# cost of the techniques that are not in the table
+DEFAULT_TECHNIQUE_COST: int = 20
+
+# the highest technique cost of each grade, harder puzzles need search and are EVIL
+GRADE_LIMITS: tuple[tuple[Grade, int], ...] = ((Grade.EASY, 2), (Grade.MEDIUM, 10), (Grade.EXPERT, 1 << 30))
+
+# score of each note tried by the search, and of each level of nesting
+SEARCH_BRANCH_COST: int = 25
+SEARCH_DEPTH_COST: int = 100
+SEARCH_SCORE_CAP: int = 100_000
+
+_GRADE_ORDER: dict[Grade, int] = {grade: order for order, grade in enumerate(Grade)}
+
+
+def grade_order(grade: Grade) -> int:
+    """
+    The position of the grade from EASY (0) to EVIL, for comparisons.
+    :param grade:
+    :return:
+    """
+    return _GRADE_ORDER[grade]
+
+
+class Rating:
+    """
+    The rating of a puzzle, see the module documentation.
+    branches and max_depth are 0 when the techniques were enough, search_bounded is True if the search ran out
+    of time.
+    """
+    __slots__ = ("score", "grade", "techniques", "branches", "max_depth", "search_bounded")
+
+    def __init__(self, score: int, grade: Grade, techniques: dict[str, int], branches: int = 0, max_depth: int = 0,
+                 search_bounded: bool = False):
+        self.score: int = score
+        self.grade: Grade = grade
+        self.techniques: dict[str, int] = techniques  # technique name -> number of deductions
+        self.branches: int = branches
+        self.max_depth: int = max_depth
+        self.search_bounded: bool = search_bounded
+
+    def to_dict(self) -> dict:
+        d = {"score": self.score, "grade": self.grade.value, "techniques": self.techniques}
+        if self.grade == Grade.EVIL:
+            d.update(branches=self.branches, max_depth=self.max_depth, search_bounded=self.search_bounded)
+        return d
+
+    def __str__(self):
+        return f"{self.grade.value} ({self.score})"
+
+
+class Rater:
+    """
+    Rates puzzles, see the module documentation. One Rater reuses its pipeline for any number of puzzles.
+    """
+
+    def __init__(self, pipeline: PropagationPipeline | None = None, search_timeout: float | None = 1.0):
+        """
+        :param pipeline: The techniques, the full PropagationPipeline if None.
+        :param search_timeout: Time budget in seconds of the search of an EVIL puzzle, None for no limit.
+        """
+        self._pipeline: PropagationPipeline = pipeline if pipeline is not None else PropagationPipeline()
+        self._search_timeout: float | None = search_timeout
+
+    def rate_logic(self, board: SudokuBoard) -> Rating | None:
+        """
+        Rates the puzzle with the techniques only.
+        A puzzle the techniques solve has a unique solution.
+        :param board: The puzzle, it is not modified.
+        :return: The rating, None if the techniques are not enough or the puzzle has no solution.
+        """
+        propagated, techniques = self._propagate(board)
+        if propagated is None or 0 in propagated.values:
+            return None
+        return self._logic_rating(techniques)
+
+    def rate(self, board: SudokuBoard) -> Rating:
+        """
+        Rates the puzzle, see the module documentation.
+        throws ValueError if the puzzle has no solution
+        :param board: The puzzle, it is not modified.
+        :return:
+        """
+        propagated, techniques = self._propagate(board)
+        if propagated is None:
+            raise ValueError("The puzzle has no solution.")
+        if 0 not in propagated.values:
+            return self._logic_rating(techniques)
+
+        logic_score = self._logic_score(techniques)
+        stats = SolverStats()
+        try:
+            solved = Solver.solve_to_completion(propagated, self._pipeline, self._search_timeout, stats)
+        except SolveTimeout:
+            return Rating(logic_score + SEARCH_SCORE_CAP, Grade.EVIL, techniques, search_bounded=True)
+        if solved is None:
+            raise ValueError("The puzzle has no solution.")
+        # the notes tried are the nodes below the root
+        branches = stats.nodes - 1
+        search_score = min(SEARCH_SCORE_CAP, branches * SEARCH_BRANCH_COST + stats.max_depth * SEARCH_DEPTH_COST)
+        return Rating(logic_score + search_score, Grade.EVIL, techniques, branches, stats.max_depth)
+
+    def _propagate(self, board: SudokuBoard) -> tuple[SudokuBoard | None, dict[str, int]]:
+        """
+        Propagates a copy of the board.
+        :return: the propagated board, None on contradiction, and the deductions of each technique used
+        """
+        stats = SolverStats()
+        propagated = Solver.propagate_only(board, self._pipeline, stats)
+        techniques: dict[str, int] = {}
+        for name, count in stats.placements.items():
+            techniques[name] = techniques.get(name, 0) + count
+        for name, count in stats.technique_eliminations.items():
+            techniques[name] = techniques.get(name, 0) + count
+        return propagated, {name: count for name, count in techniques.items() if count}
+
+    @staticmethod
+    def _logic_score(techniques: dict[str, int]) -> int:
+        return sum(TECHNIQUE_COSTS.get(name, DEFAULT_TECHNIQUE_COST) * count for name, count in techniques.items())
+
+    def _logic_rating(self, techniques: dict[str, int]) -> Rating:
+        hardest = max((TECHNIQUE_COSTS.get(name, DEFAULT_TECHNIQUE_COST) for name in techniques), default=0)
+        grade = next(grade for grade, limit in GRADE_LIMITS if hardest <= limit)
+        return Rating(self._logic_score(techniques), grade, techniques)
+
+
+def rate(board: SudokuBoard) -> Rating:
+    """
+    Rates one puzzle with a default Rater, see Rater.rate.
+    :param board:
+    :return:
+    """
+    return Rater().rate(board)
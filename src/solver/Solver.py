@@ -1,14 +1,33 @@
 import enum
-from typing import Generator
+import itertools
+from typing import Generator, Iterator
 
 from data import SudokuBoard
-from data.Cell import Cell
-
-
-class SolveResult(enum.Enum):
+from solver.Deadline import Deadline
+from solver.Events import EventKind, EventLevel, EventSink, SolverEvent
+from solver.Propagation import PropagationPipeline, PassResult
+from solver.Stats import PhaseTimer, SolverStats
+from solver.Trail import Trail
+
+
+class SearchEvent(enum.Enum):
+     """
+     What a single step of the search state machine did.
+     """
+     PLACED = "placed"                  # single note cells were placed, or a propagation pass changed the board
+     PROPAGATED = "propagated"          # no single note cells left, the next step branches
+     BRANCHED = "branched"              # a note of the branch cell was tried
+     BACKTRACKED = "backtracked"        # all notes of the branch cell failed, it was undone
      SOLVED = "solved"
-     NOT_SOLVED_YET_CONTINUE = "not_solved_continue"
-     NOT_SOLVED_INVALID = "not_solved_invalid"
+     NO_SOLUTION = "no_solution"
+
+class StepGranularity(enum.Enum):
+     """
+     Which steps of the search Solver.solve() yields on.
+     """
+     PLACEMENT = "placement"            # every step, each placement
+     PROPAGATION = "propagation"        # once per propagation pass, and on each branch and backtrack
+     BRANCH = "branch"                  # only on branches and backtracks
 
 class UpdateResult(enum.Enum):
      CELL_WITH_NO_NOTES = "cell_with_no_notes"
@@ -16,291 +35,832 @@ class UpdateResult(enum.Enum):
      SOME_CELLS_WITH_NOTES = "some_cells_with_notes"
 
 
+# the events that end a step for each granularity, SOLVED and NO_SOLUTION always do
+_YIELD_EVENTS: dict[StepGranularity, frozenset[SearchEvent]] = {
+    StepGranularity.PLACEMENT: frozenset(SearchEvent),
+    StepGranularity.PROPAGATION: frozenset(
+        (SearchEvent.PROPAGATED, SearchEvent.BRANCHED, SearchEvent.BACKTRACKED,
+         SearchEvent.SOLVED, SearchEvent.NO_SOLUTION)),
+    StepGranularity.BRANCH: frozenset(
+        (SearchEvent.BRANCHED, SearchEvent.BACKTRACKED, SearchEvent.SOLVED, SearchEvent.NO_SOLUTION)),
+}
+
+# trace level thresholds as plain ints, compared at each event site before anything is built
+_TRACE: int = int(EventLevel.TRACE)
+_DEBUG: int = int(EventLevel.DEBUG)
+_INFO: int = int(EventLevel.INFO)
+_TRACE_OFF: int = 1 << 30  # no sink attached
+
+
+class _SearchFrame:
+    """
+    One choice point of the explicit search stack: the branch cell and the notes not tried yet.
+    """
+    __slots__ = ("index", "remaining", "note", "mark", "number_of_empty_cells")
+
+    def __init__(self, index: int, remaining: int, mark: int, number_of_empty_cells: int):
+        self.index: int = index
+        self.remaining: int = remaining  # notes mask of the notes not tried yet
+        self.note: int = 0  # the note currently tried
+        # the trail mark and number of empty cells before the first note was placed, each note starts from there
+        self.mark: int = mark
+        self.number_of_empty_cells: int = number_of_empty_cells
+
+
 class Solver:
 
-    def __init__(self, board: SudokuBoard):
+    def __init__(self, board: SudokuBoard, incremental: bool = True, pipeline: PropagationPipeline | None = None,
+                 stats: SolverStats | None = None):
+        """
+        :param board: The board to solve, it is modified in place.
+        :param incremental: If True, notes are computed once and then, on each placement, the value is removed
+                            only from the notes of the peers of the cell (20 on a 9x9 board).
+                            If False, the notes of all cells are recomputed after each placement.
+        :param pipeline: The propagation run at each search node before branching, see solver.Propagation.
+                         If None, only single note cells are placed, one per step.
+                         A pipeline removes notes, so it requires the incremental mode.
+        :param stats: The search counters and phase times are added to it if given, see solver.Stats.
+                      Timing the phases slows the search down, it is only done when stats are given.
+        """
         super().__init__()
+        if pipeline is not None and not incremental:
+            raise ValueError("A propagation pipeline requires the incremental mode.")
         self._board: SudokuBoard = board
-        # self._state: State = State.IDLE
-        self._current_row: int = 0
-        self._current_col: int = 0
-
-        self._recursive_stack: list[tuple[int, int, int]] = []  # stack to keep track of the cells we are solving
+        self._incremental: bool = incremental
+        self._pipeline: PropagationPipeline | None = pipeline
+        # the index tables of the board size
+        geometry = board.geometry
+        self._size: int = geometry.size
+        self._num_cells: int = geometry.num_cells
+        self._all_notes_mask: int = geometry.all_notes_mask
+        self._peers: tuple[tuple[int, ...], ...] = geometry.peers
+        self._groups_of: tuple[tuple[int, ...], ...] = geometry.groups_of
+        # the rules of the variant constraints (e.g. cage sums) that watch each cell, see data.Constraints
+        self._rules: tuple = geometry.rules
+        self._rules_of: tuple[tuple, ...] = geometry.rules_of
+        # maintained by _update_notes and _place, used by the incremental mode
+        self._number_of_empty_cells: int = self._num_cells
+        self._contradiction: bool = False
+        # the cells left with a single note by _update_notes, _place or _eliminate since the last undo, entries
+        # may be stale, see _pop_single. Placing singles from it costs the peers of each placement, not a board scan
+        self._singles: list[int] = []
+        # undo log of all board changes, used to backtrack
+        self._trail: Trail = Trail(board)
+        # True when _update_notes rewrote the notes of all cells since the last take_changed_cells
+        self._notes_recomputed: bool = True
+
+        # the search state machine, see _advance
+        self._frames: list[_SearchFrame] = []  # explicit stack of choice points, replaces recursion
+        self._propagated: bool = False  # True when no single note cell is left, next step branches
+        self._backtrack_pending: bool = False  # True when the top frame has to try its next note
+        self._finished: SearchEvent | None = None  # SOLVED or NO_SOLUTION once the search ended
+
+        # time budget of solve_to_completion, checked once per search node
+        self._deadline: Deadline | None = None
+        # search counters, kept in a private SolverStats when none is given
+        self._stats: SolverStats = stats if stats is not None else SolverStats()
+        self._stats.solves += 1
+        self._timer: PhaseTimer | None = None
+        if stats is not None:
+            self._time_phases(stats)
+
+        # trace sinks, _trace_level is the lowest level any sink accepts, _TRACE_OFF if there is none
+        self._sinks: list[EventSink] = []
+        self._trace_level: int = _TRACE_OFF
+
+    def _time_phases(self, stats: SolverStats):
+        """
+        Replace the methods of each phase by timed wrappers, on this instance only.
+        """
+        timer = PhaseTimer(stats.phase_seconds)
+        self._timer = timer
+        for phase, names in (("note_updates", ("_update_notes", "_place", "_eliminate")),
+                             ("single_replacement", ("_propagate", "_run_pass", "_replace_single_note_cells", "_pop_single")),
+                             ("branch_selection", ("_scan_for_branch_cell", "_find_cell_with_minimal_number_of_notes")),
+                             ("restore", ("_undo",))):
+            for name in names:
+                setattr(self, name, timer.wrap(phase, getattr(self, name)))
+
+    def _stop_timer(self):
+        if self._timer is not None:
+            self._timer.stop()
+
+    @property
+    def stats(self) -> SolverStats:
+        """
+        The search counters of this solver, the stats given to the constructor if any.
+        :return:
+        """
+        return self._stats
 
+    def add_sink(self, sink: EventSink):
+        """
+        Attach an event sink, it receives the events at or above its level.
+        :param sink:
+        :return:
+        """
+        self._sinks.append(sink)
+        self._trace_level = min(int(s.level) for s in self._sinks)
 
-    def _debug(self, *args, **kwargs):
+    def remove_sink(self, sink: EventSink):
+        """
+        Detach a previously attached event sink.
+        :param sink:
+        :return:
+        """
+        self._sinks.remove(sink)
+        self._trace_level = min((int(s.level) for s in self._sinks), default=_TRACE_OFF)
 
-        # create privix from the rursive stack
-        # each element appears as (r:int, c:int, v:int)
-        prefix = " ".join(f"({r},{c},{v})" for r, c, v in self._recursive_stack)
-        print(prefix, ":", *args, **kwargs)
+    def track_changes(self):
+        """
+        Starts collecting the cells changed by the search, for views that redraw only those, see take_changed_cells.
+        :return:
+        """
+        self._trail.track_changes()
+        self._notes_recomputed = True
 
-    def _push_recursive_stack(self, row: int, col: int, value: int):
+    def take_changed_cells(self) -> set[int] | None:
         """
-        Push the current cell to the recursive stack.
-        :param row: The row of the cell.
-        :param col: The column of the cell.
-        :param value: The value of the cell.
+        Returns the flat indexes of the cells whose value or notes changed since the last call, typically once per
+        step of solve(). Requires track_changes.
+        :return: None if any cell may have changed: on the first call, and after the notes of all cells were
+                 recomputed (each step in non incremental mode)
         """
-        self._recursive_stack.append((row, col, value))
+        changed = self._trail.take_changed()
+        if self._notes_recomputed:
+            self._notes_recomputed = False
+            return None
+        return changed
 
-    def _pop_recursive_stack(self) -> tuple[int, int, int]:
+    def _emit(self, kind: EventKind, index: int = -1, value: int = 0, technique: str = ""):
         """
-        Pop the last cell from the recursive stack.
-        :return: The row, column and value of the cell.
+        Send an event to the sinks that accept it.
+        Callers check self._trace_level first, so nothing is built when no sink is interested.
         """
-        if not self._recursive_stack:
-            raise IndexError("Recursive stack is empty.")
-        return self._recursive_stack.pop()
+        event = SolverEvent(kind, index, value, len(self._frames), self._size, technique)
+        level = event.level
+        for sink in self._sinks:
+            if sink.level <= level:
+                sink.emit(event)
 
-    def solve(self) -> Generator[bool, bool, None]:
+    def solve(self, granularity: StepGranularity = StepGranularity.PLACEMENT) -> Generator[bool, bool, None]:
         """
         This is iterator generator that solves the Sudoku puzzle step by step.
         ON each step it yields a boolean value indicating whether the Sudoku is solved or not.
         Also, if the caller send it a false value, it will stop the solving process.
 
+        The search is an explicit state machine (see _advance), so a step costs the same at any depth.
+
+        :param granularity: Which steps to yield on, see StepGranularity.
         :return:
         """
 
-        # define machine state
-        # if we in state IDLE, we move to state NOTES,
-        # if we in state NOTES, we advance to state SOLVING
-        #  when we finish we move to state SOLVED
+        if not self._board.is_consistent():
+            if self._trace_level <= _INFO:
+                self._emit(EventKind.NO_SOLUTION)
+            yield False
+            return None
+
+        if self._incremental:
+            # compute the notes once, from now on they are maintained by _place
+            self._update_notes()
 
-        inner_solver: Generator[SolveResult, None, None] = self._solve()
+        yield_events = _YIELD_EVENTS[granularity]
+        # the root node, the others are counted by _try_next_note
+        self._stats.nodes += 1
 
         while True:
 
+            event = self._advance()
+            if event not in yield_events:
+                continue
 
-            solved_status: SolveResult = next(inner_solver)
-            solved = solved_status == SolveResult.SOLVED
+            solved = event == SearchEvent.SOLVED
+            if solved or event == SearchEvent.NO_SOLUTION:
+                self._stop_timer()
 
             do_continue = yield solved
-            if solved:
-                self._debug("Sudoku solved, Done.")
-                return None
-
-            if solved_status == SolveResult.NOT_SOLVED_INVALID:
-                self._debug("Sudoku is not solvable, Done.")
+            if solved or event == SearchEvent.NO_SOLUTION:
                 return None
 
             if not do_continue:
-                self._debug("Stopping the solving process.")
+                # the caller stopped the solving process
+                self._stop_timer()
                 return None
 
+    def _advance(self) -> SearchEvent:
+        """
+        Run one step of the search state machine and return what it did.
+
+        The state is the board, the trail and the explicit stack of choice points (self._frames):
+        - a contradiction, or a frame whose notes failed, moves the top frame to its next note, or pops it
+        - a single note cell is placed
+        - when no single note cell is left, a new frame is pushed on the cell with the fewest notes
+        Once SOLVED or NO_SOLUTION is returned, all further calls return it again.
+        """
+        if self._finished is not None:
+            return self._finished
+
+        if self._backtrack_pending:
+            return self._backtrack()
+
+        if self._incremental:
+            update_notes_result = self._notes_status()
+        else:
+            update_notes_result = self._update_notes()
+
+        if update_notes_result == UpdateResult.CELL_WITH_NO_NOTES:
+            return self._backtrack()
+
+        if update_notes_result == UpdateResult.ALL_VALUES:
+            # if all cells have values, we can assume that the Sudoku is solved
+            if self._trace_level <= _INFO:
+                self._emit(EventKind.SOLVED)
+            self._finished = SearchEvent.SOLVED
+            return SearchEvent.SOLVED
+
+        if not self._propagated:
+            if self._pipeline is not None:
+                # one pass of the pipeline, all its deductions are applied at once
+                pass_result = self._run_pass()
+                if pass_result == PassResult.CHANGED:
+                    return SearchEvent.PLACED
+                if pass_result == PassResult.CONTRADICTION:
+                    self._set_contradiction()
+                    return SearchEvent.PLACED
+            # search for a cell with a singe note, and set the value of this cell to this note
+            elif self._replace_single_note_cells():
+                return SearchEvent.PLACED
+            self._propagated = True
+            return SearchEvent.PROPAGATED
+
+        # search for a cell with no value but with notes, and try each of its notes
+        index = self._find_cell_with_minimal_number_of_notes()
+        # not None, there are empty cells, and not a cell without notes, we checked for contradiction above
+        assert index is not None
+
+        frame = _SearchFrame(index, self._board.get_notes_mask_at(index), self._trail.mark(),
+                             self._number_of_empty_cells)
+        self._frames.append(frame)
+        return self._try_next_note(frame)
+
+    def _run_pass(self) -> PassResult:
+        return self._pipeline.run_pass(self._board, self._place, self._eliminate, self._stats)
+
+    def _try_next_note(self, frame: _SearchFrame) -> SearchEvent:
+        """
+        Place the next untried note of the frame cell, the board must be at the frame mark.
+        """
+        remaining = frame.remaining
+        low = remaining & -remaining
+        frame.remaining = remaining ^ low
+        frame.note = low.bit_length()
+        self._propagated = False
+        stats = self._stats
+        stats.nodes += 1
+        stats.placements["branch"] = stats.placements.get("branch", 0) + 1
+        if len(self._frames) > stats.max_depth:
+            stats.max_depth = len(self._frames)
+        if self._trace_level <= _INFO:
+            self._emit(EventKind.BRANCH, frame.index, frame.note)
+        self._place(frame.index, frame.note, None)
+        return SearchEvent.BRANCHED
+
+    def _backtrack(self) -> SearchEvent:
+        """
+        The current note of the top frame failed, undo it and try the next one.
+        If the frame has no more notes, pop it, its parent frame will try its next note on the next step.
+        """
+        self._backtrack_pending = False
+        frames = self._frames
+        if not frames:
+            if self._trace_level <= _INFO:
+                self._emit(EventKind.NO_SOLUTION)
+            self._finished = SearchEvent.NO_SOLUTION
+            return SearchEvent.NO_SOLUTION
+
+        frame = frames[-1]
+        self._undo(frame.mark, frame.number_of_empty_cells)
+        self._stats.backtracks += 1
+        if frame.remaining:
+            return self._try_next_note(frame)
+
+        frames.pop()
+        if self._trace_level <= _INFO:
+            self._emit(EventKind.BACKTRACK, frame.index)
+        self._backtrack_pending = True
+        return SearchEvent.BACKTRACKED
+
+    @staticmethod
+    def solve_to_completion(board: SudokuBoard, pipeline: PropagationPipeline | None = None,
+                            timeout: float | None = None, stats: SolverStats | None = None) -> SudokuBoard | None:
+        """
+        Solves the Sudoku puzzle without stepping, for batch and service use where only the answer matters.
+        Runs the same search as solve() (propagation first, then branching on the cell with the fewest notes),
+        but with no yields, no debug output and no per-step board allocation.
+
+        :param board: The puzzle, it is not modified.
+        :param pipeline: The propagation run at each search node, see Solver.__init__.
+        :param timeout: Time budget in seconds, None for no limit.
+        :param stats: The search counters are added to it if given, also when the search times out.
+        :return: A new solved board, or None if the puzzle has no solution.
+        :raises SolveTimeout: If the timeout passed before the search ended.
+        """
+        solver = Solver._prepared(board, pipeline, timeout, stats)
+        if solver is None:
+            return None
+        try:
+            solved = solver._search()
+        finally:
+            solver._stop_timer()
+        return solver._board if solved else None
+
+    @staticmethod
+    def propagate_only(board: SudokuBoard, pipeline: PropagationPipeline,
+                       stats: SolverStats | None = None) -> SudokuBoard | None:
+        """
+        Runs the propagation pipeline to its fixed point, without branching.
+        The result is solved if the techniques of the pipeline are enough for the puzzle.
+
+        :param board: The puzzle, it is not modified.
+        :param pipeline: The techniques to run.
+        :param stats: The counters of the propagation are added to it if given, see solver.Stats.
+        :return: A new board with the deduced values and notes, or None if a contradiction was found.
+        """
+        solver = Solver._prepared(board, pipeline, None, stats)
+        if solver is None:
+            return None
+        try:
+            propagated = solver._propagate()
+        finally:
+            solver._stop_timer()
+        return solver._board if propagated else None
+
+    def _propagate(self) -> bool:
+        """
+        Runs the pipeline to its fixed point, there must be one.
+        return False on contradiction.
+        """
+        return self._pipeline.propagate(self._board, self._place, self._eliminate, self._stats)
+
+    def _search(self, depth: int = 0) -> bool:
+        """
+        The non generator search used by solve_to_completion, requires incremental mode.
+        On success the board is left solved, on failure it is restored to its state on entry.
+        :param depth: Number of tried notes on the path to this node
+        return True if solved.
+        """
+        if self._deadline is not None:
+            self._deadline.check()
+        stats = self._stats
+        stats.nodes += 1
+
+        notes = self._board.notes_masks
+        trail = self._trail
+        level_mark = trail.mark()
+        level_number_of_empty_cells = self._number_of_empty_cells
+
+        pipeline = self._pipeline
+        placements = stats.placements
+
+        while True:
+            if pipeline is not None and not self._propagate():
+                break
+
+            if self._number_of_empty_cells == 0:
+                return True
+
+            min_index = self._pop_single()
+            if min_index < 0:
+                min_index = self._scan_for_branch_cell()
+            min_notes = notes[min_index].bit_count()
+
+            if min_notes == 1:
+                placements["single"] = placements.get("single", 0) + 1
+                if self._place(min_index, notes[min_index].bit_length()):
+                    continue
+                break
+
+            # branch on each note of the cell, the mask is a snapshot, notes change while we try them
+            notes_mask = notes[min_index]
+            while notes_mask:
+                low = notes_mask & -notes_mask
+                notes_mask ^= low
+                branch_mark = trail.mark()
+                branch_number_of_empty_cells = self._number_of_empty_cells
+                if depth >= stats.max_depth:
+                    stats.max_depth = depth + 1
+                placements["branch"] = placements.get("branch", 0) + 1
+                if self._place(min_index, low.bit_length(), None) and self._search(depth + 1):
+                    return True
+                self._undo(branch_mark, branch_number_of_empty_cells)
+                stats.backtracks += 1
+            break
+
+        self._undo(level_mark, level_number_of_empty_cells)
+        return False
+
+    def _search_all(self) -> Iterator[None]:
+        """
+        The search of _search, continued after each solution.
+        Yields each time the board is solved, the caller reads the board before resuming.
+        The board is restored to its state on entry once the generator is exhausted.
+        """
+        if self._deadline is not None:
+            self._deadline.check()
+
+        board = self._board
+        notes = board.notes_masks
+        trail = self._trail
+        level_mark = trail.mark()
+        level_number_of_empty_cells = self._number_of_empty_cells
+
+        pipeline = self._pipeline
+
+        while True:
+            if pipeline is not None and not pipeline.propagate(board, self._place, self._eliminate):
+                break
+
+            if self._number_of_empty_cells == 0:
+                yield None
+                break
+
+            min_index = self._pop_single()
+            if min_index < 0:
+                min_index = self._scan_for_branch_cell()
+            notes_mask = notes[min_index]
+
+            if not notes_mask & (notes_mask - 1):
+                if self._place(min_index, notes_mask.bit_length()):
+                    continue
+                break
+
+            while notes_mask:
+                low = notes_mask & -notes_mask
+                notes_mask ^= low
+                branch_mark = trail.mark()
+                branch_number_of_empty_cells = self._number_of_empty_cells
+                if self._place(min_index, low.bit_length(), None):
+                    yield from self._search_all()
+                self._undo(branch_mark, branch_number_of_empty_cells)
+            break
+
+        self._undo(level_mark, level_number_of_empty_cells)
+
+    def _scan_for_branch_cell(self) -> int:
+        """
+        One scan that finds a single note cell, or else the empty cell with the fewest notes.
+        There must be at least one empty cell, and no empty cell without notes.
+        return its flat index.
+        """
+        values = self._board.values
+        notes = self._board.notes_masks
+        min_notes = self._size + 1
+        min_index = -1
+        for index in range(self._num_cells):
+            if values[index]:
+                continue
+            number_of_notes = notes[index].bit_count()
+            if number_of_notes < min_notes:
+                min_notes = number_of_notes
+                min_index = index
+                if number_of_notes == 1:
+                    break
+        return min_index
+
+    def _pop_single(self) -> int:
+        """
+        Takes the queued cells until one is still empty with a single note.
+        return its flat index, -1 if there is none.
+        """
+        singles = self._singles
+        values = self._board.values
+        notes = self._board.notes_masks
+        while singles:
+            index = singles.pop()
+            mask = notes[index]
+            if mask and not mask & (mask - 1) and not values[index]:
+                return index
+        return -1
+
+    @staticmethod
+    def _prepared(board: SudokuBoard, pipeline: PropagationPipeline | None,
+                  timeout: float | None, stats: SolverStats | None = None) -> "Solver | None":
+        """
+        A headless solver on a copy of the board with its notes computed,
+        None if the givens conflict or leave a cell with no notes.
+        """
+        if not board.is_consistent():
+            return None
+        solver = Solver(board.copy(), pipeline=pipeline, stats=stats)
+        solver._deadline = Deadline.of(timeout)
+        if solver._update_notes() == UpdateResult.CELL_WITH_NO_NOTES:
+            solver._stop_timer()
+            return None
+        return solver
+
+    @staticmethod
+    def iter_solutions(board: SudokuBoard, pipeline: PropagationPipeline | None = None,
+                       timeout: float | None = None) -> Iterator[SudokuBoard]:
+        """
+        Lazily yields every solution of the puzzle, one at a time.
+        The search continues from where it found the previous solution, nothing is stored but the current path.
+
+        :param board: The puzzle, it is not modified.
+        :param pipeline: The propagation run at each search node, see Solver.__init__.
+        :param timeout: Time budget in seconds for the whole enumeration, None for no limit.
+        :return: A new board per solution.
+        :raises SolveTimeout: If the timeout passed before the enumeration ended.
+        """
+        solver = Solver._prepared(board, pipeline, timeout)
+        if solver is None:
+            return
+        for _ in solver._search_all():
+            yield solver._board.copy()
+
+    @staticmethod
+    def count_solutions(board: SudokuBoard, limit: int | None = None, pipeline: PropagationPipeline | None = None,
+                        timeout: float | None = None) -> int:
+        """
+        Counts the solutions of the puzzle, stopping as soon as limit solutions were found.
+        count_solutions(board, limit=2) == 1 is a uniqueness check.
+
+        :param board: The puzzle, it is not modified.
+        :param limit: Stop counting at this number of solutions, None counts them all.
+        :param pipeline: The propagation run at each search node, see Solver.__init__.
+        :param timeout: Time budget in seconds, None for no limit.
+        :return: The number of solutions, at most limit.
+        :raises SolveTimeout: If the timeout passed before the count ended.
+        """
+        solver = Solver._prepared(board, pipeline, timeout)
+        if solver is None:
+            return 0
+        return sum(1 for _ in itertools.islice(solver._search_all(), limit))
+
     def _update_notes(self) -> UpdateResult:
         """
         Update notes for all cells in the Sudoku board.
+        The values of each group are collected once, so the cost is the number of cells, not cells times peers.
+        The rules of the constraints of the board then remove the notes they exclude.
         return the number of cells that have no value and where notes were updated.
         """
-        self._debug("Updating notes for all cells.")
         number_of_cells_with_notes: int = 0
-        for row in range(9):
-            for col in range(9):
-                update_note_result = self._update_cell_notes(row, col)
-
-                if update_note_result >= 0: # a cell with notes
-                    if update_note_result == 0:
-                        return UpdateResult.CELL_WITH_NO_NOTES  # invalid abort the process
-                    else:
-                        number_of_cells_with_notes += 1
-
+        self._notes_recomputed = True
+        used_masks = self._board.get_group_used_masks()
+        singles = self._singles
+        singles.clear()
+        for index in range(self._num_cells):
+            update_note_result = self._update_cell_notes(index, used_masks)
+
+            if update_note_result >= 0: # a cell with notes
+                if update_note_result == 0:
+                    if self._trace_level <= _INFO:
+                        self._emit(EventKind.CONTRADICTION, index)
+                    self._contradiction = True
+                    return UpdateResult.CELL_WITH_NO_NOTES  # invalid abort the process
+                else:
+                    number_of_cells_with_notes += 1
+                    if update_note_result == 1:
+                        singles.append(index)
+
+        if self._rules and not self._restrict_notes():
+            return UpdateResult.CELL_WITH_NO_NOTES
+
+        self._contradiction = False
+        self._number_of_empty_cells = number_of_cells_with_notes
         if number_of_cells_with_notes == 0:
             return UpdateResult.ALL_VALUES
         else:
             return UpdateResult.SOME_CELLS_WITH_NOTES
 
-    def _update_cell_notes(self, cell_row, cell_col) -> int :
+    def _restrict_notes(self) -> bool:
+        """
+        Remove the notes excluded by the rules of the constraints from the freshly computed notes, not trailed.
+        return False on contradiction.
+        """
+        board = self._board
+        values = board.values
+        notes = board.notes_masks
+        eliminations: dict[int, int] = {}
+        for rule in self._rules:
+            if not rule.restrict(values, notes, eliminations):
+                self._set_contradiction()
+                return False
+        for index, removed in eliminations.items():
+            mask = notes[index] & ~removed
+            notes[index] = mask
+            if not mask:
+                if self._trace_level <= _INFO:
+                    self._emit(EventKind.CONTRADICTION, index)
+                self._contradiction = True
+                return False
+            if not mask & (mask - 1):
+                self._singles.append(index)
+        return True
+
+    def _apply_rules(self, rules: tuple) -> bool:
+        """
+        Remove, with _eliminate, the notes excluded by the given rules, after a placement in one of their cells.
+        return False on contradiction.
+        """
+        board = self._board
+        values = board.values
+        notes = board.notes_masks
+        eliminations: dict[int, int] = {}
+        for rule in rules:
+            if not rule.restrict(values, notes, eliminations):
+                self._set_contradiction()
+                return False
+        for index, removed in eliminations.items():
+            if not self._eliminate(index, removed):
+                return False
+        return True
+
+    def _update_cell_notes(self, index: int, used_masks: list[int]) -> int :
         """
-        Update the notes for the current cell.
+        Update the notes for the cell at the given flat index.
+        :param used_masks: The values of each group, see SudokuBoard.get_group_used_masks
         return the number of notes in cell
         if less than zero mean it is cell with value
         """
 
-        cell: Cell = self._board.get_cell(cell_row, cell_col)
+        board = self._board
 
-        value = cell.get_value()
-
-        if value is not None:
+        if board.get_value_at(index):
             return -1
 
-        # If the cell is empty, we can set some notes
+        # If the cell is empty, we can set some notes, all values not used by its row, column and box
+        # (and by the groups of the constraints of the board)
 
-        cells_in_areas: list[int] = self._board.get_values_in_3_areas(cell_row, cell_col)
-        number_of_notes: int = 0
-        for x in range(1, 10):
-            # for current row, col , get all cells in row current_row, in col_current_col, and 3x3 board that contains
-            #             # the current cell
-            if x not in cells_in_areas:
-                cell.set_note(x)
-                number_of_notes += 1
-            else:
-                cell.clear_note(x)
+        groups = self._groups_of[index]
+        if len(groups) == 3:
+            row, col, box = groups
+            used = used_masks[row] | used_masks[col] | used_masks[box]
+        else:
+            used = 0
+            for g in groups:
+                used |= used_masks[g]
+        notes_mask: int = self._all_notes_mask & ~used
+        board.set_notes_mask_at(index, notes_mask)
 
+        number_of_notes: int = notes_mask.bit_count()
         return number_of_notes
 
-    def _solve(self) -> Generator[SolveResult, None, None] :
-        self._debug("Actually Solving Sudoku...")
-
-        # This method modify the board, so in case of recursive calls when it was not able to solve the Sudoku,
-        # we need to restore the board to the previous state.
-
-        saved_board = SudokuBoard()
-        # we need to copy values only, because notes are updated on each iteration
-        saved_board.copy_values_from(self._board)
-
-        while True:
+    def _notes_status(self) -> UpdateResult:
+        """
+        The incremental mode replacement of _update_notes.
+        Notes are already up to date, so only report the state maintained by _place.
+        """
+        if self._contradiction:
+            return UpdateResult.CELL_WITH_NO_NOTES
+        elif self._number_of_empty_cells == 0:
+            return UpdateResult.ALL_VALUES
+        else:
+            return UpdateResult.SOME_CELLS_WITH_NOTES
 
-            update_notes_result = self._update_notes()
-            if  update_notes_result == UpdateResult.CELL_WITH_NO_NOTES:
-                self._debug("Found a cell with no notes, aborting.")
-                yield SolveResult.NOT_SOLVED_INVALID
-                return
-            elif update_notes_result == UpdateResult.ALL_VALUES:
-                # if all cells have values, we can assume that the Sudoku is solved
-                self._debug("All cells have notes, Sudoku is solved.")
-                yield SolveResult.SOLVED
-                return
-            else:
-                yield SolveResult.NOT_SOLVED_YET_CONTINUE
-
-            # search for a cell with a singe not, and set the value of this cell to this note
-            if self._replace_single_note_cells():
-                # after replacing a single note cell, we need to update notes for all cells
-                # this will occur in next iteration of the generator
-                yield SolveResult.NOT_SOLVED_YET_CONTINUE
-                continue
+    def _place(self, index: int, value: int, technique: str | None = "single") -> bool:
+        """
+        Set the value of the cell at the given flat index.
+        The placement is traced as a PLACE event, with the technique that deduced the value.
+        In incremental mode, also remove the value from the notes of the peers of the cell, and queue the peers
+        left with a single note. Then the rules that watch the cell, if any, remove the notes they exclude.
+        :param technique: The name of the technique, None for a branch choice, traced as a BRANCH event instead
+        return False if a peer was left with no notes, the placement is a contradiction.
+        """
+        if technique is not None and self._trace_level <= _DEBUG:
+            self._emit(EventKind.PLACE, index, value, technique)
+        board = self._board
+        trail = self._trail
+        trail.record(index)
+        board.set_value_at(index, value)
+
+        if not self._incremental:
+            # notes will be recomputed by _update_notes
+            return True
+
+        self._number_of_empty_cells -= 1
+
+        bit = 1 << (value - 1)
+        notes = board.notes_masks
+        singles = self._singles
+        trace = self._trace_level <= _TRACE
+        eliminations = 0
+        for p in self._peers[index]:
+            mask = notes[p]
+            # cells with value have no notes, so they are skipped here
+            if mask & bit:
+                trail.record(p)
+                mask ^= bit
+                notes[p] = mask
+                eliminations += 1
+                if trace:
+                    self._emit(EventKind.ELIMINATE, p, value)
+                if not mask & (mask - 1):
+                    singles.append(p)
+                if not mask:
+                    if self._trace_level <= _INFO:
+                        self._emit(EventKind.CONTRADICTION, p)
+                    self._contradiction = True
+                    self._stats.eliminations += eliminations
+                    return False
+
+        self._stats.eliminations += eliminations
+        rules = self._rules_of[index]
+        if rules:
+            return self._apply_rules(rules)
+        return True
+
+    def _eliminate(self, index: int, mask: int) -> bool:
+        """
+        Remove the notes in mask from the empty cell at the given flat index, requires the incremental mode.
+        return False if the cell was left with no notes.
+        """
+        notes = self._board.notes_masks
+        old = notes[index]
+        removed = old & mask
+        if not removed:
+            return True
+        self._trail.record(index)
+        mask = old ^ removed
+        notes[index] = mask
+        self._stats.eliminations += removed.bit_count()
+        if self._trace_level <= _TRACE:
+            while removed:
+                bit = removed & -removed
+                removed ^= bit
+                self._emit(EventKind.ELIMINATE, index, bit.bit_length())
+        if not mask & (mask - 1):
+            self._singles.append(index)
+        if not mask:
+            if self._trace_level <= _INFO:
+                self._emit(EventKind.CONTRADICTION, index)
+            self._contradiction = True
+            return False
+        return True
+
+    def _set_contradiction(self):
+        """
+        Mark the board as having no solution, for contradictions found by a technique rather than by an empty cell.
+        """
+        if self._trace_level <= _INFO:
+            self._emit(EventKind.CONTRADICTION)
+        self._contradiction = True
 
-            # try to solve by recursion
-            # now search for a cell with notes and try to replace it with a value
-            self._debug("No single note cell found, trying to replace values.")
-            yield SolveResult.NOT_SOLVED_YET_CONTINUE  # no single note cell found, we stop the solving process
-
-            # search for a cell with no value but with notes
-            # if found a cell with no notes abort the process
-            row_col = self._find_cell_with_minimal_number_of_notes()
-            if row_col is None:
-                self._debug("No cell with notes found, aborting.")
-                # this is an internal error, we should not reach this point, see above
-                yield SolveResult.NOT_SOLVED_INVALID
-                return # stop the solving process, this is an error
-
-            row = row_col[0]
-            col = row_col[1]
-
-            cell: Cell = self._board.get_cell(row, col)
-            # if the cell has a value, we skip it
-            assert cell.get_value() is None
-
-            notes = cell.get_notes()
-            if notes.count(None) == 9:
-                self._debug(f"Found a cell with no notes at ({row}, {col}), aborting.")
-                yield SolveResult.NOT_SOLVED_INVALID
-                return # stop the solving process, this is an error
-
-            # if the cell has notes, we try to replace it with a value
-            # we can replace this cell with a value
-            for note in [ n for n in notes if n is not None ]:
-
-                # set the value of the cell to this note
-                self._debug(f"Found a note cell at ({row}, {col} ) going to put  {note}.")
-                # let the debugger display before replacing the cell
-                yield SolveResult.NOT_SOLVED_YET_CONTINUE
-                cell.set_value(note)
-                self._push_recursive_stack(row, col, note)
-                self._debug(f"Set cell at ({row}, {col}) to {note} and updating notes.")
-                yield SolveResult.NOT_SOLVED_YET_CONTINUE
-
-                for now_solved in self._solve():
-                    if now_solved == SolveResult.SOLVED:
-                        self._debug("Sudoku solved after replacing a note cell.")
-                        yield SolveResult.SOLVED
-                        return # stop the solving process, we solved the Sudoku
-                    elif now_solved == SolveResult.NOT_SOLVED_YET_CONTINUE:
-                        yield SolveResult.NOT_SOLVED_YET_CONTINUE
-                        # and continue next iteration of the inner solver
-                        continue
-
-
-                    assert now_solved == SolveResult.NOT_SOLVED_INVALID
-
-                # not solved, restore the value and continue trying with the next note
-                self._debug(f"*** Was not able to solve with {note} in cell at ({row}, {col} ), restoring")
-                yield SolveResult.NOT_SOLVED_YET_CONTINUE # just let debugger display before restoring the cell
-                cell.set_value(None)
-                self._pop_recursive_stack()
-                self._update_notes() # continue with next note
-
-
-
-            # if we reached this point, it means that we didn't find a solution
-            self._debug("No solution found, restoring the board to the previous state.")
-            yield SolveResult.NOT_SOLVED_INVALID
-            self._board.copy_values_from(saved_board)
+    def _undo(self, mark: int, number_of_empty_cells: int):
+        """
+        Roll back all board changes made since the given trail mark.
+        :param mark: A value returned by Trail.mark()
+        :param number_of_empty_cells: The number of empty cells when the mark was taken
+        """
+        self._trail.undo_to(mark)
+        # the marks are taken when no cell has a single note, the queued cells are all stale
+        self._singles.clear()
+        if self._incremental:
+            # notes were restored by the trail, and they were consistent when the mark was taken
+            self._number_of_empty_cells = number_of_empty_cells
+            self._contradiction = False
+        else:
             self._update_notes()
-            self._debug("No solution found, state restored")
-            yield SolveResult.NOT_SOLVED_INVALID
-            # exit the generator
-            return
 
     def _replace_single_note_cells(self) -> bool:
         """
         Replace cells with a single note with that note.
+        The cells come from the queue filled by _update_notes and _place, the board is not scanned.
         Return true when found one and replaced it, false otherwise.
         """
-        for row in range(9):
-            for col in range(9):
-                cell: Cell = self._board.get_cell(row, col)
-                # if the cell has a value, we skip it
-                if cell.get_value() is not None:
-                    continue
-                notes = cell.get_notes()
-                if notes.count(None) == 8:
-
-                    # this means that the cell has only one note
-                    for note in range(1, 10):
-                        if notes[note - 1] is not None:
-                            # set the value of the cell to this note
-                            cell.set_value(note)
-                            self._debug(f"Found a single note cell at ({row}, {col}) with note {note} and set it as value.")
-                            # update notes for all cells
-                            return True
-        return False
-
-    def _find_cell_with_minimal_number_of_notes(self) -> tuple[int, int] | None:
+        index = self._pop_single()
+        if index < 0:
+            return False
+        # this means that the cell has only one note, set the value of the cell to this note
+        note = self._board.get_notes_mask_at(index).bit_length()
+        placements = self._stats.placements
+        placements["single"] = placements.get("single", 0) + 1
+        self._place(index, note)
+        return True
+
+    def _find_cell_with_minimal_number_of_notes(self) -> int | None:
         """
         Find a cell with the minimal number of notes.
-        Return the row and column of the cell.
-        If no such cell found, return (-1, -1).
-        """
-        min_notes = 10
-        min_row = 10000
-        min_col = 10000
-        found = False
-        for row in range(9):
-            for col in range(9):
-                cell: Cell = self._board.get_cell(row, col)
-                if cell.get_value() is not None:
-                    # skip cells with value
-                    continue
+        Return the flat index of the cell.
+        If no such cell found, return None.
+        """
+        board = self._board
+        min_notes = self._size + 1
+        min_index = -1
+        for index in range(self._num_cells):
+            if board.get_value_at(index):
+                # skip cells with value
+                continue
+
+            number_of_notes = board.get_notes_mask_at(index).bit_count()
+            if number_of_notes < min_notes:
+                min_notes = number_of_notes
+                min_index = index
+                if min_notes == 0:
+                    # we can stop searching, we found a cell with 0 notes, which is an error
+                    return min_index
 
-                notes = cell.get_notes()
-                # count number of non None notes
-                number_of_notes = sum(1 for x in notes if x is not None)
-                if number_of_notes < min_notes:
-                    min_notes = number_of_notes
-                    min_row = row
-                    min_col = col
-                    found = True
-                    if min_notes == 0:
-                        # we can stop searching, we found a cell with 0 notes, which is an error
-                        return min_row, min_col
-
-        if found:
-            return min_row, min_col
+        if min_index >= 0:
+            return min_index
         else:
             return None
-
-
-
-
@@ -0,0 +1,116 @@
+import time
+from typing import Callable
+
+# the timed phases of a Solver search, see SolverStats
+PHASES: tuple[str, ...] = ("note_updates", "single_replacement", "branch_selection", "restore", "other")
+
+
+class SolverStats:
+    """
+    Search counters, opt-in: a solve only fills the stats it is given.
+
+    An engine adds to the counters of the stats it is given, so one SolverStats can sum up a whole batch.
+    max_depth is the deepest nesting of search choices of any of the solves.
+    - nodes: search nodes visited, the root and one per tried choice.
+    - backtracks: choices that were tried and undone.
+    - passes: technique pipeline passes that changed the board.
+    - placements: values placed, by technique name, "single" for single note cells found by the search,
+      "branch" for the tried notes.
+    - eliminations: notes removed, by placements in their peers and by techniques.
+    - technique_eliminations: cells whose notes a technique reduced, by technique name.
+    - phase_seconds: time of each of PHASES, only measured by the Solver engines. single_replacement includes the
+      technique passes. The phases do not overlap: the note updates made by a single replacement count as note
+      updates.
+    """
+    __slots__ = ("nodes", "backtracks", "max_depth", "solves", "passes", "placements", "eliminations",
+                 "technique_eliminations", "phase_seconds")
+
+    def __init__(self):
+        self.nodes: int = 0
+        self.backtracks: int = 0
+        self.max_depth: int = 0
+        self.solves: int = 0  # number of solves added to these stats
+        self.passes: int = 0
+        self.placements: dict[str, int] = {}
+        self.eliminations: int = 0
+        self.technique_eliminations: dict[str, int] = {}
+        self.phase_seconds: dict[str, float] = {}
+
+    def add(self, other: "SolverStats"):
+        """
+        Adds the counters of other to these stats.
+        :param other:
+        :return:
+        """
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.solves += other.solves
+        self.passes += other.passes
+        _add_counts(self.placements, other.placements)
+        self.eliminations += other.eliminations
+        _add_counts(self.technique_eliminations, other.technique_eliminations)
+        _add_counts(self.phase_seconds, other.phase_seconds)
+
+    def to_dict(self) -> dict:
+        return {"nodes": self.nodes, "backtracks": self.backtracks, "max_depth": self.max_depth,
+                "solves": self.solves, "passes": self.passes, "placements": dict(self.placements),
+                "eliminations": self.eliminations, "technique_eliminations": dict(self.technique_eliminations),
+                "phase_ms": {phase: round(seconds * 1000, 3) for phase, seconds in self.phase_seconds.items()}}
+
+    def __str__(self):
+        return f"{self.nodes} nodes, {self.backtracks} backtracks, max depth {self.max_depth}"
+
+
+def _add_counts(target: dict, source: dict):
+    for key, count in source.items():
+        target[key] = target.get(key, 0) + count
+
+
+class PhaseTimer:
+    """
+    Charges the elapsed time to the phase on top of a stack, so nested phases are not counted twice.
+    Time outside any wrapped call goes to "other".
+    """
+    __slots__ = ("_seconds", "_stack", "_last")
+
+    def __init__(self, seconds: dict[str, float]):
+        """
+        :param seconds: phase -> seconds, updated in place
+        """
+        self._seconds: dict[str, float] = seconds
+        self._stack: list[str] = ["other"]
+        self._last: float = time.perf_counter()
+
+    def _switch(self):
+        now = time.perf_counter()
+        phase = self._stack[-1]
+        self._seconds[phase] = self._seconds.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def wrap(self, phase: str, function: Callable) -> Callable:
+        """
+        Returns function timed as the given phase.
+        :param phase:
+        :param function:
+        :return:
+        """
+        stack = self._stack
+
+        def timed(*args):
+            self._switch()
+            stack.append(phase)
+            try:
+                return function(*args)
+            finally:
+                self._switch()
+                stack.pop()
+
+        return timed
+
+    def stop(self):
+        """
+        Charges the time since the last switch, call once at the end of the solve.
+        :return:
+        """
+        self._switch()
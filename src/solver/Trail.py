@@ -0,0 +1,89 @@
+from data import SudokuBoard
+
+
+class Trail:
+    """
+    An undo log of the changes made to a board.
+
+    Before a cell is changed, record() saves its value and notes mask.
+    A choice point is just the current length of the log (mark()), undo_to(mark) rolls back exactly the cells
+    changed since then, in reverse order.
+    The cost of a rollback is the number of changes made by the branch, not the size of the board.
+
+    The log also tells which cells changed since some point, for views that redraw only those (see track_changes).
+    """
+
+    __slots__ = ("_board", "_entries", "_changed", "_low")
+
+    def __init__(self, board: SudokuBoard):
+        self._board: SudokuBoard = board
+        # (flat index, old value, old notes mask)
+        self._entries: list[tuple[int, int, int]] = []
+        # when tracking: the cells restored by undo_to since the last take_changed, None when not tracking
+        self._changed: set[int] | None = None
+        # when tracking: the entries below it were in the log at the last take_changed
+        self._low: int = 0
+
+    def mark(self) -> int:
+        """
+        Returns a choice point that can be passed later to undo_to.
+        :return:
+        """
+        return len(self._entries)
+
+    def record(self, index: int):
+        """
+        Saves the current state of the cell at the given flat index, must be called before the cell is changed.
+        :param index:
+        :return:
+        """
+        self._entries.append((index, self._board.values[index], self._board.notes_masks[index]))
+
+    def undo_to(self, mark: int):
+        """
+        Restores all cells changed since the given choice point.
+        :param mark: A value returned by mark()
+        :return:
+        """
+        entries = self._entries
+        values = self._board.values
+        notes = self._board.notes_masks
+        if self._changed is not None:
+            self._changed.update(entry[0] for entry in entries[mark:])
+            self._low = min(self._low, mark)
+        while len(entries) > mark:
+            index, value, mask = entries.pop()
+            values[index] = value
+            notes[index] = mask
+
+    def clear(self):
+        """
+        Forgets all recorded changes, the current board state becomes the base state.
+        :return:
+        """
+        self._entries.clear()
+        self._low = 0
+
+    def track_changes(self):
+        """
+        Starts collecting the cells changed by record and undo_to, see take_changed.
+        Tracking costs nothing per record, only undo_to does a little more work.
+        :return:
+        """
+        self._changed = set()
+        self._low = len(self._entries)
+
+    def take_changed(self) -> set[int]:
+        """
+        Returns the flat indexes of the cells recorded or restored since the last call, or since track_changes.
+        :return:
+        """
+        changed = self._changed if self._changed is not None else set()
+        entries = self._entries
+        changed.update(entries[i][0] for i in range(self._low, len(entries)))
+        self._changed = set()
+        self._low = len(entries)
+        return changed
+
+    def __len__(self) -> int:
+        return len(self._entries)
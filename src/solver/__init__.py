@@ -1 +1,8 @@
-from .Solver import Solver
\ No newline at end of file
+from .Solver import Solver, StepGranularity
+from .Engine import SolverEngine, get_engine, engine_names, register_engine
+from .DlxSolver import DlxSolver
+from .Propagation import PropagationPipeline
+from .NumpySolver import NumpySolver
+from .Rating import Grade, Rating, Rater, rate
+from .Stats import SolverStats
+from .Cache import CachedEngine, SolutionCache
@@ -0,0 +1,55 @@
+import json
+
+import Samples
+from batch.BatchSolver import PuzzleStatus, solve_records
+from batch.PuzzleReader import read_puzzles
+from data import SudokuBoard
+from main import main
+from solver.Engine import get_engine
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+# consistent, but the last cell of the first row can only be 9 and its column has one
+NO_SOLUTION = "12345678." + "........9" + "." * 63
+# the first puzzle of the pathological-v1 benchmark corpus, it takes thousands of nodes to backtrack
+PATHOLOGICAL = "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9"
+
+
+def test_read_puzzles_accepts_lines_and_grids():
+    lines = ["# a comment", EASY, "", *Samples.MEDIUM_1.splitlines(), "1 2 3", "4 5"]
+    records = list(read_puzzles(lines))
+    assert [r.number for r in records] == [0, 1, 2]
+    assert records[0].text == EASY and records[0].board.to_line() == EASY
+    assert records[1].text == SudokuBoard.from_string(Samples.MEDIUM_1).to_line()
+    # the input ended in the middle of a grid
+    assert records[2].board is None and "after 5 values" in records[2].error
+
+
+def test_solve_records_gives_a_status_per_puzzle():
+    lines = [EASY, "55" + "." * 79, NO_SOLUTION, "1 2 3"]
+    results = list(solve_records(read_puzzles(lines), get_engine("dlx"), with_stats=True))
+    assert [r.status for r in results] == [PuzzleStatus.SOLVED, PuzzleStatus.INVALID, PuzzleStatus.INVALID,
+                                           PuzzleStatus.INVALID]
+    assert results[0].solution == get_engine("dlx").solve(SudokuBoard.from_line(EASY)).to_line()
+    assert results[2].message == "No solution." and results[3].message.startswith("Invalid board")
+    assert results[0].stats is not None and json.loads(results[0].to_json())["stats"]["nodes"] >= 1
+    assert results[1].to_text().split("\t")[:3] == ["1", "invalid", "55" + "." * 79]
+
+
+def test_solve_records_times_out():
+    results = list(solve_records(read_puzzles([PATHOLOGICAL]), get_engine("backtracking"), timeout=1e-6))
+    assert results[0].status == PuzzleStatus.TIMEOUT and results[0].solution is None
+
+
+def test_batch_command(tmp_path, capsys):
+    source = tmp_path / "puzzles.txt"
+    source.write_text("\n".join([EASY, NO_SOLUTION, EASY]) + "\n", encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    assert main(["batch", str(source), "-o", str(output), "-f", "jsonl"]) == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["status"] for r in records] == ["solved", "invalid", "solved"]
+    assert records[0]["solution"] == records[2]["solution"]
+    assert "3 puzzles in" in capsys.readouterr().err
+
+    source.write_text(EASY + "\n", encoding="utf-8")
+    assert main(["batch", str(source), "-o", str(output), "-q"]) == 0
+    assert capsys.readouterr().err == ""
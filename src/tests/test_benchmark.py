@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from benchmark.Benchmark import BenchmarkResult, compare, load_baseline, percentile, run_benchmark, save_baseline
+from benchmark.Corpora import TIERS, corpus_name, corpus_versions, load_corpus
+from main import main
+from solver.Engine import get_engine
+
+
+def test_bundled_corpora():
+    assert {tier: corpus_versions(tier) for tier in TIERS} == {"easy": [1], "hard": [1], "pathological": [1]}
+    assert corpus_name("hard") == "hard-v1"
+    assert [len(load_corpus(name)) for name in ("easy-v1", "hard", "pathological-v1")] == [200, 100, 30]
+    with pytest.raises(ValueError):
+        corpus_name("medium")
+    with pytest.raises(ValueError):
+        corpus_name("hard", 2)
+
+
+def test_percentile_is_the_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0 and percentile(values, 0.99) == 99.0 and percentile(values, 1.0) == 100.0
+    assert percentile([3.0], 0.99) == 3.0 and percentile([], 0.5) == 0.0
+
+
+def test_run_benchmark_counts_and_times_the_corpus():
+    boards = load_corpus("hard-v1")[:5]
+    result = run_benchmark(get_engine("backtracking"), "hard-v1", boards, repeat=2)
+    assert (result.key, result.puzzles, result.solved, result.timeouts) == ("backtracking/hard-v1", 5, 5, 0)
+    assert result.nodes >= 5 and result.backtracks > 0
+    assert 0 < result.p50_ms <= result.p99_ms and result.puzzles_per_second > 0
+    # the counters do not depend on the timings, a second run finds the same
+    again = run_benchmark(get_engine("backtracking"), "hard-v1", boards, repeat=1)
+    assert (again.nodes, again.backtracks) == (result.nodes, result.backtracks)
+
+
+def test_compare_flags_regressions_only(tmp_path):
+    base = BenchmarkResult("dlx", "hard-v1", 100, 100, 0, 1000.0, 1.0, 2.0, 500, 400, 10_000)
+    path = str(tmp_path / "baseline.json")
+    save_baseline([base], path)
+    loaded = load_baseline(path)["dlx/hard-v1"]
+    assert loaded.to_dict() == base.to_dict()
+    assert compare(loaded, base) == []
+
+    slower = BenchmarkResult("dlx", "hard-v1", 100, 99, 0, 800.0, 1.1, 2.0, 501, 400, 10_500)
+    regressions = compare(slower, base)
+    assert [message.split(" ")[1] for message in regressions] == ["solved", "puzzles/s", "nodes"]
+
+    (tmp_path / "other.json").write_text(json.dumps({"format": 0, "results": {}}))
+    with pytest.raises(ValueError):
+        load_baseline(str(tmp_path / "other.json"))
+
+
+def test_bench_command_compares_with_its_own_baseline(tmp_path, capsys):
+    path = str(tmp_path / "baseline.json")
+    args = ["bench", "-e", "dlx", "-c", "easy-v1", "-r", "1", "-f", "jsonl"]
+    assert main(args + ["--save", path]) == 0
+    line = json.loads(capsys.readouterr().out.splitlines()[0])
+    assert line["engine"] == "dlx" and line["corpus"] == "easy-v1" and line["solved"] == 200
+    # the timings are not comparable between two short runs, the counters are
+    assert main(args + ["--baseline", path, "--time-tolerance", "100", "--memory-tolerance", "100"]) == 0
+    assert "no regression against the baseline" in capsys.readouterr().err
@@ -0,0 +1,64 @@
+import copy
+
+import pytest
+
+import Samples
+from data import SudokuBoard
+from data.Units import DEFAULT_GEOMETRY, get_geometry
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+
+
+def test_index_tables():
+    geometry = DEFAULT_GEOMETRY
+    assert len(geometry.units) == 27 and all(len(unit) == 9 for unit in geometry.units)
+    assert all(len(peers) == 20 for peers in geometry.peers)
+    # cell (4, 4) is in row 4, column 4 and the middle box
+    assert [geometry.units[u] for u in geometry.units_of[40]] == [
+        tuple(range(36, 45)), tuple(range(4, 81, 9)), (30, 31, 32, 39, 40, 41, 48, 49, 50)]
+    assert get_geometry(3) is geometry
+
+
+def test_cells_are_views_of_the_flat_buffers():
+    board = SudokuBoard()
+    board.set_cell_value(1, 2, 7)
+    assert board.values[11] == 7 and board.get_value_at(11) == 7
+    cell = board.get_cell(2, 3)
+    cell.set_notes(1, 2)
+    assert board.get_notes_mask_at(21) == 0b11
+    board.set_value_at(21, 4)
+    assert cell.get_value() == 4 and cell.get_notes_mask() == 0
+    assert board.get_cell_value(2, 3) == 4
+
+
+def test_used_masks():
+    board = SudokuBoard.from_line(EASY)
+    index = EASY.index(".")
+    expected = 0
+    for peer in DEFAULT_GEOMETRY.peers[index]:
+        if board.values[peer]:
+            expected |= 1 << (board.values[peer] - 1)
+    assert board.get_used_mask_at(index) == expected
+    masks = board.get_group_used_masks()
+    row, col, box = DEFAULT_GEOMETRY.units_of[index]
+    assert masks[row] | masks[col] | masks[box] == expected
+
+
+def test_line_round_trip_and_copies():
+    board = SudokuBoard.from_line(EASY)
+    assert board.to_line() == EASY
+    assert SudokuBoard.from_string(Samples.EASY_1).to_line() == EASY
+    for other in (board.copy(), copy.deepcopy(board)):
+        other.set_value_at(EASY.index("."), 1)
+        assert board.to_line() == EASY
+
+
+def test_consistency_and_range_checks():
+    board = SudokuBoard.from_line(EASY)
+    assert board.is_consistent()
+    row_repeat = SudokuBoard.from_line("55" + "." * 79)
+    assert not row_repeat.is_consistent()
+    with pytest.raises(ValueError):
+        board.set_value_at(0, 10)
+    with pytest.raises(ValueError):
+        board.set_notes_mask_at(0, 1 << 9)
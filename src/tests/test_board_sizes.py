@@ -0,0 +1,74 @@
+import io
+import random
+
+import pytest
+
+from batch.BulkParser import read_puzzles_bulk
+from batch.PuzzleReader import read_puzzles
+from data import SudokuBoard
+from data.Units import get_geometry
+from main import main
+from solver.Engine import engine_names, get_engine
+
+
+def _puzzle(box_size: int, empty: float, seed: int) -> SudokuBoard:
+    """
+    A puzzle made from a solution of the empty board, with the given part of its cells emptied.
+    """
+    puzzle = get_engine("dlx").solve(SudokuBoard(box_size))
+    rng = random.Random(seed)
+    for index in rng.sample(range(len(puzzle.values)), int(empty * len(puzzle.values))):
+        puzzle.values[index] = 0
+    return puzzle
+
+
+@pytest.mark.parametrize("box_size", [2, 3, 4, 5])
+def test_unit_tables_of_each_size(box_size: int):
+    geometry = get_geometry(box_size)
+    size = box_size * box_size
+    assert (geometry.size, geometry.num_cells, len(geometry.units)) == (size, size * size, 3 * size)
+    assert all(len(unit) == size for unit in geometry.units)
+    assert all(len(peers) == 3 * (size - 1) - 2 * (box_size - 1) for peers in geometry.peers)
+    assert geometry.all_notes_mask == (1 << size) - 1
+    assert get_geometry(box_size) is geometry
+
+
+def test_box_sizes_out_of_range():
+    for box_size in (1, 6):
+        with pytest.raises(ValueError):
+            SudokuBoard(box_size)
+
+
+def test_larger_boards_use_letters():
+    puzzle = _puzzle(4, 0.5, 1)
+    line = puzzle.to_line()
+    assert set(line) - set(".123456789") <= set("ABCDEFG") and "G" in line
+    assert SudokuBoard.from_line(line).to_line() == line
+    assert SudokuBoard.from_line(line.lower()).to_line() == line
+    with pytest.raises(ValueError):
+        SudokuBoard.from_line("H" + line[1:])
+    with pytest.raises(ValueError):
+        puzzle.set_value_at(0, 17)
+
+
+@pytest.mark.parametrize("engine_name", engine_names())
+@pytest.mark.parametrize("box_size, empty", [(2, 0.7), (4, 0.5), (5, 0.3)])
+def test_every_engine_solves_every_size(engine_name: str, box_size: int, empty: float):
+    puzzle = _puzzle(box_size, empty, box_size)
+    solution = get_engine(engine_name).solve(puzzle, timeout=30)
+    assert solution.geometry is puzzle.geometry
+    assert solution.is_consistent() and 0 not in solution.values
+    assert all(not v or v == s for v, s in zip(puzzle.values, solution.values))
+
+
+def test_readers_and_batch_command_take_the_box_size(tmp_path):
+    lines = [_puzzle(4, 0.5, seed).to_line() for seed in range(3)]
+    for records in (read_puzzles(lines, box_size=4), read_puzzles_bulk(io.StringIO("\n".join(lines)), box_size=4)):
+        assert [r.board.to_line() for r in records] == lines
+    source = tmp_path / "puzzles.txt"
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    output = tmp_path / "solutions.txt"
+    # the worker processes take 9x9 boards, other sizes are solved in this process
+    assert main(["batch", str(source), "-o", str(output), "-b", "4", "-j", "2", "-q"]) == 0
+    results = [line.split("\t") for line in output.read_text().splitlines()]
+    assert [r[1] for r in results] == ["solved"] * 3 and all(len(r[2]) == 256 for r in results)
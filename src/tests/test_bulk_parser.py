@@ -0,0 +1,135 @@
+import io
+import random
+
+import pytest
+
+import Samples
+from batch.BulkParser import BulkParser, find_conflict, find_conflicts, parse_puzzles, read_puzzles_bulk
+from batch.PuzzleReader import read_puzzles
+from data import SudokuBoard
+from data.Units import get_geometry
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+EVIL = SudokuBoard.from_string(Samples.EVIL_1).to_line()
+
+
+def _rows(line: str) -> list[str]:
+    return [line[r * 9:r * 9 + 9] for r in range(9)]
+
+
+def _sdk_grid(line: str, separator: str, spaced: bool) -> str:
+    lines = []
+    for r, row in enumerate(_rows(line)):
+        if r and r % 3 == 0:
+            lines.append(separator)
+        boxes = [row[0:3], row[3:6], row[6:9]]
+        lines.append(" | ".join(" ".join(box) for box in boxes) if spaced else "|".join(boxes))
+    return "\n".join(lines) + "\n"
+
+
+def _lines(parsed) -> list[str]:
+    return [bytes(parsed.puzzle(i)).hex() for i in range(len(parsed))]
+
+
+def _hex(line: str) -> str:
+    return bytes(SudokuBoard.from_line(line).values).hex()
+
+
+def test_line_format_and_empty_cell_characters():
+    text = f"{EASY}\n{EASY.replace('.', '0')}\n{EASY.replace('.', '-')}\n{EASY.replace('.', '_')}\n"
+    parsed = parse_puzzles(text)
+    assert parsed.errors == []
+    assert _lines(parsed) == [_hex(EASY)] * 4
+    assert parsed.numbers == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("separator, spaced", [("---+---+---", False),
+                                               ("------+-------+------", True),
+                                               ("-----------", False)])
+def test_sdk_grid_separators(separator, spaced):
+    text = _sdk_grid(EASY, separator, spaced) + "\n" + _sdk_grid(EVIL, separator, spaced)
+    parsed = parse_puzzles(text)
+    assert parsed.errors == []
+    assert _lines(parsed) == [_hex(EASY), _hex(EVIL)]
+
+
+def test_row_of_empty_cells_is_not_a_separator():
+    line = "." * 9 + EASY[9:]
+    grid = _sdk_grid(line, "---+---+---", False).replace("...|...|...", "---|---|---", 1)
+    parsed = parse_puzzles(grid)
+    assert parsed.errors == []
+    assert _lines(parsed) == [_hex(line)]
+
+
+def test_samples_grids_comments_and_headers():
+    text = "# a comment\n[Puzzle]\n" + Samples.EASY_1 + "\n" + Samples.EVIL_1
+    parsed = parse_puzzles(text)
+    assert parsed.errors == []
+    assert _lines(parsed) == [_hex(EASY), _hex(EVIL)]
+
+
+def test_csv_with_header():
+    text = f"puzzle,solution\n{EASY},whatever\n\"{EVIL}\",x\n"
+    parsed = parse_puzzles(text)
+    assert parsed.errors == []
+    assert _lines(parsed) == [_hex(EASY), _hex(EVIL)]
+
+
+def test_errors_keep_their_input_number():
+    conflict = "55" + "." * 79
+    text = f"{EASY}\n{EASY[:80]}z\n{conflict}\n{EVIL}\n1 2 3\n"
+    parsed = parse_puzzles(text)
+    assert parsed.numbers == [0, 3]
+    assert [(number, message.split(":")[0]) for number, _, message in parsed.errors] == \
+        [(1, "Invalid board"), (2, "Invalid board"), (4, "Invalid board")]
+    assert "input ended after 3 values" in parsed.errors[-1][2]
+
+
+@pytest.mark.parametrize("bad", ["\u2460", "\uff11", "\u00e9"])
+def test_characters_outside_the_cells_are_errors(bad: str):
+    # a circled or full-width digit must not be read as '?', an empty cell
+    line = EASY[:40] + bad + EASY[41:]
+    parsed = parse_puzzles(f"{line}\n{EVIL}\n")
+    assert parsed.numbers == [1]
+    [(number, _, message)] = parsed.errors
+    assert number == 0 and message.startswith("Invalid board: unexpected character")
+
+
+def test_conflicts_of_a_buffer_keep_their_order_and_text():
+    conflicts = ["55" + "." * 79, "5" + "." * 8 + "5" + "." * 71, "5" + "." * 9 + "5" + "." * 70]
+    text = "".join(f"{line}\n" for line in (EASY, conflicts[0], EVIL, conflicts[1], conflicts[2], EASY))
+    parsed = parse_puzzles(text)
+    assert parsed.numbers == [0, 2, 5]
+    assert _lines(parsed) == [_hex(EASY), _hex(EVIL), _hex(EASY)]
+    assert [(number, raw) for number, raw, _ in parsed.errors] == [(1, conflicts[0]), (3, conflicts[1]),
+                                                                  (4, conflicts[2])]
+    assert [message for _, _, message in parsed.errors] == [
+        "Invalid board: 5 repeated at row 1, column 2.", "Invalid board: 5 repeated at row 2, column 1.",
+        "Invalid board: 5 repeated at row 2, column 2."]
+
+
+@pytest.mark.parametrize("box_size", [2, 3, 4])
+def test_find_conflicts_matches_find_conflict(box_size: int):
+    rng = random.Random(box_size)
+    geometry = get_geometry(box_size)
+    boards = [bytes(rng.randint(1, geometry.size) if rng.random() < 0.15 else 0 for _ in range(geometry.num_cells))
+              for _ in range(300)]
+    expected = [i for i, board in enumerate(boards) if find_conflict(board, geometry) >= 0]
+    assert 0 < len(expected) < len(boards)
+    assert find_conflicts(b"".join(boards), geometry) == expected
+    assert find_conflicts(b"", geometry) == []
+
+
+def test_conflicts_are_left_to_the_engines_when_not_checked():
+    conflict = "55" + "." * 79
+    parsed = BulkParser(check_conflicts=False).feed(conflict + "\n")
+    assert parsed.errors == [] and len(parsed) == 1
+
+
+@pytest.mark.parametrize("buffer_size", [7, 81, 1 << 20])
+def test_bulk_reader_matches_line_reader(buffer_size):
+    text = "".join(f"{line}\n" for line in (EASY, EVIL) * 20) + Samples.MEDIUM_1
+    old = [(r.number, r.text) for r in read_puzzles(io.StringIO(text))]
+    bulk = [(r.number, r.text) for r in read_puzzles_bulk(io.StringIO(text), buffer_size)]
+    assert bulk == old
+    assert len(bulk) == 41
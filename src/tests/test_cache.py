@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+import Samples
+from data import SudokuBoard
+from data.Symmetry import canonical_form, random_transform
+from solver.Cache import CachedEngine, SolutionCache
+from solver.Engine import get_engine
+from solver.Stats import SolverStats
+
+SAMPLES = [SudokuBoard.from_string(getattr(Samples, name)) for name in ("EASY_1", "MEDIUM_1", "EXPERT_1", "EVIL_1")]
+
+
+def test_transforms_keep_valid_grids_valid():
+    rng = random.Random(1)
+    solution = get_engine("dlx").solve(SAMPLES[0])
+    for _ in range(10):
+        transform = random_transform(rng)
+        image = SudokuBoard()
+        image.values[:] = transform.apply(solution.values)
+        assert image.is_consistent() and 0 not in image.values
+        assert transform.invert(image.values) == solution.values
+
+
+def test_equivalent_puzzles_have_the_same_canonical_form():
+    rng = random.Random(2)
+    for board in SAMPLES:
+        key, transform = canonical_form(board.values)
+        assert bytes(transform.apply(board.values)) == key
+        for _ in range(10):
+            assert canonical_form(random_transform(rng).apply(board.values))[0] == key
+    assert len({canonical_form(board.values)[0] for board in SAMPLES}) == len(SAMPLES)
+
+
+def test_transformed_copies_are_cache_hits():
+    rng = random.Random(3)
+    engine = CachedEngine(get_engine("dlx"))
+    puzzle = SAMPLES[0]
+    engine.solve(puzzle)
+    for _ in range(5):
+        copy = SudokuBoard()
+        copy.values[:] = random_transform(rng).apply(puzzle.values)
+        stats = SolverStats()
+        # the cached solution is mapped back to the orientation of the copy
+        assert engine.solve(copy, stats=stats).to_line() == get_engine("dlx").solve(copy).to_line()
+        assert stats.nodes == 0
+    assert (engine.cache.misses, engine.cache.hits) == (1, 5)
+
+
+def test_puzzles_with_no_solution_are_cached():
+    engine = CachedEngine(get_engine("dlx"))
+    puzzle = SudokuBoard.from_line("12345678." + "........9" + "." * 63)
+    assert engine.solve(puzzle) is None and engine.solve(puzzle) is None
+    assert engine.cache.hits == 1 and len(engine.cache) == 1
+
+
+def test_the_least_recently_used_entry_is_evicted():
+    cache = SolutionCache(2)
+    cache.put(b"a", b"1")
+    cache.put(b"b", None)
+    assert cache.get(b"a") == (True, b"1")
+    cache.put(b"c", b"3")
+    assert cache.get(b"b") == (False, None)
+    assert cache.get(b"c") == (True, b"3") and cache.get(b"a") == (True, b"1")
+    assert cache.to_dict() == {"size": 2, "capacity": 2, "hits": 3, "misses": 1, "evictions": 1}
+    cache.clear()
+    assert len(cache) == 0 and cache.hits == 3
+    with pytest.raises(ValueError):
+        SolutionCache(0)
+
+
+def test_other_sizes_are_not_cached():
+    engine = CachedEngine(get_engine("dlx"))
+    solution = engine.solve(SudokuBoard(2))
+    assert solution.is_consistent() and 0 not in solution.values
+    assert len(engine.cache) == 0 and engine.cache.misses == 0
@@ -0,0 +1,60 @@
+import pytest
+
+from data.Cell import ALL_NOTES_MASK, Cell
+
+
+def test_notes_are_a_mask():
+    cell = Cell(5)
+    cell.set_notes(1, 4, 9)
+    assert cell.get_value() is None
+    assert cell.get_notes_mask() == 0b100001001
+    assert cell.get_notes() == [1, None, None, 4, None, None, None, None, 9]
+    assert list(cell.iter_notes()) == [1, 4, 9]
+    assert cell.count_notes() == 3 and cell.has_note(4) and not cell.has_note(5)
+    assert cell.get_single_note() is None
+    cell.clear_note(1)
+    cell.clear_note(9)
+    assert cell.get_single_note() == 4
+
+
+def test_note_grid_is_a_view_of_the_mask():
+    cell = Cell()
+    cell.set_note_by_loc(1, 2)
+    assert cell.get_notes_mask() == 1 << 5
+    assert cell.get_note(1, 2) == 6 and cell.get_note(0, 0) is None
+    cell.clear_note_by_loc(1, 2)
+    assert cell.get_notes_mask() == 0
+    with pytest.raises(IndexError):
+        cell.get_note(3, 0)
+
+
+def test_value_clears_the_notes():
+    cell = Cell()
+    cell.set_notes_mask(ALL_NOTES_MASK)
+    assert cell.count_notes() == 9
+    cell.set_value(3)
+    assert cell.get_value() == 3 and cell.get_notes_mask() == 0
+
+
+def test_range_checks():
+    cell = Cell()
+    for bad in (0, 10):
+        with pytest.raises(ValueError):
+            cell.set_value(bad)
+        with pytest.raises(ValueError):
+            cell.set_note(bad)
+    with pytest.raises(ValueError):
+        cell.set_notes_mask(1 << 9)
+    with pytest.raises(AttributeError):
+        cell.other = 1
+
+
+def test_cells_of_larger_boards():
+    cell = Cell(box_size=4)
+    assert cell.size == 16
+    cell.set_note(16)
+    cell.set_note_by_loc(3, 2)
+    assert list(cell.iter_notes()) == [15, 16]
+    cell.set_value(16)
+    with pytest.raises(ValueError):
+        cell.set_value(17)
@@ -0,0 +1,44 @@
+import pytest
+
+from data import SudokuBoard
+from data.Constraints import KillerCage, constraint_names, get_constraint
+from solver.Engine import engine_names, get_engine
+
+
+def _assert_valid_solution(puzzle: SudokuBoard, solution: SudokuBoard):
+    geometry = puzzle.geometry
+    values = solution.values
+    assert solution.geometry is geometry
+    assert all(not v or v == s for v, s in zip(puzzle.values, values))
+    assert all(1 <= v <= geometry.size for v in values)
+    for group in geometry.groups:
+        digits = [values[i] for i in group]
+        assert len(set(digits)) == len(digits), group
+    assert all(rule.feasible(values, geometry.size) for rule in geometry.rules)
+
+
+@pytest.mark.parametrize("engine_name", engine_names())
+@pytest.mark.parametrize("constraint_name", constraint_names())
+def test_every_engine_solves_every_constraint(constraint_name: str, engine_name: str):
+    engine = get_engine(engine_name)
+    puzzle = SudokuBoard(3, [get_constraint(constraint_name)])
+    solution = engine.solve(puzzle, timeout=30)
+    assert solution is not None
+    _assert_valid_solution(puzzle, solution)
+    # the first row of the solution as givens, the rest of the board is still open
+    puzzle.values[:9] = solution.values[:9]
+    solution = engine.solve(puzzle, timeout=30)
+    assert solution is not None
+    _assert_valid_solution(puzzle, solution)
+    assert engine.count_solutions(puzzle, limit=2, timeout=30) == 2
+
+
+@pytest.mark.parametrize("engine_name", engine_names())
+def test_every_engine_keeps_killer_cage_sums(engine_name: str):
+    # the cages of the first row: 1+2+3, 4+5+6 and 7+8+9
+    cages = [KillerCage((0, 1, 2), 6), KillerCage((3, 4, 5), 15), KillerCage((6, 7, 8), 24)]
+    puzzle = SudokuBoard(3, cages)
+    solution = get_engine(engine_name).solve(puzzle, timeout=30)
+    assert solution is not None
+    _assert_valid_solution(puzzle, solution)
+    assert sorted(solution.values[:3]) == [1, 2, 3]
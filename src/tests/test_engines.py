@@ -0,0 +1,64 @@
+import pytest
+
+import Samples
+from data import SudokuBoard
+from solver import CachedEngine
+from solver.Deadline import SolveTimeout
+from solver.Engine import engine_names, get_engine
+
+SAMPLES = {name: getattr(Samples, name) for name in ("EASY_1", "MEDIUM_1", "EXPERT_1", "EVIL_1")}
+# EXPERT_1 and EVIL_1 are not proper puzzles, the engines may return any of their solutions
+UNIQUE = ("EASY_1", "MEDIUM_1")
+# EASY_1 without the givens of its first 16 cells, it has 6 solutions
+SIX_SOLUTIONS = "." * 16 + SudokuBoard.from_string(Samples.EASY_1).to_line()[16:]
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+def test_engines_agree_on_the_samples(name: str):
+    puzzle = SudokuBoard.from_string(SAMPLES[name])
+    given = puzzle.to_line()
+    solutions = {engine_name: get_engine(engine_name).solve(puzzle, timeout=30) for engine_name in engine_names()}
+    assert puzzle.to_line() == given
+    for solution in solutions.values():
+        assert solution.is_consistent() and solution.values.count(0) == 0
+        assert all(not v or v == s for v, s in zip(puzzle.values, solution.values))
+    if name in UNIQUE:
+        lines = {engine_name: solution.to_line() for engine_name, solution in solutions.items()}
+        assert len(set(lines.values())) == 1, lines
+    counts = {engine_name: get_engine(engine_name).count_solutions(puzzle, limit=5, timeout=30)
+              for engine_name in engine_names()}
+    assert set(counts.values()) == {1 if name in UNIQUE else 5}, counts
+
+
+def test_cached_engine_returns_the_solution_of_its_engine():
+    engine = CachedEngine(get_engine("dlx"))
+    for text in SAMPLES.values():
+        puzzle = SudokuBoard.from_string(text)
+        expected = get_engine("dlx").solve(puzzle).to_line()
+        assert engine.solve(puzzle).to_line() == expected
+        # the second solve is a cache hit
+        assert engine.solve(puzzle).to_line() == expected
+    assert engine.cache.misses == len(SAMPLES) and engine.cache.hits == len(SAMPLES)
+
+
+@pytest.mark.parametrize("engine_name", engine_names())
+def test_engines_enumerate_all_solutions(engine_name: str):
+    engine = get_engine(engine_name)
+    puzzle = SudokuBoard.from_line(SIX_SOLUTIONS)
+    solutions = [solution.to_line() for solution in engine.iter_solutions(puzzle, timeout=30)]
+    assert len(set(solutions)) == 6
+    for line in solutions:
+        solution = SudokuBoard.from_line(line)
+        assert solution.is_consistent() and solution.values.count(0) == 0
+        assert all(not v or v == s for v, s in zip(puzzle.values, solution.values))
+    assert set(solutions) == {s.to_line() for s in get_engine("dlx").iter_solutions(puzzle)}
+    assert engine.count_solutions(puzzle, timeout=30) == 6
+    assert engine.count_solutions(puzzle, limit=4, timeout=30) == 4
+    assert engine.count_solutions(SudokuBoard.from_line("55" + "." * 79)) == 0
+    assert puzzle.to_line() == SIX_SOLUTIONS
+
+
+@pytest.mark.parametrize("engine_name", engine_names())
+def test_counting_the_solutions_of_the_empty_board_times_out(engine_name: str):
+    with pytest.raises(SolveTimeout):
+        get_engine(engine_name).count_solutions(SudokuBoard(), timeout=0.05)
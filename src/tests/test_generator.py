@@ -0,0 +1,18 @@
+from generator.ParallelGenerator import generate_parallel
+from solver.Engine import get_engine
+
+
+def _lines(jobs: int) -> list[tuple[str, str]]:
+    return [(p.puzzle.to_line(), p.solution.to_line())
+            for p in generate_parallel(5, jobs=jobs, seed=11, chunk_size=2)]
+
+
+def test_same_seed_same_puzzles_whatever_the_number_of_workers():
+    assert _lines(1) == _lines(2)
+
+
+def test_generated_puzzles_have_their_solution():
+    for puzzle in generate_parallel(3, jobs=1, seed=5):
+        assert puzzle.solution.values.count(0) == 0
+        assert all(not v or v == s for v, s in zip(puzzle.puzzle.values, puzzle.solution.values))
+        assert get_engine("dlx").count_solutions(puzzle.puzzle, 2) == 1
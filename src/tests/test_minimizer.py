@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+import Samples
+from data import SudokuBoard
+from generator.Minimizer import Minimizer, minimize
+from main import main
+from solver.Engine import get_engine
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+
+
+def _assert_minimal(puzzle: SudokuBoard, minimal: SudokuBoard):
+    dlx = get_engine("dlx")
+    assert all(not v or v == p for v, p in zip(minimal.values, puzzle.values))
+    assert dlx.solve(minimal).to_line() == dlx.solve(puzzle).to_line()
+    assert dlx.count_solutions(minimal, limit=2) == 1
+    for index, value in enumerate(minimal.values):
+        if value:
+            minimal.values[index] = 0
+            assert dlx.count_solutions(minimal, limit=2) == 2, index
+            minimal.values[index] = value
+
+
+def test_minimize_gives_a_minimal_puzzle_with_the_same_solution():
+    puzzle = SudokuBoard.from_line(EASY)
+    minimal = minimize(puzzle)
+    assert puzzle.to_line() == EASY
+    assert minimal.values.count(0) > puzzle.values.count(0)
+    _assert_minimal(puzzle, minimal)
+
+
+def test_minimize_in_a_random_order():
+    # a solved board is a valid puzzle too, every clue is a candidate for removal
+    solution = get_engine("dlx").solve(SudokuBoard.from_line(EASY))
+    minimal = [minimize(solution, rng=random.Random(seed)) for seed in (1, 2)]
+    for puzzle in minimal:
+        _assert_minimal(solution, puzzle)
+    assert minimal[0].to_line() != minimal[1].to_line()
+
+
+def test_forced_clues_are_removed_without_search():
+    puzzle = SudokuBoard.from_line(EASY)
+    minimizer = Minimizer()
+    dlx = get_engine("dlx")
+    for index, value in enumerate(puzzle.values):
+        if value:
+            puzzle.values[index] = 0
+            expected = dlx.count_solutions(puzzle, limit=2) == 1
+            puzzle.values[index] = value
+            assert minimizer.can_remove(puzzle, index) == expected
+    assert puzzle.to_line() == EASY
+    assert minimizer.forced > 0 and minimizer.searched > 0
+    # on a solved board each clue is the only candidate left by its peers
+    solution = dlx.solve(puzzle)
+    minimizer = Minimizer()
+    assert all(minimizer.can_remove(solution, index) for index in range(len(solution.values)))
+    assert minimizer.forced == len(solution.values) and minimizer.searched == 0
+
+
+def test_minimize_rejects_puzzles_without_a_unique_solution(tmp_path, capsys):
+    with pytest.raises(ValueError):
+        minimize(SudokuBoard.from_string(Samples.EVIL_1))
+
+    source = tmp_path / "puzzles.txt"
+    source.write_text(f"{EASY}\n{SudokuBoard.from_string(Samples.EVIL_1).to_line()}\n", encoding="utf-8")
+    output = tmp_path / "minimal.txt"
+    assert main(["minimize", str(source), "-o", str(output)]) == 1
+    assert output.read_text().splitlines() == [minimize(SudokuBoard.from_line(EASY)).to_line()]
+    assert "puzzle 1: The puzzle does not have a unique solution." in capsys.readouterr().err
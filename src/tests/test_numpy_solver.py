@@ -0,0 +1,50 @@
+import pytest
+
+import Samples
+from data import SudokuBoard
+from solver.Engine import get_engine
+
+np = pytest.importorskip("numpy")
+
+from solver.NumpySolver import STATUS_INVALID, STATUS_SOLVED, STATUS_STUCK, NumpySolver  # noqa: E402
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+# the first puzzle of the hard-v1 benchmark corpus, singles are not enough for it
+HARD = "..7.8..3..3..5.1..2...37..98.....795.73..8.....4.....2.4.....5....1.......2.69..."
+# consistent, but the last cell of the first row can only be 9 and its column has one
+NO_SOLUTION = "12345678." + "........9" + "." * 63
+
+
+def test_propagate_sorts_the_boards_by_status():
+    lines = [EASY, HARD, "55" + "." * 79, NO_SOLUTION]
+    values = np.frombuffer(b"".join(bytes(SudokuBoard.from_line(line).values) for line in lines), dtype=np.uint8)
+    before = values.copy()
+    propagated, status = NumpySolver(block_size=3).propagate(values)
+    assert list(status) == [STATUS_SOLVED, STATUS_STUCK, STATUS_INVALID, STATUS_INVALID]
+    assert np.array_equal(values, before)
+    assert bytes(propagated[0]) == bytes(get_engine("dlx").solve(SudokuBoard.from_line(EASY)).values)
+    # the values placed on the stuck board are those of its solution
+    solution = get_engine("dlx").solve(SudokuBoard.from_line(HARD)).values
+    assert all(not v or v == s for v, s in zip(propagated[1], solution))
+    assert np.count_nonzero(propagated[1]) > sum(c != "." for c in HARD)
+
+
+def test_solve_many_matches_the_dlx_engine():
+    lines = [EASY, HARD, NO_SOLUTION, SudokuBoard.from_string(Samples.EVIL_1).to_line()]
+    boards = [SudokuBoard.from_line(line) for line in lines]
+    solutions = NumpySolver(block_size=2).solve_many(boards)
+    dlx = get_engine("dlx")
+    for board, solution in zip(boards, solutions):
+        expected = dlx.solve(board)
+        assert (solution is None) == (expected is None)
+        if expected is not None:
+            assert all(not v or v == s for v, s in zip(board.values, solution.values))
+            assert solution.is_consistent() and 0 not in solution.values
+    assert [b.to_line() for b in boards] == lines
+
+
+def test_other_sizes_go_to_the_fallback_engine():
+    board = SudokuBoard(4)
+    solution = NumpySolver().solve(board, timeout=30)
+    assert solution.geometry is board.geometry
+    assert solution.is_consistent() and 0 not in solution.values
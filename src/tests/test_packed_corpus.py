@@ -0,0 +1,108 @@
+import argparse
+
+import pytest
+
+import Samples
+from batch import BatchCli
+from batch.PackedCorpus import HEADER, PackedCorpus, is_packed_corpus, read_packed_puzzles, write_packed_corpus
+from batch.ParallelSolver import ParallelSolver
+from data import SudokuBoard
+from data.PackedBoard import PACKED_SIZE, pack_values, unpack_values
+from solver.Engine import get_engine
+
+PUZZLES = [SudokuBoard.from_string(text) for text in (Samples.EASY_1, Samples.MEDIUM_1, Samples.EVIL_1)]
+
+
+def test_pack_round_trip():
+    for puzzle in PUZZLES:
+        packed = pack_values(puzzle.values)
+        assert len(packed) == PACKED_SIZE
+        assert unpack_values(packed) == puzzle.values
+    assert unpack_values(pack_values(bytes(81))) == bytes(81)
+    assert unpack_values(pack_values(bytes([9] * 81))) == bytes([9] * 81)
+
+
+def test_unpack_rejects_cells_above_9():
+    with pytest.raises(ValueError):
+        unpack_values(b"\xa0" + bytes(PACKED_SIZE - 1))
+
+
+@pytest.mark.parametrize("values", [bytes([10]) + bytes(80), bytes(80) + bytes([16]), bytes(80), bytes(82)])
+def test_pack_rejects_what_a_nibble_cannot_hold(values: bytes):
+    with pytest.raises(ValueError):
+        pack_values(values)
+
+
+def test_corpus_round_trip(tmp_path):
+    path = str(tmp_path / "corpus.sdkp")
+    solutions = [get_engine("dlx").solve(puzzle) for puzzle in PUZZLES]
+    records = [(puzzle.values, solution.values) for puzzle, solution in zip(PUZZLES, solutions)]
+    # a puzzle with no known solution
+    records.append((PUZZLES[0].values, None))
+    assert write_packed_corpus(path, records, with_solutions=True) == 4
+    assert is_packed_corpus(path)
+    with PackedCorpus(path) as corpus:
+        assert len(corpus) == 4 and corpus.has_solutions
+        assert corpus.record_size == 2 * PACKED_SIZE
+        for index, (puzzle, solution) in enumerate(zip(PUZZLES, solutions)):
+            assert corpus[index].to_line() == puzzle.to_line()
+            assert corpus.solution(index).to_line() == solution.to_line()
+        assert corpus[-1].to_line() == PUZZLES[0].to_line()
+        assert corpus.solution(-1) is None
+        with pytest.raises(IndexError):
+            corpus.puzzle_values(4)
+        assert [record.text for record in read_packed_puzzles(corpus)] == \
+               [puzzle.to_line() for puzzle in PUZZLES] + [PUZZLES[0].to_line()]
+
+
+def test_corpus_without_solutions(tmp_path):
+    path = str(tmp_path / "corpus.sdkp")
+    write_packed_corpus(path, ((puzzle.values, None) for puzzle in PUZZLES))
+    with PackedCorpus(path) as corpus:
+        assert not corpus.has_solutions
+        assert len(corpus.records()) == len(PUZZLES) * PACKED_SIZE
+        assert [board.to_line() for board in corpus] == [puzzle.to_line() for puzzle in PUZZLES]
+        with pytest.raises(ValueError):
+            corpus.solution(0)
+
+
+def test_not_a_corpus(tmp_path):
+    path = tmp_path / "puzzles.txt"
+    path.write_text(PUZZLES[0].to_line() + "\n")
+    assert not is_packed_corpus(str(path))
+    with pytest.raises(ValueError):
+        PackedCorpus(str(path))
+
+
+def _corpus_with_a_bad_record(path: str):
+    write_packed_corpus(path, ((puzzle.values, None) for puzzle in PUZZLES * 3))
+    # a nibble above 9 in the first cell of record 4
+    with open(path, "r+b") as corpus_file:
+        corpus_file.seek(HEADER.size + 4 * PACKED_SIZE)
+        corpus_file.write(b"\xa0")
+
+
+def test_parallel_solver_reads_the_packed_records(tmp_path):
+    path = str(tmp_path / "corpus.sdkp")
+    _corpus_with_a_bad_record(path)
+    solver = ParallelSolver("dlx", jobs=2, initial_chunk_size=2)
+    with PackedCorpus(path) as corpus:
+        expected = [(r.number, r.puzzle, r.solution, r.status, r.message)
+                    for r in ParallelSolver("dlx", jobs=2).solve(read_packed_puzzles(corpus))]
+        results = [(r.number, r.puzzle, r.solution, r.status, r.message) for r in solver.solve_corpus(corpus)]
+        assert results == expected
+        assert [r.number for r in solver.solve_corpus(corpus, 2, 5)] == [2, 3, 4]
+    assert len(results) == 9 and results[4][4].startswith("Invalid packed board")
+
+
+def test_batch_command_solves_a_corpus_the_same_on_all_jobs(tmp_path):
+    path = str(tmp_path / "corpus.sdkp")
+    _corpus_with_a_bad_record(path)
+    outputs = []
+    for jobs in ("1", "2"):
+        output = tmp_path / f"out{jobs}.txt"
+        parser = argparse.ArgumentParser()
+        BatchCli.add_arguments(parser)
+        assert BatchCli.run(parser.parse_args([path, "-o", str(output), "-j", jobs, "-q"])) == 1
+        outputs.append([line.split("\t")[:3] for line in output.read_text().splitlines()])
+    assert outputs[0] == outputs[1] and len(outputs[0]) == 9
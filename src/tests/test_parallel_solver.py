@@ -0,0 +1,39 @@
+import Samples
+from batch.BatchSolver import PuzzleStatus
+from batch.ParallelSolver import ParallelSolver
+from batch.PuzzleReader import read_puzzles
+from data import SudokuBoard
+from solver import Engine
+from solver.DlxSolver import DlxSolver
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+MEDIUM = SudokuBoard.from_string(Samples.MEDIUM_1).to_line()
+
+
+class _FailingEngine(DlxSolver):
+    """
+    Fails on the puzzles that start with 9.
+    """
+
+    def solve(self, board, timeout=None, stats=None):
+        if board.values[0] == 9:
+            raise RuntimeError("boom")
+        return super().solve(board, timeout, stats)
+
+
+def test_results_keep_the_input_order():
+    lines = [EASY, MEDIUM, "55" + "." * 79, EASY] * 5
+    results = list(ParallelSolver("dlx", jobs=2, initial_chunk_size=3).solve(read_puzzles(lines)))
+    assert [r.number for r in results] == list(range(len(lines)))
+    assert [r.status for r in results[:4]] == [PuzzleStatus.SOLVED, PuzzleStatus.SOLVED, PuzzleStatus.INVALID,
+                                               PuzzleStatus.SOLVED]
+
+
+def test_engine_errors_keep_their_message(monkeypatch):
+    # the worker processes are forked from this one and see the engine registered here
+    monkeypatch.setitem(Engine._ENGINES, "failing", _FailingEngine)
+    assert EASY[0] == "9" and MEDIUM[0] == "."
+    results = list(ParallelSolver("failing", jobs=2).solve(read_puzzles([MEDIUM, EASY])))
+    assert [r.status for r in results] == [PuzzleStatus.SOLVED, PuzzleStatus.FAILED]
+    assert results[0].message is None
+    assert results[1].message == "Solver error: RuntimeError('boom')"
@@ -0,0 +1,80 @@
+import argparse
+import json
+
+import Samples
+from batch import BatchCli
+from batch.BatchSolver import PuzzleStatus, solve_records
+from batch.PuzzleReader import read_puzzles
+from batch.PuzzleStore import PuzzleStore, StoredPuzzle, looked_up, solve_with_store
+from data import SudokuBoard
+from solver.Engine import get_engine
+
+LINES = [SudokuBoard.from_string(getattr(Samples, name)).to_line()
+         for name in ("EASY_1", "MEDIUM_1", "EXPERT_1", "EVIL_1")]
+# two 5s in the first row, no solution
+NO_SOLUTION = "55" + "." * 79
+
+
+def _solve(records):
+    return solve_records(records, get_engine("dlx"))
+
+
+def test_get_and_put(tmp_path):
+    puzzle = SudokuBoard.from_line(LINES[0]).values
+    solution = get_engine("dlx").solve(SudokuBoard.from_line(LINES[0])).values
+    with PuzzleStore(str(tmp_path / "store.db")) as store:
+        assert store.get(puzzle) is None
+        store.put(puzzle, True, solution)
+        stored = store.get(puzzle)
+        assert stored.solved and stored.solution == bytes(solution)
+        # a rating added later keeps the solution
+        store.put(puzzle, None, rating={"grade": "easy"})
+        stored = store.get(puzzle)
+        assert stored.solution == bytes(solution) and stored.rating == {"grade": "easy"}
+        assert len(store) == 1
+
+
+def test_looked_up_keeps_input_order(tmp_path):
+    with PuzzleStore(str(tmp_path / "store.db")) as store:
+        store.put(SudokuBoard.from_line(LINES[1]).values, False)
+        items = list(looked_up(read_puzzles(LINES + ["not a puzzle"]), store))
+        assert [record.text for record, _ in items] == LINES + ["not a puzzle"]
+        assert [stored is not None for _, stored in items] == [False, True, False, False, False]
+
+
+def test_solve_with_store_hits_and_misses(tmp_path):
+    lines = LINES + [NO_SOLUTION]
+    expected = [(r.solution, r.status) for r in _solve(read_puzzles(lines))]
+    with PuzzleStore(str(tmp_path / "store.db")) as store:
+        first = list(solve_with_store(read_puzzles(lines), _solve, store))
+        assert [(r.solution, r.status) for r in first] == expected
+        assert len(store) == len(lines)
+        second = list(solve_with_store(read_puzzles(lines), _solve, store))
+    assert [(r.solution, r.status) for r in second] == expected
+    assert [r.message for r in second] == ["Stored."] * len(LINES) + ["No solution (stored)."]
+    assert expected[-1][1] == PuzzleStatus.INVALID
+
+
+def _rate(tmp_path, store: str) -> list[dict]:
+    source = tmp_path / "puzzles.txt"
+    source.write_text("\n".join(LINES) + "\n")
+    output = tmp_path / "rated.jsonl"
+    parser = argparse.ArgumentParser()
+    BatchCli.add_rate_arguments(parser)
+    args = parser.parse_args([str(source), "-o", str(output), "-f", "jsonl", "--store", store, "-q"])
+    assert BatchCli.run_rate(args) == 0
+    return [json.loads(line) for line in output.read_text().splitlines()]
+
+
+def test_rate_reuses_stored_ratings(tmp_path):
+    store_path = str(tmp_path / "store.db")
+    first = _rate(tmp_path, store_path)
+    with PuzzleStore(store_path) as store:
+        # mark the stored ratings, a second run must answer from them
+        for line in LINES:
+            values = SudokuBoard.from_line(line).values
+            rating = dict(store.get(values).rating, stored=True)
+            store.put_many([(values, StoredPuzzle(None, rating=rating))])
+    second = _rate(tmp_path, store_path)
+    assert [d.pop("stored") for d in second] == [True] * len(LINES)
+    assert second == first
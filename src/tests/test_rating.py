@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import Samples
+from data import SudokuBoard
+from main import main
+from solver.Propagation import HiddenSingles, NakedSingles, PropagationPipeline
+from solver.Rating import SEARCH_SCORE_CAP, Grade, Rater, grade_order, rate
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+# the first puzzle of the hard-v1 benchmark corpus, the techniques leave it to the search
+HARD = "..7.8..3..3..5.1..2...37..98.....795.73..8.....4.....2.4.....5....1.......2.69..."
+# HARD with one more clue, naked and hidden pairs are enough for it
+MEDIUM = HARD[:36] + "5" + HARD[37:]
+# the first puzzle of the pathological-v1 benchmark corpus, with naked singles only it takes thousands of nodes
+PATHOLOGICAL = "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9"
+
+
+def test_the_grade_is_set_by_the_hardest_technique():
+    easy = rate(SudokuBoard.from_line(EASY))
+    assert easy.grade == Grade.EASY and easy.techniques == {"naked_single": EASY.count(".")}
+    assert easy.score == EASY.count(".")
+    medium = rate(SudokuBoard.from_line(MEDIUM))
+    assert medium.grade == Grade.MEDIUM and "naked_pair" in medium.techniques
+    assert medium.to_dict() == {"score": medium.score, "grade": "medium", "techniques": medium.techniques}
+    hard = rate(SudokuBoard.from_line(HARD))
+    assert hard.grade == Grade.EVIL and hard.branches >= 1 and hard.max_depth >= 1 and not hard.search_bounded
+    assert easy.score < medium.score < hard.score
+    assert grade_order(Grade.EASY) < grade_order(Grade.MEDIUM) < grade_order(Grade.EXPERT) < grade_order(Grade.EVIL)
+
+
+def test_rate_logic_needs_the_techniques_to_be_enough():
+    rater = Rater()
+    assert rater.rate_logic(SudokuBoard.from_line(MEDIUM)).grade == Grade.MEDIUM
+    assert rater.rate_logic(SudokuBoard.from_line(HARD)) is None
+    # with singles only, the pairs of MEDIUM are replaced by search
+    singles = Rater(PropagationPipeline([NakedSingles(), HiddenSingles()]))
+    assert singles.rate_logic(SudokuBoard.from_line(MEDIUM)) is None
+    assert singles.rate(SudokuBoard.from_line(MEDIUM)).grade == Grade.EVIL
+
+
+def test_the_search_is_bounded():
+    rater = Rater(PropagationPipeline([NakedSingles()]), search_timeout=1e-6)
+    rating = rater.rate(SudokuBoard.from_line(PATHOLOGICAL))
+    assert rating.grade == Grade.EVIL and rating.search_bounded
+    assert rating.score >= SEARCH_SCORE_CAP
+
+
+def test_puzzles_with_no_solution_are_not_rated(tmp_path):
+    with pytest.raises(ValueError):
+        rate(SudokuBoard.from_line("12345678." + "........9" + "." * 63))
+
+    source = tmp_path / "puzzles.txt"
+    source.write_text(f"{EASY}\n{'55' + '.' * 79}\n{MEDIUM}\n", encoding="utf-8")
+    output = tmp_path / "ratings.jsonl"
+    assert main(["rate", str(source), "-o", str(output), "-f", "jsonl", "-q"]) == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["grade"] for r in records] == ["easy", "invalid", "medium"]
+    assert records[1]["message"] and records[2]["score"] == rate(SudokuBoard.from_line(MEDIUM)).score
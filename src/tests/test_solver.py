@@ -0,0 +1,196 @@
+import pytest
+
+import Samples
+from data import SudokuBoard
+from solver.Deadline import SolveTimeout
+from solver.Engine import get_engine
+from solver.Propagation import PropagationPipeline
+from solver.Solver import Solver, StepGranularity
+from solver.Stats import SolverStats
+from solver.Trail import Trail
+
+EASY = SudokuBoard.from_string(Samples.EASY_1).to_line()
+# the first puzzle of the hard-v1 benchmark corpus, it needs branching
+HARD = "..7.8..3..3..5.1..2...37..98.....795.73..8.....4.....2.4.....5....1.......2.69..."
+
+
+def _run(solver: Solver, granularity: StepGranularity = StepGranularity.PLACEMENT) -> tuple[bool, int]:
+    """
+    Drives solve() to its end.
+    :return: whether it solved the board, and the number of steps it yielded
+    """
+    steps = solver.solve(granularity)
+    solved = next(steps)
+    count = 1
+    while not solved:
+        try:
+            # the solver stops when sent False, None included
+            solved = steps.send(True)
+        except StopIteration:
+            break
+        count += 1
+    return solved, count
+
+
+@pytest.mark.parametrize("line", [EASY, HARD])
+def test_incremental_and_full_recompute_solve_alike(line: str):
+    expected = get_engine("dlx").solve(SudokuBoard.from_line(line)).to_line()
+    for incremental in (True, False):
+        board = SudokuBoard.from_line(line)
+        assert _run(Solver(board, incremental=incremental))[0]
+        assert board.to_line() == expected
+
+
+def test_a_placement_removes_the_value_from_the_notes_of_the_peers_only():
+    board = SudokuBoard.from_line(HARD)
+    solver = Solver(board)
+    solver._update_notes()
+    index = HARD.index(".")
+    value = board.get_notes_mask_at(index).bit_length()
+    before = list(board.notes_masks)
+    assert solver._place(index, value)
+    peers = set(board.geometry.peers[index])
+    for i in range(board.geometry.num_cells):
+        if i == index or board.values[i]:
+            continue
+        # the incremental notes are those a full recompute gives
+        assert board.notes_masks[i] == board.geometry.all_notes_mask & ~board.get_used_mask_at(i)
+        if i not in peers:
+            assert board.notes_masks[i] == before[i]
+
+
+def test_a_pipeline_requires_the_incremental_mode():
+    with pytest.raises(ValueError):
+        Solver(SudokuBoard(), incremental=False, pipeline=PropagationPipeline())
+
+
+def test_trail_restores_the_cells_changed_since_a_mark():
+    board = SudokuBoard.from_line(EASY)
+    trail = Trail(board)
+    first, second = [i for i, c in enumerate(EASY) if c == "."][:2]
+    board.set_notes_mask_at(first, 0b101)
+    mark = trail.mark()
+    for index, value in ((first, 4), (second, 6)):
+        trail.record(index)
+        board.set_value_at(index, value)
+    trail.record(first)
+    board.set_value_at(first, 8)
+    assert len(trail) == 3
+    trail.undo_to(mark)
+    assert board.values[first] == 0 and board.get_notes_mask_at(first) == 0b101
+    assert board.to_line() == EASY
+    assert len(trail) == mark
+
+
+def test_trail_tells_the_changed_cells():
+    board = SudokuBoard.from_line(EASY)
+    trail = Trail(board)
+    trail.track_changes()
+    mark = trail.mark()
+    trail.record(3)
+    assert trail.take_changed() == {3}
+    trail.record(5)
+    trail.undo_to(mark)
+    # the cell 3 was restored too
+    assert trail.take_changed() == {3, 5}
+    assert trail.take_changed() == set()
+
+
+def test_backtracking_undoes_to_the_branch():
+    board = SudokuBoard.from_line(HARD)
+    stats = SolverStats()
+    assert _run(Solver(board, stats=stats))[0]
+    assert stats.backtracks > 0
+    assert board.is_consistent() and board.values.count(0) == 0
+    assert all(not v or v == s for v, s in zip(SudokuBoard.from_line(HARD).values, board.values))
+
+
+def test_solve_to_completion_returns_a_new_board():
+    puzzle = SudokuBoard.from_line(HARD)
+    stats = SolverStats()
+    solution = Solver.solve_to_completion(puzzle, stats=stats)
+    assert puzzle.to_line() == HARD
+    assert solution.to_line() == get_engine("dlx").solve(puzzle).to_line()
+    assert stats.nodes > 1 and stats.backtracks > 0
+
+
+def test_solve_to_completion_of_a_puzzle_with_no_solution():
+    # consistent, but the last cell of the first row can only be 9 and its column has one
+    puzzle = SudokuBoard.from_line("12345678." + "........9" + "." * 63)
+    assert puzzle.is_consistent()
+    assert Solver.solve_to_completion(puzzle) is None
+    assert Solver.solve_to_completion(SudokuBoard.from_line("55" + "." * 79)) is None
+
+
+def test_solve_to_completion_times_out():
+    # the first puzzle of the pathological-v1 benchmark corpus, it takes thousands of nodes
+    puzzle = SudokuBoard.from_line(
+        "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9")
+    stats = SolverStats()
+    with pytest.raises(SolveTimeout):
+        Solver.solve_to_completion(puzzle, timeout=1e-6, stats=stats)
+    # the counters of the interrupted search are kept
+    assert stats.nodes > 0
+
+
+def test_coarser_granularities_yield_fewer_steps_to_the_same_solution():
+    expected = Solver.solve_to_completion(SudokuBoard.from_line(HARD)).to_line()
+    counts = []
+    for granularity in (StepGranularity.PLACEMENT, StepGranularity.PROPAGATION, StepGranularity.BRANCH):
+        board = SudokuBoard.from_line(HARD)
+        solved, count = _run(Solver(board), granularity)
+        assert solved and board.to_line() == expected
+        counts.append(count)
+    assert counts[0] > counts[1] > counts[2] > 1
+
+
+def test_sending_false_stops_the_search():
+    board = SudokuBoard.from_line(HARD)
+    steps = Solver(board).solve(StepGranularity.BRANCH)
+    assert next(steps) is False
+    with pytest.raises(StopIteration):
+        steps.send(False)
+    assert 0 in board.values
+
+
+def test_stepping_ends_on_a_puzzle_with_no_solution():
+    board = SudokuBoard.from_line("12345678." + "........9" + "." * 63)
+    # no branch is needed to find the contradiction, the only step is the end of the search
+    assert _run(Solver(board), StepGranularity.BRANCH) == (False, 1)
+
+
+@pytest.mark.parametrize("line", [EASY, HARD])
+def test_changed_cells_cover_every_cell_a_step_changed(line: str):
+    board = SudokuBoard.from_line(line)
+    solver = Solver(board)
+    solver.track_changes()
+    steps = solver.solve()
+    solved = next(steps)
+    # the first step recomputed all notes
+    assert solver.take_changed_cells() is None
+    before = list(zip(board.values, board.notes_masks))
+    sizes = []
+    while not solved:
+        try:
+            solved = steps.send(True)
+        except StopIteration:
+            break
+        changed = solver.take_changed_cells()
+        after = list(zip(board.values, board.notes_masks))
+        assert {i for i, cells in enumerate(zip(before, after)) if cells[0] != cells[1]} <= changed
+        sizes.append(len(changed))
+        before = after
+    assert solved
+    # most steps place one value, they change a cell and some of its peers, only a backtrack restores more
+    assert sorted(sizes)[len(sizes) // 2] <= len(board.geometry.peers[0]) + 1
+
+
+def test_changed_cells_of_the_full_recompute_mode_are_unknown():
+    solver = Solver(SudokuBoard.from_line(EASY), incremental=False)
+    solver.track_changes()
+    steps = solver.solve()
+    next(steps)
+    steps.send(True)
+    solver.take_changed_cells()
+    steps.send(True)
+    assert solver.take_changed_cells() is None
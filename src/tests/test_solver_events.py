@@ -0,0 +1,102 @@
+import collections
+import io
+import json
+import logging
+
+import Samples
+from data import SudokuBoard
+from solver.Events import EventKind, EventLevel, JsonLinesSink, LoggingSink, RingBufferSink
+from solver.Propagation import PropagationPipeline
+from solver.Solver import Solver
+
+
+def _trace(board: SudokuBoard, pipeline: PropagationPipeline | None) -> list:
+    solver = Solver(board, pipeline=pipeline)
+    sink = RingBufferSink(100_000, EventLevel.DEBUG)
+    solver.add_sink(sink)
+    steps = solver.solve()
+    solved = next(steps)
+    while not solved:
+        # the solver stops when sent False, None included
+        solved = steps.send(True)
+    return sink.events()
+
+
+def test_every_placement_is_traced_without_pipeline():
+    board = SudokuBoard.from_string(Samples.EASY_1)
+    empty = board.values.count(0)
+    events = _trace(board, None)
+    places = [e for e in events if e.kind == EventKind.PLACE]
+    assert len(places) == empty
+    assert {e.technique for e in places} == {"single"}
+
+
+def test_every_placement_is_traced_with_pipeline():
+    board = SudokuBoard.from_string(Samples.EASY_1)
+    empty = board.values.count(0)
+    events = _trace(board, PropagationPipeline())
+    places = [e for e in events if e.kind == EventKind.PLACE]
+    assert len(places) == empty
+    assert all(e.technique for e in places)
+    assert events[-1].kind == EventKind.SOLVED
+
+
+def test_branches_are_not_traced_as_placements():
+    board = SudokuBoard.from_string(Samples.EVIL_1)
+    events = _trace(board, PropagationPipeline())
+    kinds = collections.Counter(e.kind for e in events)
+    # each cell is filled once on the solution path, branches and undone placements come on top
+    assert kinds[EventKind.BRANCH] > 0
+    assert kinds[EventKind.PLACE] + kinds[EventKind.BRANCH] >= board.values.count(0)
+    assert events[-1].kind == EventKind.SOLVED
+    assert events[-1].to_dict() == {"kind": "solved", "depth": events[-1].depth}
+
+
+def test_sinks_receive_the_events_at_or_above_their_level():
+    solver = Solver(SudokuBoard.from_string(Samples.EVIL_1))
+    info, trace = RingBufferSink(100_000), RingBufferSink(100_000, EventLevel.TRACE)
+    solver.add_sink(info)
+    solver.add_sink(trace)
+    steps = solver.solve()
+    solved = next(steps)
+    while not solved:
+        solved = steps.send(True)
+    assert {e.kind for e in info.events()} <= {EventKind.BRANCH, EventKind.BACKTRACK, EventKind.CONTRADICTION,
+                                               EventKind.SOLVED}
+    assert EventKind.BRANCH in {e.kind for e in info.events()}
+    trace_kinds = {e.kind for e in trace.events()}
+    assert EventKind.PLACE in trace_kinds and EventKind.ELIMINATE in trace_kinds
+    # the INFO events are the same for both sinks
+    assert [str(e) for e in trace.events() if e.level >= EventLevel.INFO] == [str(e) for e in info.events()]
+
+
+def test_a_removed_sink_receives_nothing():
+    solver = Solver(SudokuBoard.from_string(Samples.EASY_1))
+    sink = RingBufferSink(level=EventLevel.DEBUG)
+    solver.add_sink(sink)
+    solver.remove_sink(sink)
+    steps = solver.solve()
+    solved = next(steps)
+    while not solved:
+        solved = steps.send(True)
+    assert sink.events() == []
+
+
+def test_json_lines_and_logging_sinks(caplog):
+    stream = io.StringIO()
+    json_sink = JsonLinesSink(stream, EventLevel.DEBUG)
+    solver = Solver(SudokuBoard.from_string(Samples.EASY_1))
+    solver.add_sink(json_sink)
+    solver.add_sink(LoggingSink(logging.getLogger("solver.test"), EventLevel.DEBUG))
+    with caplog.at_level(logging.DEBUG, logger="solver.test"):
+        steps = solver.solve()
+        solved = next(steps)
+        while not solved:
+            solved = steps.send(True)
+    json_sink.close()
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records[-1]["kind"] == "solved"
+    place = next(r for r in records if r["kind"] == "place")
+    assert 0 <= place["row"] < 9 and 0 <= place["col"] < 9 and 1 <= place["value"] <= 9
+    assert len(caplog.records) == len(records)
+    assert caplog.records[-1].levelno == logging.INFO and caplog.records[0].levelno == logging.DEBUG
@@ -0,0 +1,48 @@
+import pytest
+
+from data import SudokuBoard
+from solver.Engine import engine_names, get_engine
+from solver.Stats import PHASES, SolverStats
+
+# the first puzzle of the hard-v1 benchmark corpus, it needs branching
+HARD = "..7.8..3..3..5.1..2...37..98.....795.73..8.....4.....2.4.....5....1.......2.69..."
+
+
+@pytest.mark.parametrize("engine_name", engine_names())
+def test_engines_count_their_search(engine_name: str):
+    engine = get_engine(engine_name)
+    stats = SolverStats()
+    solution = engine.solve(SudokuBoard.from_line(HARD), None, stats)
+    assert solution.to_line() == engine.solve(SudokuBoard.from_line(HARD)).to_line()
+    assert stats.solves == 1 and stats.nodes > 1 and stats.max_depth >= 1
+    assert stats.placements.get("branch", 0) >= 1
+    assert sum(stats.placements.values()) >= HARD.count(".")
+    if engine_name != "dlx":
+        # the Solver engines count a node per tried note, and time their phases
+        assert stats.nodes == stats.placements["branch"] + 1
+        assert stats.eliminations > 0
+        assert set(stats.phase_seconds) <= set(PHASES) and sum(stats.phase_seconds.values()) > 0
+
+
+def test_the_pipeline_counts_its_techniques():
+    stats = SolverStats()
+    get_engine("propagation").solve(SudokuBoard.from_line(HARD), None, stats)
+    assert stats.passes > 0 and stats.technique_eliminations
+    assert {"naked_single", "hidden_single"} <= set(stats.placements)
+
+
+def test_stats_add_up():
+    total = SolverStats()
+    engine = get_engine("backtracking")
+    single = SolverStats()
+    engine.solve(SudokuBoard.from_line(HARD), None, single)
+    for _ in range(3):
+        stats = SolverStats()
+        engine.solve(SudokuBoard.from_line(HARD), None, stats)
+        total.add(stats)
+    assert (total.solves, total.nodes, total.backtracks) == (3, 3 * single.nodes, 3 * single.backtracks)
+    assert total.max_depth == single.max_depth
+    assert total.placements == {name: 3 * count for name, count in single.placements.items()}
+    d = total.to_dict()
+    assert d["nodes"] == total.nodes and set(d["phase_ms"]) == set(total.phase_seconds)
+    assert str(total) == f"{total.nodes} nodes, {total.backtracks} backtracks, max depth {total.max_depth}"